@@ -2,16 +2,19 @@
 
 
 # Load TOC with curso_id, course_name, page_number
-import pandas as pd
-import fitz  # PyMuPDF
+import os
 import re
+import sys
+import pandas as pd
 
-# Load existing TOC list (preserves correct curso_id + names)
-df_detailed_pronatec2016 = pd.read_csv("D:/Country/Brazil/TechBrazil/working/mec/df_list_pronatec2016.csv")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prelims"))
+from techbrasil.correcoes import apply_overrides, load_overrides, report_unmatched
+from techbrasil.pdf_paginas import extract_pages
 
-# Open the detailed course catalog PDF
-with open("D:/Country/Brazil/TechBrazil/rawdata/mec/catalogo_cursos_pronatec_fic_2016.pdf", "rb") as f:
-    catalog_doc = fitz.open("pdf", f.read())
+catalog_pdf = "D:/Country/Brazil/TechBrazil/rawdata/mec/catalogo_cursos_pronatec_fic_2016.pdf"
+page_cache = "D:/Country/Brazil/TechBrazil/working/mec/cache_paginas"
+# Verified observacao text of the 8 courses that have one, keyed by curso_id
+observacoes_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pronatec_observacoes.csv")
 
 # Define field extraction patterns
 field_patterns = {
@@ -26,58 +29,32 @@ field_patterns = {
     "carga_horaria": r"(\d{2,4})\s*Horas"
 }
 
-# Create empty columns for each target field
-target_fields = list(field_patterns.keys())
-for col in target_fields:
-    df_detailed_pronatec2016[col] = None
-
-# Process each course
-for idx, row in df_detailed_pronatec2016.iterrows():
-    pg_num = int(row["page_number"]) - 1
-    text = ""
-    for offset in [0, 1]:
-        if pg_num + offset < len(catalog_doc):
-            text += catalog_doc[pg_num + offset].get_text()
-
-    for field, pattern in field_patterns.items():
-        match = re.search(pattern, text, re.DOTALL)
-        value = match.group(1).strip() if match else None
-
-        # Always clear observacao unless in hardcoded list
-        if field == "observacao" and row["curso_id"] not in {252, 307, 345, 346, 348, 529, 530, 642}:
-            value = None
-
-        df_detailed_pronatec2016.at[idx, field] = value
-
-# Hardcode full observacao text for the known 8 cases by curso_id
-# These strings are from verified entries, stripped of asterisks
-hardcoded_obs = {
-    252: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    307: "O curso só poderá ser ofertado por instituições credenciadas pelo DETRAN.",
-    345: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    346: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    348: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    529: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    530: "O curso só poderá ser ofertado por unidade acreditada pela Marinha do Brasil, por intermédio da Diretoria de Portos e Costas.",
-    642: "O curso só poderá ser ofertado por unidade autorizada pelo Ministério da Justiça, por intermédio do Departamento de Polícia Federal."
-}
-
-for cid, obs in hardcoded_obs.items():
-    df_detailed_pronatec2016.loc[df_detailed_pronatec2016["curso_id"] == cid, "observacao"] = obs
-
-
-
-
-
-
-
 
+def main():
+    # Load existing TOC list (preserves correct curso_id + names)
+    df_detailed_pronatec2016 = pd.read_csv("D:/Country/Brazil/TechBrazil/working/mec/df_list_pronatec2016.csv")
 
+    # Extract every page once (cached on disk by PDF hash, split across a process pool)
+    pages = extract_pages(catalog_pdf, cache_dir=page_cache)
+    n_pages = len(pages)
 
+    # Page-text index: each course reads its start page and the following one
+    pg_num = df_detailed_pronatec2016["page_number"].astype(int) - 1
+    course_text = pd.Series(
+        [(pages[pg] if pg < n_pages else "") + (pages[pg + 1] if pg + 1 < n_pages else "") for pg in pg_num],
+        index=df_detailed_pronatec2016.index,
+    )
 
+    for field, pattern in field_patterns.items():
+        df_detailed_pronatec2016[field] = course_text.str.extract(pattern, flags=re.DOTALL, expand=False).str.strip()
 
+    # Always clear observacao, then set the full text of the known cases in one indexed update
+    df_detailed_pronatec2016["observacao"] = None
+    report_unmatched(apply_overrides(df_detailed_pronatec2016, load_overrides(observacoes_path)))
 
+    # Save updated DataFrame
+    df_detailed_pronatec2016.to_csv("D:/Country/Brazil/TechBrazil/working/mec/df_detailed_pronatec2016.csv", index=False)
 
 
-# Save updated DataFrame
-df_detailed_pronatec2016.to_csv("D:/Country/Brazil/TechBrazil/working/mec/df_detailed_pronatec2016.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# bench_prelims.py
+
+# Benchmarks of the prelims/ Python pipelines, with regression tracking
+#   python prelims/benchmarks/bench_prelims.py                   # all benchmarks
+#   python prelims/benchmarks/bench_prelims.py fic_parse cnct    # names starting with these prefixes
+#   python prelims/benchmarks/bench_prelims.py --quick           # small inputs (smoke run)
+#   python prelims/benchmarks/bench_prelims.py --compare results/<file>.json --threshold 0.2
+# Each benchmark runs in a fresh process: setup (synthetic data, untimed), then `repeat` timed calls.
+# Wall time (best and median) and peak RSS are written to results/<timestamp>_<commit>.json and compared
+# with the previous results file; slower or bigger stages beyond the threshold are flagged and the
+# exit code is 1, so the run can gate a commit.
+
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, ".."))
+sys.path.insert(0, os.path.join(here, "..", "mec"))
+sys.path.insert(0, os.path.join(here, "..", "..", "archived"))
+
+import sinteticos
+from techbrasil.instrumentacao import peak_rss_mb
+
+DATA_DIR = os.path.join(here, ".data")
+RESULTS_DIR = os.path.join(here, "results")
+THRESHOLD = 0.20
+MIN_DELTA_S = 0.05  # differences below this are timer noise, never flagged
+
+
+# --- Benchmarks: name -> (setup(data_dir, quick) -> args, run(*args)) ---
+
+def _fic_setup(scale):
+    def setup(data_dir, quick):
+        import pronatec_cursos1a  # noqa: F401  (imported here so the timed call excludes import time)
+        return (sinteticos.fic_catalog(data_dir, scale=1 if quick else scale),)
+    return setup
+
+
+def _fic_run(path):
+    import pronatec_cursos1a
+    pronatec_cursos1a.build_pronatec(path)
+
+
+def _pdf_setup(data_dir, quick):
+    import tempfile
+    import pronatec_cursos1b  # noqa: F401
+    pdf = sinteticos.fic_pdf(data_dir, n_pages=40 if quick else 400)
+    return pdf, tempfile.mkdtemp(prefix="bench_pages_")
+
+
+def _pdf_run(pdf, cache_dir):
+    # Cold extraction (empty page cache), then the field regexes of pronatec_cursos1b.py over every entry
+    import shutil
+    import pandas as pd
+    import re
+    from pronatec_cursos1b import field_patterns
+    from techbrasil.pdf_paginas import extract_pages
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    pages = pd.Series(extract_pages(pdf, cache_dir=cache_dir))
+    for pattern in field_patterns.values():
+        pages.str.extract(pattern, flags=re.DOTALL, expand=False)
+
+
+def _cnct_setup(data_dir, quick):
+    import cnct1a  # noqa: F401
+    return (sinteticos.cnct_csv(data_dir, n_rows=20_000 if quick else 1_000_000),)
+
+
+def _cnct_run(path):
+    import cnct1a
+    cnct1a.build_cnct(path)
+
+
+def _propag_setup(data_dir, quick):
+    import numpy as np
+    from techbrasil.propag import scenario_grid
+    n = 10 if quick else 40
+    grid = scenario_grid(np.linspace(0.005, 0.03, n), np.linspace(0.003, 0.02, n), horizon=np.arange(1, 11),
+                         amort_share=np.linspace(0.5, 1, 5))
+    return sinteticos.propag_inputs() + (grid,)
+
+
+def _propag_run(saldo, amort_extr, share, grid):
+    from techbrasil.propag import scenario_matrices
+    scenario_matrices(saldo, amort_extr, share, grid)
+
+
+def _mc_setup(data_dir, quick):
+    import techbrasil.trajetoria  # noqa: F401
+    return sinteticos.propag_inputs() + (1_000 if quick else 10_000,)
+
+
+def _mc_run(saldo, amort_extr, share, n_paths):
+    from techbrasil.trajetoria import monte_carlo
+    rate_model = {"ipca": {"mean": 0.04, "sd": 0.01, "persistence": 0.6}, "real_rate": {"mean": 0.01, "sd": 0.005}}
+    monte_carlo(saldo, amort_extr, share, rate_model, n_paths=n_paths)
+
+
+def _csv_setup(data_dir, quick):
+    import tempfile
+    import techbrasil.csv_grande  # noqa: F401
+    return sinteticos.rais_csv(data_dir, n_rows=200_000 if quick else 5_000_000), tempfile.mkdtemp(prefix="bench_rais_")
+
+
+def _csv_run(path, out_dir):
+    # RAIS-like file -> Parquet partitioned by UF/year, with a projection, typed columns and a CBO filter
+    import pyarrow.compute as pc
+    from techbrasil.csv_grande import to_parquet
+    to_parquet(
+        path, out_dir, partition_by=["UF", "ano"], constants={"ano": 2023},
+        columns=["UF", "CBO Ocupação 2002", "Vl Remun Média Nom", "Qtd Hora Contr"],
+        dtypes={"Vl Remun Média Nom": "float64", "Qtd Hora Contr": "int16"},
+        filters=lambda batch: pc.starts_with(batch.column("CBO Ocupação 2002"), "3"),
+    )
+
+
+def _gap_setup(data_dir, quick):
+    import numpy as np
+    import pandas as pd
+    from techbrasil.lacunas import GapEngine, read_demand
+    path = sinteticos.caged_parquet(data_dir, n_rows=200_000 if quick else 2_000_000)
+    demand = read_demand(path, geo="municipio")
+    # ~1,650 courses (CNCT + FIC) linked to 1-6 of the CAGED occupations each
+    rng = np.random.default_rng(0)
+    cbos = demand["cbo"].unique()
+    n_links = rng.integers(1, 7, size=1_650)
+    pairs = pd.DataFrame({
+        "catalog": np.repeat(np.where(np.arange(1_650) < 1_000, "cnct", "fic"), n_links),
+        "course_id": np.repeat(np.arange(1_650), n_links),
+        "cbo": rng.choice(cbos, size=n_links.sum()),
+    })
+    return GapEngine(pairs), demand
+
+
+def _gap_run(engine, demand):
+    engine.gaps(demand, geo_col="municipio")
+
+
+def _validate_setup(data_dir, quick):
+    import cnct1a
+    df, _ = cnct1a.build_cnct(sinteticos.cnct_csv(data_dir, n_rows=20_000 if quick else 1_000_000))
+    return df, cnct1a.output_checks
+
+
+def _validate_run(df, checks):
+    from techbrasil.validacao import validate
+    validate(df, checks, "df_cnct")
+
+
+def _painel_setup(data_dir, quick):
+    import tempfile
+    import cnct1a
+    import publicar_painel
+    from techbrasil.artefatos import write_artifact
+    out_dir = tempfile.mkdtemp(prefix="bench_painel_")
+    df, _ = cnct1a.build_cnct(sinteticos.cnct_csv(data_dir, n_rows=20_000 if quick else 1_000_000))
+    write_artifact(df.drop_duplicates("course_id"), os.path.join(out_dir, "cnct"))
+    publicar_painel.run(os.path.join(out_dir, "painel"), cnct_base=os.path.join(out_dir, "cnct"))
+    return (os.path.join(out_dir, "painel"),)
+
+
+def _painel_run(bundle_dir):
+    from publicar_painel import startup
+    startup(bundle_dir)
+
+
+def _editions_setup(data_dir, quick):
+    import tempfile
+    from techbrasil.edicoes import CNCT_SPEC, EditionStore
+    root = tempfile.mkdtemp(prefix="bench_edicoes_")
+    store = EditionStore(root)
+    for i, df in enumerate(sinteticos.cnct_editions(n_courses=500 if quick else 5_000, n_editions=10)):
+        store.add("cnct", f"{2010 + i}", df, CNCT_SPEC)
+    return (root,)
+
+
+def _editions_run(root):
+    # Fingerprints read from the store (as after ingesting each edition once), every diff recomputed
+    from techbrasil.edicoes import EditionStore
+    EditionStore(root).history("cnct", refresh=True)
+
+
+BENCHMARKS = {
+    "fic_parse_1x": (_fic_setup(1), _fic_run),
+    "fic_parse_10x": (_fic_setup(10), _fic_run),
+    "fic_parse_100x": (_fic_setup(100), _fic_run),
+    "pdf_extract_400p": (_pdf_setup, _pdf_run),
+    "cnct_coding_1m": (_cnct_setup, _cnct_run),
+    "propag_grid_80k": (_propag_setup, _propag_run),
+    "propag_montecarlo_10k": (_mc_setup, _mc_run),
+    "csv_rais_parquet_5m": (_csv_setup, _csv_run),
+    "gap_engine_5570mun": (_gap_setup, _gap_run),
+    "validate_cnct_1m": (_validate_setup, _validate_run),
+    "painel_startup": (_painel_setup, _painel_run),
+    "catalog_history_10x5k": (_editions_setup, _editions_run),
+}
+
+
+# --- Measurement (runs inside a fresh process) ---
+
+def _measure(name, data_dir, quick, repeat):
+    setup, run = BENCHMARKS[name]
+    args = setup(data_dir, quick)
+    rss_setup = peak_rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*args)
+        times.append(time.perf_counter() - start)
+    return {
+        "wall_s": min(times),
+        "wall_median_s": statistics.median(times),
+        "repeat": repeat,
+        "peak_rss_mb": peak_rss_mb(),
+        "setup_rss_mb": rss_setup,
+    }
+
+
+def run_benchmarks(names, data_dir=DATA_DIR, quick=False, repeat=3):
+    results = {}
+    ctx = get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                results[name] = pool.submit(_measure, name, data_dir, quick, repeat).result()
+            except Exception as exc:
+                results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+        r = results[name]
+        if "error" in r:
+            print(f"❌ {name}: {r['error']}")
+        else:
+            rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"→ {name}: {r['wall_s']:.3f} s (median {r['wall_median_s']:.3f} s), peak RSS {rss}")
+    return results
+
+
+# --- Results files and regression flags ---
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results, quick, results_dir=RESULTS_DIR):
+    commit = _git_commit()
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    doc = {
+        "commit": commit,
+        "timestamp": stamp,
+        "quick": quick,
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{stamp}_{commit}{'_quick' if quick else ''}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=1)
+    return path
+
+
+def previous_results(quick, results_dir=RESULTS_DIR):
+    # Quick and full runs are only compared with runs of the same kind; names sort by timestamp
+    files = sorted(f for f in glob.glob(os.path.join(results_dir, "*.json")) if f.endswith("_quick.json") == quick)
+    return files[-1] if files else None
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """List of (name, metric, old, new) for stages slower / bigger than baseline by more than threshold."""
+    flagged = []
+    for name, new in current.items():
+        old = baseline.get(name)
+        if not old or "error" in old or "error" in new:
+            continue
+        if new["wall_s"] > old["wall_s"] * (1 + threshold) and new["wall_s"] - old["wall_s"] > MIN_DELTA_S:
+            flagged.append((name, "wall_s", old["wall_s"], new["wall_s"]))
+        if old.get("peak_rss_mb") and new.get("peak_rss_mb") and new["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            flagged.append((name, "peak_rss_mb", old["peak_rss_mb"], new["peak_rss_mb"]))
+    return flagged
+
+
+def main(argv):
+    quick = "--quick" in argv
+    repeat = int(argv[argv.index("--repeat") + 1]) if "--repeat" in argv else (1 if quick else 3)
+    threshold = float(argv[argv.index("--threshold") + 1]) if "--threshold" in argv else THRESHOLD
+    baseline_path = argv[argv.index("--compare") + 1] if "--compare" in argv else previous_results(quick)
+    option_values = {argv[i + 1] for i, a in enumerate(argv[:-1]) if a in ("--repeat", "--threshold", "--compare")}
+    prefixes = [a for a in argv if not a.startswith("--") and a not in option_values]
+
+    names = [n for n in BENCHMARKS if not prefixes or any(n.startswith(p) for p in prefixes)]
+    results = run_benchmarks(names, quick=quick, repeat=repeat)
+    path = save_results(results, quick)
+    print(f"✅ Results saved to {path}")
+
+    if not baseline_path:
+        print("⚠️ No previous results to compare with")
+        return 0
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    flagged = compare(results, baseline["results"], threshold)
+    for name, metric, old, new in flagged:
+        print(f"⚠️ Regression in {name}: {metric} {old:.3f} → {new:.3f} ({new / old - 1:+.0%}) vs {baseline['commit']}")
+    if not flagged:
+        print(f"✅ No regressions vs {baseline['commit']} (threshold {threshold:.0%})")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,248 @@
+# sinteticos.py
+
+# Synthetic inputs for the benchmarks (the real raw files are on the private S3 bucket)
+# Every generator is seeded, so the same parameters always produce the same file; files are
+# written once under the benchmark data folder and reused by later runs.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.territorio import UF
+
+# Size of the 2016 PRONATEC FIC catalog (courses) and of the CNCT catalog (rows)
+FIC_2016_COURSES = 650
+CNCT_ROWS = 215
+
+_WORDS = (
+    "soldagem naval estruturas metálicas operador máquinas agricultura familiar saúde enfermagem cuidados "
+    "programação computadores redes logística transporte cargas turismo hospedagem alimentos cozinha gestão "
+    "administração finanças educação ensino construção civil elétrica manutenção predial mecânica automotiva"
+).split()
+
+_EIXOS = [
+    "Ambiente e Saúde", "Controle e Processos Industriais", "Desenvolvimento Educacional e Social",
+    "Gestão e Negócios", "Informação e Comunicação", "Infraestrutura", "Produção Alimentícia",
+    "Produção Cultural e Design", "Produção Industrial", "Recursos Naturais", "Segurança",
+    "Turismo, Hospitalidade e Lazer", "Militar",
+]
+
+
+def _phrases(rng, n, n_words):
+    # n phrases of n_words words drawn from _WORDS, built with one vectorized join per word position
+    words = np.asarray(_WORDS, dtype=object)[rng.integers(0, len(_WORDS), size=(n, n_words))]
+    out = words[:, 0]
+    for j in range(1, n_words):
+        out = out + " " + words[:, j]
+    return out
+
+
+def _cached(path, write):
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        write(tmp)
+        os.replace(tmp, path)
+    return path
+
+
+def fic_catalog(data_dir, scale=1, seed=0):
+    """FIC catalog text with FIC_2016_COURSES * scale entries, in the layout parse_fic_catalog() reads."""
+    n = int(FIC_2016_COURSES * scale)
+    path = os.path.join(data_dir, f"fic_catalog_{n}_{seed}.txt")
+
+    def write(tmp):
+        rng = np.random.default_rng(seed)
+        names = _phrases(rng, n, 4)
+        hours = rng.choice([160, 180, 200, 240, 400], size=n)
+        eixos = np.asarray(_EIXOS, dtype=object)[rng.integers(0, len(_EIXOS), size=n)]
+        perfis = _phrases(rng, n, 40)
+        cbo = rng.integers(2000, 9999, size=(n, 2))
+        with open(tmp, "w", encoding="latin1", errors="replace") as f:
+            f.write("CATÁLOGO NACIONAL DE CURSOS FIC\n")
+            for i in range(n):
+                # Some names wrap onto a second line, as in the PDF-to-text edition
+                name = names[i].capitalize()
+                if i % 5 == 0:
+                    name = name.replace(" ", "\n", 1)
+                f.write(
+                    f"{i + 1}. {name} {hours[i]} Horas\n"
+                    f"Código do Curso: {100000 + i}\n"
+                    f"Eixo Tecnológico: {eixos[i]} Escolaridade Mínima: Ensino Fundamental II incompleto\n"
+                    f"Perfil Profissional: {perfis[i]}.\n"
+                    f"Idade: 18 anos\n"
+                    f"Outros pré-requisitos: nenhum\n"
+                    f"Ocupações Associadas (CBO): {cbo[i, 0]}-10 Operador; {cbo[i, 1]}-05 Auxiliar\n"
+                )
+                if i % 50 == 0:
+                    f.write("Observação: O curso só poderá ser ofertado por unidade acreditada.\n")
+
+    return _cached(path, write)
+
+
+def cnct_csv(data_dir, n_rows=1_000_000, seed=0):
+    """CNCT catalog CSV (";" separated, ISO-8859-1) with the columns cnct1a.py reads."""
+    path = os.path.join(data_dir, f"cnct_{n_rows}_{seed}.csv")
+
+    def write(tmp):
+        rng = np.random.default_rng(seed)
+        eixo = rng.integers(0, len(_EIXOS), size=n_rows)
+        area = eixo * 4 + rng.integers(0, 4, size=n_rows)
+        curso = rng.integers(0, max(10, n_rows // 20), size=n_rows)
+        df = pd.DataFrame({
+            "Eixo Tecnológico": np.asarray(_EIXOS, dtype=object)[eixo],
+            "Área Tecnológica": pd.Series(area).map("Área {:03d}".format).to_numpy(),
+            "Denominação do Curso": pd.Series(curso).map("Técnico em Curso {:06d}".format).to_numpy(),
+            "Perfil Profissional de Conclusão": _phrases(rng, n_rows, 12),
+            "Carga Horária Mínima": rng.choice(["800 horas", "1000 horas", "1.200 horas"], size=n_rows),
+            "Descrição Carga Horária Mínima": "Carga horária mínima do curso",
+            "Pré-Requisitos para Ingresso": "Ensino médio",
+            "Itinerários Formativos": _phrases(rng, n_rows, 3),
+            "Campo de Atuação": _phrases(rng, n_rows, 6),
+            "Ocupações CBO Associadas": pd.Series(rng.integers(2000, 9999, size=n_rows)).map("{}-05 Técnico".format).to_numpy(),
+            "Infraestrutura Mínima": "Laboratório",
+            "Legislação Profissional": "",
+        })
+        df.to_csv(tmp, sep=";", index=False, encoding="ISO-8859-1", errors="replace")
+
+    return _cached(path, write)
+
+
+def rais_csv(data_dir, n_rows=5_000_000, seed=0):
+    """RAIS vínculos-like CSV (";" separated, ISO-8859-1): UF, município, CBO, CNAE, remuneração, horas."""
+    path = os.path.join(data_dir, f"rais_{n_rows}_{seed}.csv")
+
+    def write(tmp):
+        rng = np.random.default_rng(seed)
+        ufs = np.array(["RO", "AC", "AM", "RR", "PA", "AP", "TO", "MA", "PI", "CE", "RN", "PB", "PE", "AL",
+                        "SE", "BA", "MG", "ES", "RJ", "SP", "PR", "SC", "RS", "MS", "MT", "GO", "DF"], dtype=object)
+        # Written in slices so generating a multi-GB file does not need it in memory
+        step = 500_000
+        for start in range(0, n_rows, step):
+            n = min(step, n_rows - start)
+            df = pd.DataFrame({
+                "UF": ufs[rng.integers(0, len(ufs), size=n)],
+                "Município": rng.integers(110000, 530000, size=n),
+                "CBO Ocupação 2002": pd.Series(rng.integers(10000, 999999, size=n)).map("{:06d}".format).to_numpy(),
+                "CNAE 2.0 Classe": rng.integers(1000, 99999, size=n),
+                "Vl Remun Média Nom": pd.Series(rng.lognormal(7.8, 0.6, size=n)).map("{:.2f}".format).str.replace(".", ",").to_numpy(),
+                "Qtd Hora Contr": rng.choice([20, 30, 40, 44], size=n),
+                "Tipo Vínculo": rng.choice(["CLT U/PJ IND", "ESTATUTARIO", "CLT R/PJ IND"], size=n),
+            })
+            df.to_csv(tmp, sep=";", index=False, encoding="ISO-8859-1", mode="a", header=start == 0)
+
+    return _cached(path, write)
+
+
+def caged_parquet(data_dir, n_rows=2_000_000, n_cbo=2_500, n_municipios=5_570, seed=0):
+    """CAGED-like movements (basedosdados columns) over n_cbo occupations x n_municipios municipalities."""
+    path = os.path.join(data_dir, f"caged_{n_rows}_{n_cbo}_{n_municipios}_{seed}.parquet")
+
+    def write(tmp):
+        rng = np.random.default_rng(seed)
+        # IBGE UF code = first two digits of the 7-digit municipality code
+        mun_uf = UF.codes[rng.integers(0, len(UF), size=n_municipios)]
+        municipios = mun_uf * 100_000 + rng.choice(np.arange(10_000, 100_000), size=n_municipios, replace=False)
+        cbos = np.sort(rng.choice(np.arange(200_000, 999_999), size=n_cbo, replace=False))
+        # Skewed: a few large municipalities and common occupations carry most movements
+        mun_idx = np.minimum(rng.zipf(1.3, size=n_rows) - 1, n_municipios - 1)
+        cbo_idx = np.minimum(rng.zipf(1.2, size=n_rows) - 1, n_cbo - 1)
+        mun = municipios[rng.permutation(n_municipios)[mun_idx]]
+        df = pd.DataFrame({
+            "ano": np.int16(2024),
+            "mes": rng.integers(1, 13, size=n_rows).astype(np.int8),
+            "sigla_uf": UF.categorical(mun // 100_000),
+            "id_municipio": mun,
+            "cbo_2002": cbos[rng.permutation(n_cbo)[cbo_idx]],
+            "saldo_movimentacao": rng.choice(np.array([1, -1], dtype=np.int8), size=n_rows),
+            "n_movimentacoes": rng.integers(1, 20, size=n_rows).astype(np.int32),
+        })
+        df.to_parquet(tmp, index=False)
+
+    return _cached(path, write)
+
+
+def fic_pdf(data_dir, n_pages=400, seed=0):
+    """PDF with two FIC entries per page, laid out like catalogo_cursos_pronatec_fic_2016.pdf."""
+    path = os.path.join(data_dir, f"fic_catalog_{n_pages}_{seed}.pdf")
+
+    def write(tmp):
+        import fitz  # PyMuPDF
+        rng = np.random.default_rng(seed)
+        perfis = _phrases(rng, 2 * n_pages, 30)
+        doc = fitz.open()
+        for pg in range(n_pages):
+            page = doc.new_page()
+            y = 60
+            for k in range(2):
+                i = 2 * pg + k
+                lines = [
+                    f"{i + 1}. Curso sintético {i + 1} 160 Horas",
+                    f"Código do Curso: {100000 + i}",
+                    f"Eixo Tecnológico: {_EIXOS[i % len(_EIXOS)]}",
+                    "Escolaridade Mínima: Ensino Fundamental II incompleto",
+                    f"Perfil Profissional: {perfis[i][:90]}",
+                    f"{perfis[i][90:180]}",
+                    "Idade: 18 anos",
+                    "Outros pré-requisitos: nenhum",
+                    "Ocupações Associadas (CBO): 5153-10 Agente",
+                    "Observação: nenhuma",
+                ]
+                for line in lines:
+                    page.insert_text((50, y), line, fontsize=9)
+                    y += 14
+                y += 30
+        doc.save(tmp)
+        doc.close()
+
+    return _cached(path, write)
+
+
+def propag_inputs(n_uf=27, seed=0):
+    """Per-UF balances, extraordinary amortizations and FEF shares with realistic magnitudes."""
+    rng = np.random.default_rng(seed)
+    saldo = np.exp(rng.uniform(np.log(4e7), np.log(3e11), size=n_uf))
+    amort_extr = saldo * rng.uniform(0, 0.25, size=n_uf)
+    share = rng.uniform(1, 7.5, size=n_uf)
+    return saldo, amort_extr, share / share.sum() * 100
+
+
+def cnct_editions(n_courses=5_000, n_editions=10, seed=0):
+    """Successive editions of a CNCT-like catalog (list of DataFrames with the cnct1a output columns).
+
+    Between editions 2% of the courses are dropped, 2% added, 1% renamed, 1% moved to another eixo/área,
+    and 2% each get a new carga horária or CBO list.
+    """
+    rng = np.random.default_rng(seed)
+
+    def new_courses(n, start):
+        eixo = rng.integers(0, len(_EIXOS), size=n)
+        return pd.DataFrame({
+            "Eixo Tecnológico": np.asarray(_EIXOS, dtype=object)[eixo],
+            "Área Tecnológica": pd.Series(eixo * 4 + rng.integers(0, 4, size=n)).map("Área {:03d}".format).to_numpy(),
+            "Denominação do Curso": "Técnico em " + _phrases(rng, n, 3) + pd.Series(np.arange(start, start + n)).map(" {:06d}".format).to_numpy(),
+            "Carga Horária Mínima": rng.choice([800, 1000, 1200], size=n).astype(np.float64),
+            "Ocupações CBO Associadas": pd.Series(rng.integers(2000, 9999, size=n)).map("{}-05 Técnico".format).to_numpy(),
+        })
+
+    df = new_courses(n_courses, 0)
+    next_id = n_courses
+    editions = []
+    for _ in range(n_editions):
+        editions.append(df.assign(course_id=pd.Series(np.arange(len(df))).map("{:06d}".format).to_numpy())
+                        [["course_id"] + list(df.columns)])
+        n = len(df)
+        df = df.drop(index=rng.choice(n, size=n // 50, replace=False)).reset_index(drop=True)
+        n = len(df)
+        picks = rng.permutation(n)
+        renamed, moved = picks[:n // 100], picks[n // 100:n // 50]
+        carga, cbo = picks[n // 50:n // 50 * 2], picks[n // 50 * 2:n // 50 * 3]
+        df.loc[renamed, "Denominação do Curso"] = df.loc[renamed, "Denominação do Curso"] + " Integrado"
+        other = new_courses(len(moved), 0)
+        df.loc[moved, ["Eixo Tecnológico", "Área Tecnológica"]] = other[["Eixo Tecnológico", "Área Tecnológica"]].to_numpy()
+        df.loc[carga, "Carga Horária Mínima"] = df.loc[carga, "Carga Horária Mínima"] + 200
+        df.loc[cbo, "Ocupações CBO Associadas"] = df.loc[cbo, "Ocupações CBO Associadas"] + "; 5153-10 Auxiliar"
+        df = pd.concat([df, new_courses(n_courses // 50, next_id)], ignore_index=True)
+        next_id += n_courses // 50
+    return editions
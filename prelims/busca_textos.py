@@ -0,0 +1,94 @@
+# busca_textos.py
+
+# Full-text search over the course catalogs and the seminar transcripts
+#   python prelims/busca_textos.py build                     # (re)index sources that changed
+#   python prelims/busca_textos.py "soldagem naval" [--k 20]  # BM25 query, prints the top matches
+#   python prelims/busca_textos.py "juros" --source transcricao:
+# Sources: CNCT (perfil + campo de atuação), PRONATEC FIC (perfil profissional) and one source per
+# seminar transcript (one document per minute of speech). Unchanged sources are skipped.
+
+import glob
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, "mec"))
+sys.path.insert(0, os.path.join(here, "..", "seminarios"))
+
+import cnct1a
+import pronatec_cursos1a
+from techbrasil.artefatos import artifact_hash, read_artifact
+from techbrasil.busca import SearchIndex
+from techbrasil.memo import file_hash
+from youtubevideo_transcript import iter_segments, timestamp
+
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+INDEX_PATH = LOCAL_ROOT + "/working/busca"
+# Only transcripts fetched from YouTube (fixture runs are cached in sibling folders)
+TRANSCRIPT_CACHE = os.path.join(here, "..", "seminarios", "cache_transcricoes", "youtube")
+PARAGRAPH_SECONDS = 60
+
+
+def cnct_docs(base=cnct1a.OUTPUT_BASE):
+    df = read_artifact(base, columns=["course_id", "Denominação do Curso", "Perfil Profissional de Conclusão", "Campo de Atuação"])
+    text = df["Perfil Profissional de Conclusão"].fillna("") + "\n" + df["Campo de Atuação"].fillna("")
+    return [{"id": cid, "title": title, "text": t} for cid, title, t in zip(df["course_id"], df["Denominação do Curso"], text)]
+
+
+def fic_docs(base=pronatec_cursos1a.OUTPUT_BASE):
+    df = read_artifact(base, columns=["curso_id", "curso_nome", "perfil_profissional"])
+    return [
+        {"id": str(cid), "title": title, "text": t}
+        for cid, title, t in zip(df["curso_id"], df["curso_nome"], df["perfil_profissional"].fillna(""))
+    ]
+
+
+def transcript_docs(path, paragraph_seconds=PARAGRAPH_SECONDS):
+    # One document per paragraph_seconds of speech, titled "<video_id> [hh:mm:ss]"
+    video_id = os.path.basename(path).split(".")[0]
+    docs, end = [], None
+    for seg in iter_segments(path):
+        if end is None or seg["start"] >= end:
+            docs.append({"id": f"{video_id}@{int(seg['start'])}", "title": f"{video_id} [{timestamp(seg['start'])}]", "text": ""})
+            end = seg["start"] + paragraph_seconds
+        docs[-1]["text"] += seg["text"] + " "
+    return docs
+
+
+def build(index_path=INDEX_PATH, cnct_base=cnct1a.OUTPUT_BASE, fic_base=pronatec_cursos1a.OUTPUT_BASE,
+          transcript_cache=TRANSCRIPT_CACHE):
+    """Pipeline stage: index every source whose content changed since the last build."""
+    index = SearchIndex(index_path)
+    sources = [
+        ("cnct", artifact_hash(cnct_base), lambda: cnct_docs(cnct_base)),
+        ("fic", artifact_hash(fic_base), lambda: fic_docs(fic_base)),
+    ]
+    for path in sorted(glob.glob(os.path.join(transcript_cache, "*.jsonl"))):
+        video_id = os.path.basename(path).split(".")[0]
+        sources.append((f"transcricao:{video_id}", file_hash(path), lambda p=path: transcript_docs(p)))
+
+    for source, fingerprint, load in sources:
+        if fingerprint is None:
+            print(f"⚠️ {source}: no data found, skipped")
+        elif index.source_fingerprint(source) == fingerprint:
+            print(f"✅ {source}: up to date")
+        else:
+            index.replace_source(source, load(), fingerprint=fingerprint)
+            print(f"✅ {source}: indexed")
+    if len(index.segments) > 8:
+        index.compact()
+    print(f"✅ {index.n_docs} documents in {len(index.segments)} segment(s)")
+    return index
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["build"]:
+        build()
+    else:
+        k = int(args[args.index("--k") + 1]) if "--k" in args else 10
+        source = [args[args.index("--source") + 1]] if "--source" in args else None
+        query = " ".join(a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or not args[i - 1].startswith("--")))
+        for hit in SearchIndex(INDEX_PATH).search(query, k=k, sources=source):
+            print(f"{hit['score']:8.3f}  {hit['source']:<24} {hit['id']:<16} {hit['title']}")
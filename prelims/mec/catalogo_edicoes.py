@@ -0,0 +1,81 @@
+# catalogo_edicoes.py
+
+# Editions of the CNCT and PRONATEC FIC catalogs and what changed between them (techbrasil/edicoes.py)
+#   python prelims/mec/catalogo_edicoes.py add cnct 2025                   # current df_cnct2025a artifact
+#   python prelims/mec/catalogo_edicoes.py add cnct 2021 catalogo_cnct_2021.csv
+#   python prelims/mec/catalogo_edicoes.py add fic 2016 catalogo_cursos_pronatec_fic_2016.txt
+#   python prelims/mec/catalogo_edicoes.py diff cnct 2021 2025
+#   python prelims/mec/catalogo_edicoes.py history cnct                   # consecutive editions -> df_cnct_historico
+# cnct1a.py / pronatec_cursos1a.py keep writing only the latest edition; here each edition is kept as
+# fingerprints, so any two can be compared without re-parsing the raw files.
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import cnct1a
+import pronatec_cursos1a
+from techbrasil.artefatos import ensure_formats, read_artifact, write_artifact
+from techbrasil.edicoes import CNCT_SPEC, FIC_SPEC, EditionStore, summarize
+
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+EDICOES_DIR = LOCAL_ROOT + "/working/mec_outros/edicoes"
+HISTORY_BASES = {
+    "cnct": LOCAL_ROOT + "/working/mec_outros/df_cnct_historico",
+    "fic": LOCAL_ROOT + "/working/mec_outros/df_pronatec_historico",
+}
+SPECS = {"cnct": CNCT_SPEC, "fic": FIC_SPEC}
+
+
+def load_edition(catalog, raw_path=None):
+    """Parsed edition: the raw file through the catalog's own parser, or the current artifact."""
+    if catalog == "cnct":
+        if raw_path is None:
+            return read_artifact(cnct1a.OUTPUT_BASE, categoricals=False)
+        # Same course_id codes as the edition last written by cnct1a.py
+        previous = pd.read_csv(cnct1a.CODE_TABLE) if os.path.exists(cnct1a.CODE_TABLE) else None
+        return cnct1a.build_cnct(raw_path, previous=previous)[0]
+    if catalog == "fic":
+        if raw_path is None:
+            return read_artifact(pronatec_cursos1a.OUTPUT_BASE, categoricals=False)
+        return pronatec_cursos1a.build_pronatec(raw_path)
+    raise ValueError(f"Unknown catalog: {catalog} (expected one of {list(SPECS)})")
+
+
+def add(catalog, edicao, raw_path=None, root=EDICOES_DIR):
+    fp = EditionStore(root).add(catalog, edicao, load_edition(catalog, raw_path), SPECS[catalog])
+    print(f"✅ {catalog} {edicao}: {len(fp)} courses fingerprinted")
+
+
+def print_summary(label, diff):
+    s = summarize(diff)
+    changes = ", ".join(f"{k} {v}" for k, v in s["changes"].items())
+    fields = ", ".join(f"{k} {v}" for k, v in s["fields"].items())
+    print(f"{label}: {changes} (fields changed: {fields})")
+
+
+def history(catalog, root=EDICOES_DIR, output_base=None):
+    """Diffs of consecutive editions, saved as df_<catalog>_historico (.feather + .csv)."""
+    store = EditionStore(root)
+    hist = store.history(catalog)
+    for (a, b), df in hist.groupby(["edicao_a", "edicao_b"], sort=False):
+        print_summary(f"{catalog} {a} -> {b}", df)
+    output_base = output_base or HISTORY_BASES[catalog]
+    write_artifact(hist, output_base, categoricals=["edicao_a", "edicao_b", "change"])
+    ensure_formats(output_base, ["csv"])
+    print(f"✅ {len(hist)} changes saved ({store.stats['diffs_cached']} diffs cached, {store.stats['diffs_computed']} computed)")
+    return hist
+
+
+if __name__ == "__main__":
+    command, catalog = sys.argv[1], sys.argv[2]
+    if command == "add":
+        add(catalog, sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+    elif command == "diff":
+        print_summary(f"{catalog} {sys.argv[3]} -> {sys.argv[4]}", EditionStore(EDICOES_DIR).diff(catalog, sys.argv[3], sys.argv[4]))
+    elif command == "history":
+        history(catalog)
+    else:
+        raise SystemExit(f"Unknown command: {command} (add, diff or history)")
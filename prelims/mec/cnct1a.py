@@ -3,75 +3,32 @@
 # Creates dataframe and csv of CNCT technical courses catalogue
 
 import os
+import sys
 import pandas as pd
-import pyreadr
-import boto3
-from botocore.exceptions import NoCredentialsError, ClientError
-from dotenv import load_dotenv
-
-# --- Step 1: Load AWS credentials securely from .env ---
-load_dotenv()
-
-aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-aws_region = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-
-bucket_name = "techbrazildata"
-s3_key = "rawdata/mec_outros/catalogo_cnct.csv"
-local_path = "D:/Country/Brazil/TechBrazil/rawdata/mec_outros/catalogo_cnct.csv"
-
-# --- Step 2: Download from S3 if file not found locally ---
-if not os.path.exists(local_path):
-    print(f"⚠️ File not found locally: {local_path}\n→ Attempting download from S3...")
-
-    try:
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            region_name=aws_region,
-        )
-
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        s3.download_file(bucket_name, s3_key, local_path)
-        print(f"✅ Downloaded from S3 to: {local_path}")
-
-    except (NoCredentialsError, ClientError) as e:
-        print(f"❌ Failed to download from S3: {e}")
-        raise
-
-else:
-    print(f"✅ Using local file: {local_path}")
-
-# --- Step 3: Load CSV and inspect ---
-df_full = pd.read_csv(local_path, delimiter=";", encoding="ISO-8859-1")
-
-# --- Step 4: Create course_id using hierarchical codes ---
-df_full = df_full.copy()
-eixo_map = {eixo: f"{i+1:02d}" for i, eixo in enumerate(df_full['Eixo Tecnológico'].unique())}
-df_full['eixo_code'] = df_full['Eixo Tecnológico'].map(eixo_map)
-
-df_full['eixo_area_key'] = df_full['eixo_code'] + "||" + df_full['Área Tecnológica']
-area_codes = (
-    df_full[['eixo_area_key']]
-    .drop_duplicates()
-    .reset_index(drop=True)
-    .assign(area_index=lambda d: d.groupby('eixo_area_key').ngroup() + 1)
-)
-area_codes['area_code'] = area_codes['area_index'].apply(lambda x: f"{x:02d}")
-df_full = df_full.merge(area_codes[['eixo_area_key', 'area_code']], on='eixo_area_key', how='left')
-
-df_full['eixo_area_course_key'] = df_full['eixo_area_key'] + "||" + df_full['Denominação do Curso']
-curso_codes = (
-    df_full[['eixo_area_key', 'Denominação do Curso']]
-    .drop_duplicates()
-    .groupby('eixo_area_key')
-    .cumcount() + 1
-)
-df_full['curso_code'] = curso_codes.apply(lambda x: f"{x:02d}")
-df_full['course_id'] = df_full['eixo_code'] + df_full['area_code'] + df_full['curso_code']
-
-# --- Step 5: Reorder and finalize output ---
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from techbrasil.artefatos import ensure_formats, write_artifact
+from techbrasil.brnum import parse_hours
+from techbrasil.codigos import Level, hierarchical_codes
+from techbrasil.csv_grande import ENCODING, SEP
+from techbrasil.instrumentacao import file_bytes, stage
+from techbrasil.s3_dados import RawDataFetcher
+from techbrasil.validacao import in_range, not_null, unique
+
+BUCKET = "techbrazildata"
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+S3_KEY = "rawdata/mec_outros/catalogo_cnct.csv"
+RAW_PATH = LOCAL_ROOT + "/" + S3_KEY
+OUTPUT_BASE = LOCAL_ROOT + "/working/mec_outros/df_cnct2025a"
+# eixo/área/curso codes of the last edition processed, so course_id stays stable across editions
+CODE_TABLE = LOCAL_ROOT + "/working/mec_outros/cnct_codigos.csv"
+
+code_levels = [
+    Level('Eixo Tecnológico', 'eixo_code', scope="global"),
+    Level('Área Tecnológica', 'area_code', scope="global", order="sorted"),
+    Level('Denominação do Curso', 'curso_code'),
+]
+
 original_columns = [
     'Eixo Tecnológico', 'Área Tecnológica', 'Denominação do Curso',
     'Perfil Profissional de Conclusão', 'Carga Horária Mínima',
@@ -80,15 +37,81 @@ original_columns = [
     'Infraestrutura Mínima', 'Legislação Profissional'
 ]
 
-df_ordered = df_full[['course_id'] + original_columns]
-df_ordered['eixo_code'] = df_full['eixo_code']
-df_ordered['area_code'] = df_full['area_code']
-df_ordered['curso_code'] = df_full['curso_code']
+# Checked before the artifact is written (see techbrasil/validacao.py)
+# Rows repeated in the catalog share their curso_code (Step 4), hence course_id: reported, not fatal
+output_checks = [
+    unique('course_id', severity="warn"),
+    unique('Eixo Tecnológico', 'Área Tecnológica', 'Denominação do Curso', severity="warn"),
+    not_null('course_id', 'Eixo Tecnológico', 'Área Tecnológica', 'Denominação do Curso'),
+    not_null('Carga Horária Mínima', min_rate=0.95, severity="warn"),
+    in_range('Carga Horária Mínima', 1, 10_000),
+]
 
-# --- Step 6: Save outputs ---
-output_base = "D:/Country/Brazil/TechBrazil/working/mec_outros/df_cnct2025a"
-df_ordered.to_pickle(output_base + ".pkl")
-pyreadr.write_rds(output_base + ".rds", df_ordered)
-df_ordered.to_csv(output_base + ".csv", index=False)
 
-print("✅ Saved as .pkl, .rds, and .csv")
+# --- Step 1-2: Fetch raw file (manifest + conditional HEAD; downloads only if missing or stale) ---
+def fetch_raw(s3_key=S3_KEY):
+    with stage("cnct.fetch") as st:
+        fetcher = RawDataFetcher(bucket=BUCKET, local_root=LOCAL_ROOT)
+        local_path = fetcher.fetch(s3_key)
+        st.bytes_written = file_bytes(local_path)
+    return local_path
+
+
+def build_cnct(local_path, previous=None):
+    """Catalog CSV -> (df_ordered, code table); previous: code table of an earlier edition."""
+    # --- Step 3: Load CSV and inspect ---
+    with stage("cnct.read_csv", bytes_read=file_bytes(local_path)) as st:
+        # The catalog is small; SISTEC / RAIS files in the same format go through techbrasil.csv_grande
+        df_full = pd.read_csv(local_path, delimiter=SEP, encoding=ENCODING)
+        st.rows_out = len(df_full)
+
+    # Workload as hours (numeric); unparsed rows are reported, not dropped
+    with stage("cnct.parse_hours", rows_in=len(df_full)) as st:
+        carga = parse_hours(df_full['Carga Horária Mínima'])
+        df_full['Carga Horária Mínima'] = carga.values
+        st.rows_out = len(df_full) - len(carga.failed)
+    if len(carga.failed):
+        print(f"⚠️ Carga Horária Mínima not parsed in {len(carga.failed)} rows: {list(carga.failed[:10])}")
+
+    # --- Step 4: Create course_id using hierarchical codes ---
+    # eixo numbered by first appearance, área across all eixos sorted by (eixo, área),
+    # curso by first appearance within its área; codes in `previous` are kept as they were
+    with stage("cnct.codes", rows_in=len(df_full)) as st:
+        coded = hierarchical_codes(df_full, code_levels, previous=previous)
+        df_full = df_full.join(coded.labels)
+        df_full['course_id'] = coded.ids
+        st.rows_out = len(coded.table)
+
+    # --- Step 5: Reorder and finalize output ---
+    df_ordered = df_full[['course_id'] + original_columns]
+    df_ordered['eixo_code'] = df_full['eixo_code']
+    df_ordered['area_code'] = df_full['area_code']
+    df_ordered['curso_code'] = df_full['curso_code']
+    return df_ordered, coded.table
+
+
+def write_cnct(df_ordered, output_base=OUTPUT_BASE):
+    # --- Step 6: Save outputs ---
+    # Primary Feather copy (memory-mappable), then .pkl/.rds/.csv derived only if stale
+    with stage("cnct.write", rows_in=len(df_ordered)) as st:
+        write_artifact(df_ordered, output_base, categoricals=['Eixo Tecnológico', 'Área Tecnológica'],
+                       checks=output_checks)
+        ensure_formats(output_base, ["pkl", "rds", "csv"])
+        st.bytes_written = file_bytes(*(f"{output_base}.{ext}" for ext in ["feather", "pkl", "rds", "csv"]))
+    print("✅ Saved as .feather, .pkl, .rds, and .csv")
+
+
+def run(raw_path=RAW_PATH, output_base=OUTPUT_BASE, code_table=CODE_TABLE):
+    """Pipeline stage: raw catalog CSV -> df_cnct2025a artifacts."""
+    previous = pd.read_csv(code_table) if code_table and os.path.exists(code_table) else None
+    df_ordered, codes = build_cnct(raw_path, previous=previous)
+    write_cnct(df_ordered, output_base)
+    if code_table:
+        # Keep codes of courses dropped from this edition so they are never reused
+        if previous is not None:
+            codes = pd.concat([previous, codes]).drop_duplicates([lvl.column for lvl in code_levels], keep="last")
+        codes.to_csv(code_table, index=False)
+
+
+if __name__ == "__main__":
+    run(fetch_raw())
@@ -0,0 +1,62 @@
+# cursos_ocupacoes1a.py
+
+# Links CNCT technical courses and PRONATEC FIC courses to CBO occupations (and to each other)
+# Outputs:
+#   df_cursos_cbo: one row per (catalog, course_id, cbo), for joins with RAIS/CAGED occupation data
+#   df_cnct_fic_nomes: best fuzzy name match of each FIC course among CNCT courses
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import cnct1a
+import pronatec_cursos1a
+from techbrasil.artefatos import ensure_formats, read_artifact, write_artifact
+from techbrasil.ocupacoes import OccupationIndex, match_names
+from techbrasil.validacao import not_null, unique
+
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+PAIRS_BASE = LOCAL_ROOT + "/working/mec_outros/df_cursos_cbo"
+MATCHES_BASE = LOCAL_ROOT + "/working/mec_outros/df_cnct_fic_nomes"
+MATCH_THRESHOLD = 0.5
+
+
+def build_index(cnct, fic):
+    # --- Step 2: Inverted index course <-> CBO ---
+    index = OccupationIndex()
+    index.add_catalog("cnct", cnct["course_id"], cnct["Denominação do Curso"], cnct["Ocupações CBO Associadas"])
+    index.add_catalog("fic", fic["curso_id"], fic["curso_nome"], fic["ocupacoes_cbo"])
+    return index
+
+
+def run(cnct_base=cnct1a.OUTPUT_BASE, fic_base=pronatec_cursos1a.OUTPUT_BASE,
+        pairs_base=PAIRS_BASE, matches_base=MATCHES_BASE, threshold=MATCH_THRESHOLD):
+    """Pipeline stage: df_cnct2025a + df_detailed_pronatec2016 -> course/CBO pairs and name matches."""
+    # --- Step 1: Load catalogs (only the columns used) ---
+    cnct = read_artifact(cnct_base, columns=["course_id", "Denominação do Curso", "Ocupações CBO Associadas"])
+    fic = read_artifact(fic_base, columns=["curso_id", "curso_nome", "ocupacoes_cbo"])
+
+    index = build_index(cnct, fic)
+    pairs = index.pairs()
+    # CNCT ids are strings ("010203"), FIC ids integers: one string column for the artifact
+    pairs["course_id"] = pairs["course_id"].astype(str)
+    print(f"✅ {len(pairs)} course-CBO pairs, {len(index.by_cbo)} distinct CBO codes")
+
+    # --- Step 3: FIC -> CNCT name matching (trigram-blocked) ---
+    matches = match_names(fic["curso_nome"], cnct["Denominação do Curso"], threshold=threshold)
+    matches.insert(0, "curso_id", fic["curso_id"].to_numpy()[matches["left_idx"].to_numpy()])
+    matches.insert(1, "course_id", cnct["course_id"].to_numpy()[matches["right_idx"].to_numpy()])
+    matches = matches.drop(columns=["left_idx", "right_idx"])
+    print(f"✅ {len(matches)} of {len(fic)} FIC courses matched to a CNCT course name")
+
+    # --- Step 4: Save outputs ---
+    write_artifact(pairs, pairs_base, categoricals=["catalog"],
+                   checks=[unique("catalog", "course_id", "cbo"), not_null("catalog", "course_id", "cbo")])
+    ensure_formats(pairs_base, ["pkl", "rds", "csv"])
+    write_artifact(matches, matches_base, checks=[unique("curso_id"), not_null("curso_id", "course_id")])
+    ensure_formats(matches_base, ["pkl", "rds", "csv"])
+    print("✅ Saved as .feather, .pkl, .rds, and .csv")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+# lacunas_ept1a.py
+
+# EPT supply-demand gaps per course, eixo and UF
+# Course-CBO links (df_cursos_cbo, from cursos_ocupacoes1a.py) x CAGED hires by occupation and municipality
+#   python prelims/mec/lacunas_ept1a.py                               # CAGED extract in working/caged
+#   python prelims/mec/lacunas_ept1a.py --demanda caged_sintetico.parquet
+# Outputs:
+#   df_lacunas_curso_uf: demand, split demand, supply and supply/demand per (catalog, course_id, UF)
+#   df_lacunas_eixo_uf: the same per (eixo, UF), without double counting occupations shared by courses
+#   df_lacunas_curso_mun: per (catalog, course_id, municipality), Feather + Parquet only
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import cnct1a
+import cursos_ocupacoes1a
+import pronatec_cursos1a
+from techbrasil.artefatos import ensure_formats, read_artifact, write_artifact
+from techbrasil.instrumentacao import file_bytes, stage
+from techbrasil.lacunas import GapEngine, read_demand
+from techbrasil.validacao import in_range, ufs, unique
+
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+# basedosdados CAGED extract (cbo_2002, id_municipio, sigla_uf, saldo_movimentacao, n_movimentacoes)
+DEMANDA_PATH = LOCAL_ROOT + "/working/caged/caged_cbo_mun.parquet"
+# Optional supply per course and UF (catalog, course_id, UF, oferta), e.g. SISTEC enrollments
+OFERTA_PATH = LOCAL_ROOT + "/working/mec_outros/oferta_cursos_uf.parquet"
+CURSO_UF_BASE = LOCAL_ROOT + "/working/mec_outros/df_lacunas_curso_uf"
+EIXO_UF_BASE = LOCAL_ROOT + "/working/mec_outros/df_lacunas_eixo_uf"
+CURSO_MUN_BASE = LOCAL_ROOT + "/working/mec_outros/df_lacunas_curso_mun"
+
+# Checked before each artifact is written (see techbrasil/validacao.py); not every UF has demand
+_DEMAND_RANGES = [in_range("demanda_rateada", 0), in_range("oferta", 0)]
+CURSO_UF_CHECKS = [unique("catalog", "course_id", "UF"), ufs("UF", complete=False), in_range("demanda", 0)] + _DEMAND_RANGES
+EIXO_UF_CHECKS = [unique("eixo", "UF"), ufs("UF", complete=False)] + _DEMAND_RANGES
+CURSO_MUN_CHECKS = [unique("catalog", "course_id", "municipio"), in_range("demanda", 0), in_range("demanda_rateada", 0)]
+
+
+def load_courses(cnct_base=cnct1a.OUTPUT_BASE, fic_base=pronatec_cursos1a.OUTPUT_BASE):
+    # --- Step 1: eixo of every course of both catalogs ---
+    cnct = read_artifact(cnct_base, columns=["course_id", "Eixo Tecnológico"], categoricals=False)
+    fic = read_artifact(fic_base, columns=["curso_id", "eixo_tecnologico"], categoricals=False)
+    return pd.concat([
+        pd.DataFrame({"catalog": "cnct", "course_id": cnct["course_id"].astype(str), "eixo": cnct["Eixo Tecnológico"]}),
+        pd.DataFrame({"catalog": "fic", "course_id": fic["curso_id"].astype(str), "eixo": fic["eixo_tecnologico"]}),
+    ], ignore_index=True)
+
+
+def run(demanda_path=DEMANDA_PATH, oferta_path=OFERTA_PATH, pairs_base=cursos_ocupacoes1a.PAIRS_BASE,
+        cnct_base=cnct1a.OUTPUT_BASE, fic_base=pronatec_cursos1a.OUTPUT_BASE,
+        curso_uf_base=CURSO_UF_BASE, eixo_uf_base=EIXO_UF_BASE, curso_mun_base=CURSO_MUN_BASE):
+    """Pipeline stage: course-CBO pairs + CAGED hires -> gap tables."""
+    # --- Step 2: Course x CBO links ---
+    engine = GapEngine(read_artifact(pairs_base, categoricals=False), load_courses(cnct_base, fic_base))
+
+    # --- Step 3: Hires per (CBO, UF) and (CBO, municipality), aggregated by the Parquet reader ---
+    with stage("lacunas.read_demand", bytes_read=file_bytes(demanda_path)) as st:
+        demanda_uf = read_demand(demanda_path, geo="uf")
+        demanda_mun = read_demand(demanda_path, geo="municipio")
+        st.rows_out = len(demanda_mun)
+    oferta = pd.read_parquet(oferta_path) if oferta_path and os.path.exists(oferta_path) else None
+    if oferta is None:
+        print("⚠️ No supply file: oferta and razao are left empty")
+
+    # --- Step 4: Sparse products (course x CBO) @ (CBO x geography) ---
+    with stage("lacunas.gaps", rows_in=len(demanda_uf) + len(demanda_mun)) as st:
+        curso_uf = engine.gaps(demanda_uf, oferta, geo_col="UF")
+        eixo_uf = engine.gaps_by_eixo(geo_col="UF", by_course=curso_uf)
+        curso_mun = engine.gaps(demanda_mun, geo_col="municipio").drop(columns=["oferta", "razao"])
+        st.rows_out = len(curso_uf) + len(eixo_uf) + len(curso_mun)
+    print(f"✅ {len(curso_uf)} course-UF cells, {len(eixo_uf)} eixo-UF cells, {len(curso_mun)} course-municipality cells")
+
+    # --- Step 5: Save outputs ---
+    with stage("lacunas.write", rows_in=len(curso_uf) + len(eixo_uf) + len(curso_mun)):
+        write_artifact(curso_uf, curso_uf_base, categoricals=["catalog", "UF"], checks=CURSO_UF_CHECKS)
+        ensure_formats(curso_uf_base, ["rds", "csv"])
+        write_artifact(eixo_uf, eixo_uf_base, categoricals=["eixo", "UF"], checks=EIXO_UF_CHECKS)
+        ensure_formats(eixo_uf_base, ["rds", "csv"])
+        write_artifact(curso_mun, curso_mun_base, categoricals=["catalog"], checks=CURSO_MUN_CHECKS)
+        ensure_formats(curso_mun_base, ["parquet"])
+    print("✅ Saved as .feather, .rds and .csv (municipal table: .feather and .parquet)")
+    return curso_uf, eixo_uf
+
+
+if __name__ == "__main__":
+    run(sys.argv[sys.argv.index("--demanda") + 1] if "--demanda" in sys.argv else DEMANDA_PATH)
@@ -1,223 +1,297 @@
-# divida1b.py
-
-import pandas as pd
-import pyreadr
-
-# Recreate full version preserving the UF name from original df_mar25
-# Redefine both datasets again to preserve context
-
-# Rebuild March 2025 data
-# From the document "FAQ - Perguntas e Respostas - Programa de Pleno Pagamento de Dívidas dos Estados Anexo
-
-data_mar25 = [
-    ["SÃO PAULO", "291.684.192.718,19"], ["RIO DE JANEIRO", "178.485.878.129,97"],
-    ["MINAS GERAIS", "164.072.322.152,05"], ["RIO GRANDE DO SUL", "101.642.375.981,12"],
-    ["GOIÁS", "19.039.529.108,97"], ["PARANÁ", "12.512.559.235,68"],
-    ["SANTA CATARINA", "11.428.037.582,88"], ["ALAGOAS", "8.990.378.025,69"],
-    ["MATO GROSSO DO SUL", "7.355.125.617,76"], ["BAHIA", "5.808.094.633,51"],
-    ["PERNAMBUCO", "4.295.502.477,28"], ["RONDÔNIA", "2.867.331.838,13"],
-    ["MARANHÃO", "1.938.409.232,89"], ["ESPÍRITO SANTO", "1.691.077.107,86"],
-    ["CEARÁ", "1.236.595.874,28"], ["SERGIPE", "1.201.372.532,28"],
-    ["PARÁ", "1.198.518.957,35"], ["PARAÍBA", "963.096.161,66"],
-    ["DISTRITO FEDERAL", "852.998.835,17"], ["MATO GROSSO", "754.141.024,33"],
-    ["RIO GRANDE DO NORTE", "667.008.481,56"], ["AMAPÁ", "520.847.287,56"],
-    ["PIAUÍ", "500.796.641,13"], ["ACRE", "426.996.338,22"],
-    ["AMAZONAS", "272.634.327,20"], ["RORAIMA", "41.205.843,07"], ["TOCANTINS", "0,00"]
-]
-df_mar25 = pd.DataFrame(data_mar25, columns=["Estado", "Saldo_Devedor_BR"])
-df_mar25["Saldo_Devedor"] = df_mar25["Saldo_Devedor_BR"].str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-
-# Add UF codes
-uf_map = {
-    "ACRE": "AC", "ALAGOAS": "AL", "AMAPÁ": "AP", "AMAZONAS": "AM", "BAHIA": "BA",
-    "CEARÁ": "CE", "DISTRITO FEDERAL": "DF", "ESPÍRITO SANTO": "ES", "GOIÁS": "GO",
-    "MARANHÃO": "MA", "MATO GROSSO": "MT", "MATO GROSSO DO SUL": "MS", "MINAS GERAIS": "MG",
-    "PARÁ": "PA", "PARAÍBA": "PB", "PARANÁ": "PR", "PERNAMBUCO": "PE", "PIAUÍ": "PI",
-    "RIO DE JANEIRO": "RJ", "RIO GRANDE DO NORTE": "RN", "RIO GRANDE DO SUL": "RS",
-    "RONDÔNIA": "RO", "RORAIMA": "RR", "SANTA CATARINA": "SC", "SÃO PAULO": "SP",
-    "SERGIPE": "SE", "TOCANTINS": "TO"
-}
-df_mar25["UF"] = df_mar25["Estado"].map(uf_map)
-df_mar25["saldo_mar25"] = df_mar25["Saldo_Devedor"]
-
-# Rebuild July 2024 data
-
-# From the  webpage of FGV-IBRE 
-# https://observatorio-politica-fiscal.ibre.fgv.br/federalismo-fiscal/historico-de-renegociacao-de-divida/renegociacao-das-dividas-estaduais
-
-data_july24 = [
-    ["AC", "412.817.174"], ["AL", "8.396.922.777"], ["AM", "342.093.742"],
-    ["AP", "504.209.054"], ["BA", "5.530.980.342"], ["CE", "1.177.807.221"],
-    ["DF", "988.954.368"], ["ES", "1.603.832.362"], ["GO", "16.887.724.651"],
-    ["MA", "1.118.700.859"], ["MG", "142.615.023.561"], ["MS", "6.996.204.395"],
-    ["MT", "1.041.778.159"], ["PA", "1.140.531.490"], ["PB", "916.499.062"],
-    ["PE", "3.821.467.155"], ["PI", "0"], ["PR", "11.907.169.047"],
-    ["RJ", "156.796.832.309"], ["RN", "660.219.339"], ["RO", "2.738.548.896"],
-    ["RR", "51.451.426"], ["RS", "92.871.280.232"], ["SC", "10.875.119.375"],
-    ["SE", "1.144.052.960"], ["SP", "277.625.902.004"], ["TO", "0"]
-]
-df_july24 = pd.DataFrame(data_july24, columns=["UF", "Saldo_julho24_BR"])
-df_july24["Saldo_julho24"] = df_july24["Saldo_julho24_BR"].str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-
-# Merge with original df_mar25 to retain Estado
-merged_df = pd.merge(df_mar25[["UF", "Estado", "saldo_mar25"]], df_july24[["UF", "Saldo_julho24"]], on="UF", how="outer")
-
-
-# Format
-merged_df["saldo_mar25"] = merged_df["saldo_mar25"].map("{:,.2f}".format)
-merged_df["Saldo_julho24"] = merged_df["Saldo_julho24"].map("{:,.2f}".format)
-
-# Remove the Saldo_julho24 column from merged_df
-merged_df = merged_df.drop(columns=["Saldo_julho24"])
-
-# Manually input amortization values in millions R$ (from the table)
-
-# From the document Quadro 2- Estimativa de Impacto da Lei Complementar nº 212/2025 Nota Técnica Tesouro Nacional, January 2025
-amort_dict = {
-    "AC": 85.79, "AL": 1745.81, "AM": 52.29, "AP": 104.38, "BA": 1166.72,
-    "CE": 248.40, "DF": 166.05, "ES": 334.18, "GO": 3831.94, "MA": 174.82,
-    "MT": 141.78, "MS": 1477.64, "MG": 33112.50, "PA": 240.78, "PB": 193.49,
-    "PR": 2513.76, "PE": 797.46, "RJ": 34972.01, "RN": 132.58, "RS": 20438.23,
-    "RO": 576.03, "RR": 7.88, "SC": 2295.88, "SP": 57049.58, "SE": 241.33, "TO": 0.00, "PI": 0.00
-}
-
-# Convert to DataFrame
-df_amort = pd.DataFrame(list(amort_dict.items()), columns=["UF", "amort_extr_mil"])
-
-# Merge with your merged_df (convert to R$ full)
-df_amort["amort_extr"] = df_amort["amort_extr_mil"] * 1_000_000
-merged_df = pd.merge(merged_df, df_amort[["UF", "amort_extr"]], on="UF", how="left")
-
-# Format amort_extr without scientific notation
-merged_df["amort_extr"] = merged_df["amort_extr"].map("{:,.2f}".format)
-
-
-#  FEF and investment contributions:
-    # First convert formatted columns back to float
-merged_df["saldo_mar25_float"] = merged_df["saldo_mar25"].str.replace(",", "", regex=False).astype(float)
-merged_df["amort_extr_float"] = merged_df["amort_extr"].str.replace(",", "", regex=False).astype(float)
-
-# Calculate refinanced base
-merged_df["refinanced_base"] = merged_df["saldo_mar25_float"] - merged_df["amort_extr_float"]
-
-
-# Compute FEF_1ano (1%) and EPT_1ano (0.6%) of the refinanced base
-merged_df["FEF_1ano_cen01"] = merged_df["refinanced_base"] * 0.01
-merged_df["EPT_1ano_cen01"] = merged_df["refinanced_base"] * 0.006
-
-
-# Format new columns for display
-merged_df["FEF_1ano_cen01"] = merged_df["FEF_1ano_cen01"].map("{:,.2f}".format)
-merged_df["EPT_1ano_cen01"] = merged_df["EPT_1ano_cen01"].map("{:,.2f}".format)
-
-##
-
-# From STN presentation on Propag, April 2025 with decree promulgation
-# Tesoro Nacional apresentacao-da-regulamentacao-propag abril 2025.pdf
-
-
-fef_shares = {
-    "AC": 4.3, "AL": 4.0, "AP": 2.9, "AM": 4.5, "BA": 7.5,
-    "CE": 5.9, "DF": 1.2, "ES": 2.5, "GO": 2.3, "MA": 6.7,
-    "MT": 4.4, "MS": 1.8, "MG": 3.7, "PA": 6.3, "PB": 4.3,
-    "PR": 2.9, "PE": 6.2, "PI": 3.6, "RJ": 1.6, "RN": 4.1,
-    "RS": 1.6, "RO": 3.1, "RR": 4.2, "SC": 1.8, "SP": 1.1,
-    "SE": 4.0, "TO": 3.3
-}
-
-# Total FEF (previously calculated from sum of FEF_1ano_float)
-total_fef_cen01 = 6583457161.46
-
-# Convert FEF shares to DataFrame
-df_fef_shares = pd.DataFrame(list(fef_shares.items()), columns=["UF", "fef_share_pct"])
-df_fef_shares["fef_received"] = df_fef_shares["fef_share_pct"] / 100 * total_fef_cen01
-
-
-# Merge with merged_df to bring fef_share_pct
-merged_df = pd.merge(merged_df, df_fef_shares[["UF", "fef_share_pct"]], on="UF", how="left")
-
-# Merge with merged_df to bring in received values
-merged_df = pd.merge(merged_df, df_fef_shares[["UF", "fef_received"]], on="UF", how="left")
-
-# Reconvert FEF_1ano_cen01 to float for subtraction
-merged_df["FEF_1ano_float"] = merged_df["FEF_1ano_cen01"].str.replace(",", "", regex=False).astype(float)
-
-
-# Compute FEF net benefit = received - contributed
-merged_df["FEF_1ano_liq_cen01"] = merged_df["fef_received"] - merged_df["FEF_1ano_float"]
-merged_df["FEF_1ano_liq_cen01"] = merged_df["FEF_1ano_liq_cen01"].map("{:,.2f}".format)
-
-
-# Cenario II
-
-# Compute FEF_1ano_cen02 and EPT_1ano_cen02 based on refinanced base
-merged_df["FEF_1ano_cen02"] = merged_df["refinanced_base"] * 0.02
-merged_df["EPT_1ano_cen02"] = merged_df["refinanced_base"] * 0.012
-
-# Format for display
-merged_df["FEF_1ano_cen02"] = merged_df["FEF_1ano_cen02"].map("{:,.2f}".format)
-merged_df["EPT_1ano_cen02"] = merged_df["EPT_1ano_cen02"].map("{:,.2f}".format)
-
-# Reconvert formatted FEF_1ano_cen02 for arithmetic
-merged_df["FEF_1ano_cen02_float"] = merged_df["FEF_1ano_cen02"].str.replace(",", "", regex=False).astype(float)
-
-# Total FEF for Cenário II
-total_fef_cen02 = merged_df["FEF_1ano_cen02_float"].sum()
-
-# Build share allocation table
-df_fef_shares_cen02 = pd.DataFrame(list(fef_shares.items()), columns=["UF", "fef_share_pct"])
-df_fef_shares_cen02["fef_received_cen02"] = df_fef_shares_cen02["fef_share_pct"] / 100 * total_fef_cen02
-
-# Merge received amounts into main dataframe
-merged_df = pd.merge(merged_df, df_fef_shares_cen02[["UF", "fef_received_cen02"]], on="UF", how="left")
-
-# Compute net benefit
-merged_df["FEF_1ano_liq_cen02"] = merged_df["fef_received_cen02"] - merged_df["FEF_1ano_cen02_float"]
-merged_df["FEF_1ano_liq_cen02"] = merged_df["FEF_1ano_liq_cen02"].map("{:,.2f}".format)
-
-
-# Convert formatted FEF and EPT 1-year columns back to float
-merged_df["FEF_1ano_cen01_float"] = merged_df["FEF_1ano_cen01"].str.replace(",", "", regex=False).astype(float)
-merged_df["EPT_1ano_cen01_float"] = merged_df["EPT_1ano_cen01"].str.replace(",", "", regex=False).astype(float)
-merged_df["FEF_1ano_cen02_float"] = merged_df["FEF_1ano_cen02"].str.replace(",", "", regex=False).astype(float)
-merged_df["EPT_1ano_cen02_float"] = merged_df["EPT_1ano_cen02"].str.replace(",", "", regex=False).astype(float)
-
-# Multiply by 5 to get 5-year totals
-merged_df["EPT_5ano_cen01"] = (merged_df["EPT_1ano_cen01_float"] * 5).map("{:,.2f}".format)
-merged_df["EPT_5ano_cen02"] = (merged_df["EPT_1ano_cen02_float"] * 5).map("{:,.2f}".format)
-# Now compute 5-year totals for the net values
-# Convert 1-year net FEF values from string to float
-merged_df["FEF_1ano_liq_cen01"] = merged_df["FEF_1ano_liq_cen01"].str.replace(",", "", regex=False).astype(float)
-merged_df["FEF_1ano_liq_cen02"] = merged_df["FEF_1ano_liq_cen02"].str.replace(",", "", regex=False).astype(float)
-
-# Now compute 5-year totals for the net values and format
-merged_df["FEF_5ano_liq_cen01"] = (merged_df["FEF_1ano_liq_cen01"] * 5).map("{:,.2f}".format)
-merged_df["FEF_5ano_liq_cen02"] = (merged_df["FEF_1ano_liq_cen02"] * 5).map("{:,.2f}".format)
-
-
-# Drop intermediate float columns to clean up the DataFrame
-cols_to_drop = [
-    "refinanced_base",
-    "saldo_mar25_float", "amort_extr_float", "FEF_1ano_float",
-    "FEF_1ano_cen01_float", "FEF_1ano_cen02_float",
-    "EPT_1ano_cen01_float", "EPT_1ano_cen02_float",
-    "fef_received", "fef_received_cen02"
-]
-merged_df = merged_df.drop(columns=cols_to_drop)
-
-
-
-# Save the DataFrame as a pickle file for efficient Python use
-pickle_path = "D:/Country/Brazil/TechBrazil/working/mec/propag_ept_financeiro.pkl"
-merged_df.to_pickle(pickle_path)
-
-# Load the DataFrame back from the pickle file
-propag_ept_financeiro = pd.read_pickle("D:/Country/Brazil/TechBrazil/working/mec/propag_ept_financeiro.pkl")
-
-# Save the merged_df as .rds (correct way)
-pyreadr.write_rds("D:/Country/Brazil/TechBrazil/working/mec/propag_ept_financeiro.rds", merged_df)
-# Save as CSV (no index column)
-propag_ept_financeiro.to_csv("D:/Country/Brazil/TechBrazil/working/mec/propag_ept_financeiro.csv", index=False)
-
-
-
+# divida1b.py
+
+# Propag / EPT financing outputs from a parameter file (propag_parametros.toml by default)
+#   python prelims/municipios/divida1b.py                        # default parameters
+#   python prelims/municipios/divida1b.py --params cenario.toml  # TOML or YAML; only the sections that change
+#   python prelims/municipios/divida1b.py --serve                # one parameter file path (or JSON object) per
+#                                                                # stdin line, one JSON result per stdout line
+# Intermediate results (balances, refinanced base, FEF/EPT flows, trajectories) are memoized by a hash of
+# what each depends on, so in a long-lived --serve process a change to fef_shares only recomputes the flows.
+
+import json
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from techbrasil.artefatos import ensure_formats, write_artifact
+from techbrasil.cubos import propag_cube, write_cube
+from techbrasil.instrumentacao import file_bytes, stage
+from techbrasil.memo import Memo, file_hash
+from techbrasil.propag import PropagTable, refinanced_base, scenario_flows, scenario_grid
+from techbrasil.saldos import DebtStore
+from techbrasil.territorio import UF
+from techbrasil.trajetoria import simulate
+from techbrasil.validacao import in_range, not_null, sums_to, ufs, unique
+
+# Debt balances are read from the append-only snapshot store (uf, ref_date, source, saldo):
+# - March 2025, STN: document "FAQ - Perguntas e Respostas - Programa de Pleno Pagamento de Dívidas dos Estados Anexo"
+# - July 2024, FGV-IBRE: https://observatorio-politica-fiscal.ibre.fgv.br/federalismo-fiscal/historico-de-renegociacao-de-divida/renegociacao-das-dividas-estaduais
+# New snapshots are appended to saldos_divida.csv (DebtStore.append), not added here.
+SALDOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saldos_divida.csv")
+REF_MAR25 = ("2025-03-31", "STN")
+REF_JULY24 = ("2024-07-31", "FGV-IBRE")
+
+# Amortizations, FEF shares, scenarios, trajectory rates and output paths (sources noted in the file)
+PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "propag_parametros.toml")
+
+# Sections merged key by key over the defaults; any other section (cenarios) replaces the default
+_MERGED_SECTIONS = ["saldos", "amort_extr", "fef_shares", "trajetoria", "saida"]
+
+
+def _read_params_file(path):
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("YAML parameter files need PyYAML (pip install pyyaml); TOML works without it") from None
+        with open(path, "r", encoding="utf-8") as f:
+            params = yaml.safe_load(f) or {}
+    else:
+        import tomllib
+        with open(path, "rb") as f:
+            params = tomllib.load(f)
+    saldos = params.get("saldos", {})
+    if "path" in saldos and not os.path.isabs(saldos["path"]):
+        saldos["path"] = os.path.join(os.path.dirname(os.path.abspath(path)), saldos["path"])
+    return params
+
+
+def merge_params(base, overrides):
+    """overrides (partial parameter dict) over base; a "grade" table replaces the scenario list."""
+    params = {k: (dict(v) if isinstance(v, dict) else v) for k, v in base.items()}
+    for section, value in overrides.items():
+        if section in _MERGED_SECTIONS:
+            params[section] = {**params.get(section, {}), **value}
+        else:
+            params[section] = value
+    if "grade" in overrides:
+        params["cenarios"] = scenario_grid(**overrides["grade"]).to_dict("records")
+    params.pop("grade", None)
+    return params
+
+
+def load_params(path=PARAMS_PATH):
+    """Parameters of a TOML/YAML file, completed with the default file for the sections it leaves out."""
+    params = _read_params_file(PARAMS_PATH)
+    if os.path.abspath(path) != os.path.abspath(PARAMS_PATH):
+        params = merge_params(params, _read_params_file(path))
+    return params
+
+
+DEFAULT_PARAMS = load_params()
+
+# Module-level views of the default parameters (amortizations in millions R$, FEF shares in %)
+amort_dict = DEFAULT_PARAMS["amort_extr"]
+fef_shares = DEFAULT_PARAMS["fef_shares"]
+cenarios = DEFAULT_PARAMS["cenarios"]
+trajetoria_params = DEFAULT_PARAMS["trajetoria"]
+
+OUTPUT_BASE = DEFAULT_PARAMS["saida"]["output_base"]
+TRAJECTORY_BASE = DEFAULT_PARAMS["saida"]["trajetoria_base"]
+# Totals and shares per UF, region and scenario for the dashboards (see techbrasil/cubos.py)
+CUBE_BASE = DEFAULT_PARAMS["saida"]["cubo_base"]
+
+# Checked before each artifact is written (see techbrasil/validacao.py)
+# FEF shares are published rounded to 0.1 pp, so their total is 100% only within 0.05 x 27 UFs
+PROPAG_CHECKS = [
+    unique("UF"), ufs("UF"), not_null("UF", "Estado", "saldo_mar25", "amort_extr", "fef_share_pct"),
+    in_range("saldo_mar25", 0, thousands=","), in_range("amort_extr", 0, thousands=","),
+    in_range("fef_share_pct", 0, 100), sums_to("fef_share_pct", 100, tol=1.35),
+]
+TRAJECTORY_CHECKS = [
+    unique("scenario", "UF", "ano"), ufs("UF"), not_null("scenario", "UF", "ano", "balance", "ept"),
+    in_range("ept", 0),
+]
+
+# Intermediate results of this process (shared by every run in --serve mode)
+MEMO = Memo()
+
+
+def load_balances(saldos_path=SALDOS_PATH, ref=REF_MAR25):
+    """Debt balances per UF: the ref snapshot (with Estado) alongside July 2024, sorted by UF."""
+    with stage("propag.load_balances", bytes_read=file_bytes(saldos_path)) as st:
+        store = DebtStore(saldos_path)
+        saldo_mar25 = store.snapshot(*ref)
+        saldo_july24 = store.snapshot(*REF_JULY24)
+        st.rows_out = len(saldo_mar25)
+
+    # July 2024 is kept for reference only
+    ufs = saldo_mar25.index.union(saldo_july24.index).sort_values()
+    return pd.DataFrame({
+        "UF": ufs,
+        "Estado": pd.Series(UF.names[UF.position(ufs)]).str.upper().to_numpy(),
+        "saldo_mar25": saldo_mar25.reindex(ufs).to_numpy(),
+        "Saldo_julho24": saldo_july24.reindex(ufs).to_numpy(),
+    })
+
+
+def compute_propag(params=DEFAULT_PARAMS, memo=MEMO):
+    """PropagTable of a parameter set; each step is memoized on the inputs it depends on."""
+    saldos = {"path": SALDOS_PATH, "ref_date": REF_MAR25[0], "source": REF_MAR25[1], **params.get("saldos", {})}
+    ref = (saldos["ref_date"], saldos["source"])
+    balances = memo(
+        "balances", [file_hash(saldos["path"]), list(ref)],
+        lambda: load_balances(saldos["path"], ref),
+    )
+    grid = pd.DataFrame(params["cenarios"])
+
+    # UF-keyed parameters as arrays in IBGE order, attached to the balances by position
+    # Convert to R$ full (numbers stay float64 until export)
+    pos = UF.position(balances["UF"])
+    amort_extr = UF.align(params["amort_extr"])[pos] * 1_000_000
+    fef_share_pct = UF.align(params["fef_shares"])[pos]
+
+    # All UFs x scenarios in a single broadcast (FEF totals are summed per scenario)
+    with stage("propag.scenarios", rows_in=len(balances), scenarios=len(grid)):
+        base = memo(
+            "refinanced_base", [balances, params["amort_extr"], grid["amort_share"].tolist()],
+            lambda: refinanced_base(balances["saldo_mar25"], amort_extr, grid),
+        )
+        flows = memo(
+            "fef_ept_flows", [base, params["fef_shares"], grid[["fef_rate", "ept_rate", "horizon"]].to_dict("list")],
+            lambda: scenario_flows(base, fef_share_pct, grid),
+        )
+        return PropagTable.build(
+            balances["UF"], balances["Estado"], balances["saldo_mar25"], amort_extr, fef_share_pct, grid, flows=flows
+        )
+
+
+def build_propag(amort_dict=amort_dict, fef_shares=fef_shares, cenarios=cenarios):
+    return compute_propag(merge_params(DEFAULT_PARAMS, {
+        "amort_extr": amort_dict, "fef_shares": fef_shares, "cenarios": cenarios,
+    }))
+
+
+def write_propag(propag, output_base=OUTPUT_BASE):
+    # Numbers are formatted only here, in the published layout
+    merged_df = propag.to_legacy_frame(style="us")
+
+    # Primary Feather copy (memory-mappable); .pkl/.rds/.csv are derived from it only if stale
+    with stage("propag.write", rows_in=len(merged_df)) as st:
+        write_artifact(merged_df, output_base, categoricals=["UF", "Estado"], checks=PROPAG_CHECKS)
+        ensure_formats(output_base, ["pkl", "rds", "csv"])
+        st.bytes_written = file_bytes(*(f"{output_base}.{ext}" for ext in ["feather", "pkl", "rds", "csv"]))
+
+
+def run(output_base=OUTPUT_BASE, amort_dict=amort_dict, fef_shares=fef_shares, cenarios=cenarios):
+    """Pipeline stage: Propag parameters -> propag_ept_financeiro artifacts."""
+    propag = build_propag(amort_dict, fef_shares, cenarios)
+    write_propag(propag, output_base)
+    return propag
+
+
+def build_trajetorias(propag, params=trajetoria_params):
+    """Tidy (scenario x UF x year) table of balances, FEF and EPT flows, nominal and in base-year R$."""
+    frames = []
+    with stage("propag_trajetoria.simulate", scenarios=len(propag.scenarios), years=params["anos"]) as st:
+        for cen in propag.scenarios.itertuples():
+            traj = simulate(
+                propag.saldo, propag.amort_extr, propag.fef_share_pct,
+                ipca=params["ipca"], real_rate=params["juros_reais"], fef_rate=cen.fef_rate, ept_rate=cen.ept_rate,
+                years=params["anos"], amortization=params["amortizacao"], amort_share=cen.amort_share, uf=propag.uf,
+            )
+            df = traj.long()
+            for name in ["balance", "fef_net", "ept"]:
+                df[name + "_real"] = traj.long(real=True)[name]
+            df.insert(0, "scenario", cen.scenario)
+            frames.append(df)
+        out = pd.concat(frames, ignore_index=True)
+        st.rows_out = len(out)
+    return out
+
+
+def write_trajetorias(trajetorias, output_base=TRAJECTORY_BASE):
+    with stage("propag_trajetoria.write", rows_in=len(trajetorias)) as st:
+        write_artifact(trajetorias, output_base, categoricals=["scenario", "UF"], checks=TRAJECTORY_CHECKS)
+        ensure_formats(output_base, ["rds", "csv"])
+        st.bytes_written = file_bytes(*(f"{output_base}.{ext}" for ext in ["feather", "rds", "csv"]))
+
+
+def run_trajetoria(output_base=TRAJECTORY_BASE, amort_dict=amort_dict, fef_shares=fef_shares, cenarios=cenarios,
+                   params=trajetoria_params):
+    """Pipeline stage: Propag parameters -> propag_trajetoria artifacts."""
+    trajetorias = build_trajetorias(build_propag(amort_dict, fef_shares, cenarios), params)
+    write_trajetorias(trajetorias, output_base)
+    return trajetorias
+
+
+def build_cubo(propag):
+    with stage("propag_cubo.rollup", rows_in=len(propag.uf) * len(propag.scenarios)) as st:
+        cube = propag_cube(propag)
+        st.rows_out = len(cube)
+    return cube
+
+
+def write_cubo(cube, output_base=CUBE_BASE):
+    with stage("propag_cubo.write", rows_in=len(cube)) as st:
+        write_cube(cube, output_base)
+        st.bytes_written = file_bytes(*(f"{output_base}.{ext}" for ext in ["feather", "parquet", "rds"]))
+
+
+def run_cubo(output_base=CUBE_BASE, amort_dict=amort_dict, fef_shares=fef_shares, cenarios=cenarios):
+    """Pipeline stage: Propag parameters -> propag_cubo artifacts (.feather, .parquet, .rds)."""
+    cube = build_cubo(build_propag(amort_dict, fef_shares, cenarios))
+    write_cubo(cube, output_base)
+    return cube
+
+
+# --- Parameter-file runs ---
+
+def run_params(params=DEFAULT_PARAMS, memo=MEMO):
+    """All outputs of one parameter set (paths from its [saida] table); returns a JSON-able summary."""
+    start = time.perf_counter()
+    propag = compute_propag(params, memo)
+    saida = params["saida"]
+    write_propag(propag, saida["output_base"])
+
+    # Trajectories depend on everything the flows do, plus the trajectory rates
+    trajetorias = memo(
+        "trajetorias",
+        [file_hash(params.get("saldos", {}).get("path", SALDOS_PATH)), params.get("saldos", {}), params["amort_extr"],
+         params["fef_shares"], params["cenarios"], params["trajetoria"]],
+        lambda: build_trajetorias(propag, params["trajetoria"]),
+    )
+    write_trajetorias(trajetorias, saida["trajetoria_base"])
+    write_cubo(build_cubo(propag), saida["cubo_base"])
+    return {
+        "status": "ok",
+        "outputs": [saida["output_base"], saida["trajetoria_base"], saida["cubo_base"]],
+        "scenarios": len(propag.scenarios),
+        "seconds": round(time.perf_counter() - start, 3),
+        "memo": dict(memo.stats),
+    }
+
+
+def serve(lines=sys.stdin, out=sys.stdout, memo=MEMO):
+    """Run one parameter set per input line (file path or JSON object merged over the defaults)."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if line.startswith("{"):
+                params = merge_params(DEFAULT_PARAMS, json.loads(line))
+            else:
+                params = load_params(line)
+            result = run_params(params, memo)
+        except Exception as exc:
+            result = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+        result["request"] = line[:200]
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def main(argv):
+    if "--serve" in argv:
+        serve()
+        return 0
+    params = load_params(argv[argv.index("--params") + 1]) if "--params" in argv else DEFAULT_PARAMS
+    result = run_params(params)
+    print(f"✅ Propag outputs written in {result['seconds']:.2f} s: {', '.join(result['outputs'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
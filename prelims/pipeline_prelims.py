@@ -0,0 +1,117 @@
+# pipeline_prelims.py
+
+# Incremental refresh of the prelims/ Python outputs
+# Only stages whose code, parameters or input files changed are re-run; CNCT and PRONATEC run in parallel.
+#   python prelims/pipeline_prelims.py            # refresh everything that is stale
+#   python prelims/pipeline_prelims.py propag     # only the Propag stage (and what it needs)
+#   python prelims/pipeline_prelims.py --force
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+for sub in ("", "mec", "municipios"):
+    sys.path.insert(0, os.path.join(here, sub))
+
+import busca_textos
+import cnct1a
+import cursos_ocupacoes1a
+import divida1b
+import lacunas_ept1a
+import pronatec_cursos1a
+import publicar_painel
+from techbrasil.pipeline import Pipeline, Stage
+
+STATE_PATH = "D:/Country/Brazil/TechBrazil/working/.pipeline_state.json"
+
+
+def fetch_cnct():
+    cnct1a.fetch_raw()
+
+
+def fetch_pronatec():
+    pronatec_cursos1a.fetch_raw()
+
+
+def build_stages():
+    return [
+        # Conditional HEAD every run; downstream stages only re-run if the file content changed
+        Stage("fetch_cnct", fetch_cnct, outputs=[cnct1a.RAW_PATH], always_run=True),
+        Stage("fetch_pronatec", fetch_pronatec, outputs=[pronatec_cursos1a.RAW_PATH], always_run=True),
+        Stage(
+            "cnct", cnct1a.run,
+            kwargs={"raw_path": cnct1a.RAW_PATH, "output_base": cnct1a.OUTPUT_BASE},
+            inputs=[cnct1a.RAW_PATH],
+            outputs=[cnct1a.OUTPUT_BASE + ".feather"],
+        ),
+        Stage(
+            "pronatec", pronatec_cursos1a.run,
+            kwargs={"raw_path": pronatec_cursos1a.RAW_PATH, "output_base": pronatec_cursos1a.OUTPUT_BASE},
+            inputs=[pronatec_cursos1a.RAW_PATH],
+            outputs=[pronatec_cursos1a.OUTPUT_BASE + ".feather"],
+        ),
+        Stage(
+            "ocupacoes", cursos_ocupacoes1a.run,
+            inputs=[cnct1a.OUTPUT_BASE + ".feather", pronatec_cursos1a.OUTPUT_BASE + ".feather"],
+            outputs=[cursos_ocupacoes1a.PAIRS_BASE + ".feather", cursos_ocupacoes1a.MATCHES_BASE + ".feather"],
+        ),
+        Stage(
+            "lacunas", lacunas_ept1a.run,
+            inputs=[
+                cursos_ocupacoes1a.PAIRS_BASE + ".feather", cnct1a.OUTPUT_BASE + ".feather",
+                pronatec_cursos1a.OUTPUT_BASE + ".feather", lacunas_ept1a.DEMANDA_PATH, lacunas_ept1a.OFERTA_PATH,
+            ],
+            outputs=[lacunas_ept1a.CURSO_UF_BASE + ".feather", lacunas_ept1a.EIXO_UF_BASE + ".feather"],
+        ),
+        # Cheap when nothing changed: every source is skipped by its content fingerprint
+        Stage(
+            "busca", busca_textos.build,
+            inputs=[cnct1a.OUTPUT_BASE + ".feather", pronatec_cursos1a.OUTPUT_BASE + ".feather"],
+            always_run=True,
+        ),
+        Stage(
+            "propag", divida1b.run,
+            kwargs={
+                "output_base": divida1b.OUTPUT_BASE,
+                "amort_dict": divida1b.amort_dict,
+                "fef_shares": divida1b.fef_shares,
+                "cenarios": divida1b.cenarios,
+            },
+            inputs=[divida1b.SALDOS_PATH, divida1b.PARAMS_PATH],
+            outputs=[divida1b.OUTPUT_BASE + ".feather"],
+        ),
+        Stage(
+            "propag_trajetoria", divida1b.run_trajetoria,
+            kwargs={
+                "output_base": divida1b.TRAJECTORY_BASE,
+                "amort_dict": divida1b.amort_dict,
+                "fef_shares": divida1b.fef_shares,
+                "cenarios": divida1b.cenarios,
+                "params": divida1b.trajetoria_params,
+            },
+            inputs=[divida1b.SALDOS_PATH, divida1b.PARAMS_PATH],
+            outputs=[divida1b.TRAJECTORY_BASE + ".feather"],
+        ),
+        Stage(
+            "propag_cubo", divida1b.run_cubo,
+            kwargs={
+                "output_base": divida1b.CUBE_BASE,
+                "amort_dict": divida1b.amort_dict,
+                "fef_shares": divida1b.fef_shares,
+                "cenarios": divida1b.cenarios,
+            },
+            inputs=[divida1b.SALDOS_PATH, divida1b.PARAMS_PATH],
+            outputs=[divida1b.CUBE_BASE + ".feather"],
+        ),
+        Stage(
+            "painel", publicar_painel.run,
+            inputs=[divida1b.SALDOS_PATH, divida1b.PARAMS_PATH, cnct1a.OUTPUT_BASE + ".feather"],
+            outputs=[os.path.join(publicar_painel.PAINEL_DIR, "manifest.json")],
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    pipeline = Pipeline(build_stages(), state_path=STATE_PATH)
+    pipeline.run(targets=args or None, force="--force" in sys.argv)
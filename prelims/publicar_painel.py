@@ -0,0 +1,170 @@
+# publicar_painel.py
+
+# Dashboard bundle for produtos/BM_FGV_Propag1b.R
+# The app used to readRDS propag_ept_financeiro, parse its formatted numbers and build totals, groups and
+# labels on every start. Here those tables are built once, already sorted, labelled and rounded as the
+# app shows them, and written as memory-mappable Feather files plus manifest.json (techbrasil/painel.py);
+# the app opens them through produtos/painel_bundle.R and reads only the slice on screen.
+#   python prelims/publicar_painel.py                          # default Propag parameters
+#   python prelims/publicar_painel.py --params cenario.toml
+#   python prelims/publicar_painel.py --startup                # time an app-like load of the bundle (pyarrow)
+#   cd produtos; Rscript painel_startup.R                       # the same load in R, as the app does it
+# Tables:
+#   propag_fin: (variable x UF) values with their bar labels, one slice per variable of the menu
+#   propag_fin_tabela: Tabela 1, one row per UF plus the "Todos" total row
+#   propag_variaveis: menu order, labels and value ranges per group of UFs
+#   propag_trajetoria: (scenario x UF x year) flows, one slice per scenario
+#   propag_cubo: UF / region / Brazil totals and shares, one slice per level
+#   ufs: IBGE codes, names and regions (the app no longer loads df_codes_ibge.rda for them)
+#   cnct_cursos: CNCT catalog summary, one slice per eixo (when df_cnct2025a exists)
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+here = os.path.dirname(os.path.abspath(__file__))
+for sub in ("", "mec", "municipios"):
+    sys.path.insert(0, os.path.join(here, sub))
+
+import cnct1a
+import divida1b
+from techbrasil.artefatos import primary_path, read_artifact
+from techbrasil.cubos import CUBE_MEASURES, LEVELS, SHARE_MEASURES
+from techbrasil.formatting import format_money
+from techbrasil.instrumentacao import file_bytes, stage
+from techbrasil.ocupacoes import fold_text
+from techbrasil.painel import BundleTable, load_manifest, read_table, write_bundle
+from techbrasil.territorio import UF
+from techbrasil.validacao import ufs, unique
+
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+PAINEL_DIR = LOCAL_ROOT + "/working/painel"
+
+# Financial menu of the app, in menu order, with its labels
+FIN_VARIABLES = {
+    "saldo_mar25": "Saldo março de 2025",
+    "amort_extr": "Amortizações extraordinárias - 20 % do saldo",
+    "EPT_1ano_cen01": "Investimento EPT – 1 ano – cenário I",
+    "EPT_1ano_cen02": "Investimento EPT – 1 ano – cenário II",
+    "EPT_5ano_cen01": "Investimento EPT – 5 anos – cenário I",
+    "EPT_5ano_cen02": "Investimento EPT – 5 anos – cenário II",
+    "FEF_1ano_liq_cen01": "Fundo FEF – fluxo líquido 1 ano – cenário I",
+    "FEF_1ano_liq_cen02": "Fundo FEF – fluxo líquido 1 ano – cenário II",
+    "FEF_5ano_liq_cen01": "Fundo FEF – fluxo líquido 5 anos – cenário I",
+    "FEF_5ano_liq_cen02": "Fundo FEF – fluxo líquido 5 anos – cenário II",
+}
+# UFs plotted apart ("Estados com Alta Dívida"); the others are "Demais Estados"
+UF_ENDIVIDADOS = ["MG", "SP", "RJ", "RS"]
+GRUPOS = {"geral": "Demais Estados", "divida": "Estados com Alta Dívida"}
+
+
+def build_fin(propag):
+    """Long table of the plot (sorted by variable, group and Estado) and the wide Tabela 1 with totals."""
+    wide = propag.to_frame()
+    variaveis = [v for v in FIN_VARIABLES if v in wide.columns]
+
+    # --- Plot: one slice per variable, values in R$ and their "1.234 M" bar labels ---
+    fin = wide.melt(id_vars=["UF", "Estado"], value_vars=variaveis, var_name="variavel", value_name="valor")
+    fin["variavel"] = pd.Categorical(fin["variavel"], categories=variaveis)
+    fin["grupo"] = pd.Categorical(np.where(fin["UF"].isin(UF_ENDIVIDADOS), "divida", "geral"),
+                                  categories=list(GRUPOS))
+    # Bars in the app follow the row order: Estado in accent-insensitive order, as R's order() sorted it
+    # (a plain sort puts PARANÁ, PARAÍBA and PARÁ after PARA... by codepoint and SÃO PAULO after SERGIPE)
+    estados = fin["Estado"].drop_duplicates()
+    estados = estados.iloc[np.argsort(fold_text(estados).to_numpy(), kind="stable")]
+    fin["Estado"] = pd.Categorical(fin["Estado"], categories=estados.to_numpy())
+    fin["rotulo"] = format_money((fin["valor"] / 1e6).round(), style="brl", decimals=0).to_numpy() + " M"
+
+    # --- Tabela 1: UFs in their published order, then the national total ---
+    tabela = wide[["UF", "Estado"] + variaveis]
+    total = pd.DataFrame([{"UF": "Todos", "Estado": "Todos", **tabela[variaveis].sum().to_dict()}])
+    tabela = pd.concat([tabela, total], ignore_index=True)
+
+    # --- Menu: order, labels and value range of each group (y axes) ---
+    ranges = fin.groupby(["variavel", "grupo"], observed=True)["valor"].agg(["min", "max"]).unstack("grupo")
+    ranges.columns = [f"{grupo}_{stat}" for stat, grupo in ranges.columns]
+    variaveis_df = pd.DataFrame({"variavel": variaveis, "rotulo": [FIN_VARIABLES[v] for v in variaveis],
+                                 "ordem": np.arange(1, len(variaveis) + 1)})
+    variaveis_df = variaveis_df.join(ranges.reset_index(drop=True))
+    return fin, tabela, variaveis_df
+
+
+def build_ufs():
+    df = UF.frame().rename(columns={"code": "CO_UF", "label": "SG_UF", "name": "NM_UF",
+                                    "parent_code": "CO_5RGRANDE", "parent_label": "regiao"})
+    df["NM_5RGRANDE"] = UF.parent.names[UF.parent_pos]
+    return df
+
+
+def build_tables(params=divida1b.DEFAULT_PARAMS, cnct_base=cnct1a.OUTPUT_BASE):
+    propag = divida1b.compute_propag(params)
+    fin, tabela, variaveis = build_fin(propag)
+    trajetorias = divida1b.build_trajetorias(propag, params["trajetoria"])
+    cube = divida1b.build_cubo(propag)
+    cube["nivel"] = pd.Categorical(cube["nivel"], categories=LEVELS)
+    # R$ rounded to units (what the app prints), shares to 0.01 pp
+    money = {c: 0 for c in trajetorias.columns if c not in ("scenario", "UF", "ano")}
+    cube_decimals = {**dict.fromkeys(CUBE_MEASURES, 0),
+                     **{f"{m}_share_{lvl}": 4 for m in SHARE_MEASURES for lvl in ("br", "regiao")}}
+
+    tables = [
+        BundleTable("propag_fin", fin, sort_by=["variavel", "grupo", "Estado"], slice_by="variavel",
+                    decimals={"valor": 0}, labels={"variavel": FIN_VARIABLES, "grupo": GRUPOS},
+                    checks=[unique("variavel", "UF"), ufs("UF")]),
+        BundleTable("propag_fin_tabela", tabela, decimals=dict.fromkeys(FIN_VARIABLES, 0),
+                    labels=FIN_VARIABLES, checks=[unique("UF")]),
+        BundleTable("propag_variaveis", variaveis, decimals={f"{g}_{s}": 0 for g in GRUPOS for s in ("min", "max")}),
+        BundleTable("propag_trajetoria", trajetorias, sort_by=["scenario", "UF", "ano"], slice_by="scenario",
+                    decimals=money),
+        BundleTable("propag_cubo", cube, sort_by=["nivel"], slice_by="nivel", decimals=cube_decimals),
+        BundleTable("ufs", build_ufs(), checks=[ufs("SG_UF")]),
+    ]
+    if cnct_base and os.path.exists(primary_path(cnct_base)):
+        cursos = read_artifact(cnct_base, columns=[
+            "course_id", "Eixo Tecnológico", "Área Tecnológica", "Denominação do Curso", "Carga Horária Mínima",
+        ])
+        # Rows repeated in the catalog share their course_id: one row per course in the app
+        tables.append(BundleTable(
+            "cnct_cursos", cursos.drop_duplicates("course_id"), sort_by=["Eixo Tecnológico", "Área Tecnológica", "Denominação do Curso"],
+            slice_by="Eixo Tecnológico", checks=[unique("course_id")],
+        ))
+    return tables
+
+
+def run(out_dir=PAINEL_DIR, params=divida1b.DEFAULT_PARAMS, cnct_base=cnct1a.OUTPUT_BASE):
+    """Pipeline stage: Propag parameters (+ df_cnct2025a) -> dashboard bundle."""
+    tables = build_tables(params, cnct_base)
+    with stage("painel.write", rows_in=sum(len(t.df) for t in tables)) as st:
+        manifest = write_bundle(out_dir, tables, meta={"app": "produtos/BM_FGV_Propag1b.R"})
+        st.bytes_written = file_bytes(*(os.path.join(out_dir, t["file"]) for t in manifest["tables"].values()))
+    print(f"✅ Dashboard bundle: {len(tables)} tables, {st.bytes_written / 1e6:.1f} MB in {out_dir}")
+    return manifest
+
+
+def startup(out_dir=PAINEL_DIR, variavel="FEF_5ano_liq_cen01"):
+    """What the app does before its first render: manifest, small tables, the default slice of the plot.
+
+    Timed with pyarrow (benchmark painel_startup); produtos/painel_startup.R times the same steps in R
+    through painel_bundle.R, which is what the app runs.
+    """
+    start = time.perf_counter()
+    manifest = load_manifest(out_dir)
+    read_table(out_dir, "propag_fin_tabela", manifest=manifest)
+    read_table(out_dir, "propag_variaveis", manifest=manifest)
+    read_table(out_dir, "ufs", manifest=manifest)
+    read_table(out_dir, "propag_fin", fatia=variavel, manifest=manifest)
+    # Large tables are only mapped; their slices are read when a tab asks for them
+    for name in ("propag_trajetoria", "propag_cubo"):
+        read_table(out_dir, name, manifest=manifest, to_pandas=False)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if "--startup" in sys.argv:
+        print(f"✅ Bundle opened in {startup() * 1000:.1f} ms")
+    else:
+        run(params=divida1b.load_params(sys.argv[sys.argv.index("--params") + 1])
+            if "--params" in sys.argv else divida1b.DEFAULT_PARAMS)
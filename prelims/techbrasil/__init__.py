@@ -0,0 +1,5 @@
+# techbrasil
+#
+# Shared Python helpers for the prelims/ scripts (Propag financing, MEC catalogs).
+# Scripts add the prelims/ folder to sys.path and import the modules directly, e.g.
+#   from techbrasil.propag import run_scenarios
@@ -0,0 +1,146 @@
+# artefatos.py
+
+# Artifact writer for working/ outputs
+# The primary copy of each artifact is an uncompressed Arrow IPC (Feather v2) file, so R (arrow::read_feather)
+# and Python can memory-map it. Low-cardinality string columns (UF, Eixo Tecnológico, Área Tecnológica, ...)
+# are dictionary-encoded. The .pkl / .rds / .csv / .parquet copies are derived from the primary only when
+# requested and only when missing or older than it.
+# Checks passed as checks= (techbrasil/validacao.py) run before anything is written.
+
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from techbrasil.validacao import check_artifact
+
+PRIMARY_EXT = ".feather"
+DERIVED_FORMATS = ("pkl", "rds", "csv", "parquet")
+# Rows per Parquet row group: with rows sorted by the usual filter columns, readers skip row groups
+# by their min/max statistics instead of scanning the file
+PARQUET_ROW_GROUP = 1 << 16
+
+# Content hash of the frame, stored in the Arrow schema so unchanged outputs are not rewritten
+_HASH_KEY = b"techbrasil.content_hash"
+
+
+def _content_hash(df):
+    h = hashlib.sha256()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _dictionary_encode(df, categoricals, max_ratio):
+    out = df.copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            continue
+        if col in categoricals:
+            out[col] = out[col].astype("category")
+        elif max_ratio and (out[col].dtype == object or pd.api.types.is_string_dtype(out[col].dtype)):
+            if len(out) and out[col].nunique(dropna=True) <= max_ratio * len(out):
+                out[col] = out[col].astype("category")
+    return out
+
+
+def primary_path(base):
+    return base + PRIMARY_EXT
+
+
+def write_artifact(df, base, categoricals=(), auto_dictionary_ratio=0.2, checks=None):
+    """Write the primary Feather copy of df at <base>.feather; returns True if it was (re)written.
+
+    categoricals: columns always dictionary-encoded; other string columns are encoded when their
+    distinct values are at most auto_dictionary_ratio of the rows (0 disables this).
+    checks: techbrasil.validacao checks run first (report at <base>.validacao.json); a failed
+    error-level check raises ValidationError and nothing is written.
+    """
+    if checks:
+        check_artifact(df, base, checks)
+
+    path = primary_path(base)
+    content_hash = _content_hash(df)
+    if artifact_hash(base) == content_hash:
+        return False
+
+    table = pa.Table.from_pandas(_dictionary_encode(df, set(categoricals), auto_dictionary_ratio), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _HASH_KEY: content_hash.encode()})
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return True
+
+
+def artifact_hash(base):
+    """Content hash stored in the primary copy (None if missing), e.g. to detect a new catalog edition."""
+    path = primary_path(base)
+    if not os.path.exists(path):
+        return None
+    metadata = feather.read_table(path, memory_map=True).schema.metadata or {}
+    return metadata.get(_HASH_KEY, b"").decode() or None
+
+
+def open_artifact(base, columns=None):
+    """Memory-mapped Arrow table of the primary copy (no deserialization of unused columns)."""
+    return feather.read_table(primary_path(base), columns=columns, memory_map=True)
+
+
+def read_artifact(base, columns=None, categoricals=True):
+    """pandas DataFrame from the primary copy; categoricals=False returns plain string columns."""
+    df = open_artifact(base, columns=columns).to_pandas()
+    if not categoricals:
+        df = _plain(df)
+    return df
+
+
+def _plain(df):
+    # Derived copies keep the historical layout: dictionary columns go back to plain values
+    out = df.copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(out[col].cat.categories.dtype)
+    return out
+
+
+def _is_stale(base, fmt):
+    target = f"{base}.{fmt}"
+    return not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(primary_path(base))
+
+
+def ensure_formats(base, formats=("pkl", "rds", "csv")):
+    """Produce the requested derived copies that are missing or older than the primary; returns those written."""
+    stale = [fmt for fmt in formats if _is_stale(base, fmt)]
+    if not stale:
+        return []
+
+    df = None
+    for fmt in stale:
+        target = f"{base}.{fmt}"
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            # Plain string columns: Parquet dictionary-encodes them anyway, and readers only prune row groups
+            # by statistics on non-dictionary fields
+            table = open_artifact(base)
+            table = table.cast(pa.schema([
+                f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type) else f for f in table.schema
+            ], metadata=table.schema.metadata))
+            pq.write_table(table, target, row_group_size=PARQUET_ROW_GROUP)
+            continue
+
+        if df is None:
+            df = read_artifact(base, categoricals=False)
+        if fmt == "pkl":
+            df.to_pickle(target)
+        elif fmt == "rds":
+            import pyreadr
+            pyreadr.write_rds(target, df)
+        elif fmt == "csv":
+            df.to_csv(target, index=False)
+        else:
+            raise ValueError(f"Unknown artifact format: {fmt} (expected one of {DERIVED_FORMATS})")
+    return stale
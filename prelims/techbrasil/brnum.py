@@ -0,0 +1,69 @@
+# brnum.py
+
+# Vectorized parsers for Brazilian-formatted numbers ("291.684.192.718,19", "12,5%", "180 Horas")
+# Each string is rewritten with a single str.translate pass (drop "." and "R$", "," -> ".")
+# and converted with pd.to_numeric; rows that do not parse are reported instead of raising.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# values: float64 (or int64 centavos) array aligned with the input
+# failed: index labels of non-empty inputs that could not be parsed
+ParseResult = namedtuple("ParseResult", ["values", "failed"])
+
+_BR_TABLE = str.maketrans({".": None, ",": ".", " ": None, " ": None, "R": None, "$": None})
+_HOURS_PATTERN = r"(?i)(-?\d[\d.]*(?:,\d+)?)\s*(?:horas?|hs?)?\b"
+
+
+def _as_series(values):
+    if isinstance(values, pd.Series):
+        return values
+    return pd.Series(values)
+
+
+def _as_text(raw):
+    return raw.astype("string").str.strip()
+
+
+def _result(raw, parsed, centavos):
+    # Missing inputs stay NaN silently; anything else that became NaN is a parse failure
+    values = np.asarray(parsed, dtype=np.float64)
+    text = _as_text(raw)
+    filled = (text.notna() & (text != "")).to_numpy(dtype=bool, na_value=False)
+    failed = raw.index[np.isnan(values) & filled]
+    if centavos:
+        # Exact for balances below ~9e13 R$, which covers every series we handle
+        if np.isnan(values).any():
+            values = pd.array(np.rint(values * 100), dtype="Int64")
+        else:
+            values = np.rint(values * 100).astype(np.int64)
+    return ParseResult(values, failed)
+
+
+def parse_br_number(values, centavos=False):
+    """Parse "1.234.567,89" / "R$ 1.234,5" strings; centavos=True returns int64 centavos."""
+    raw = _as_series(values)
+    if pd.api.types.is_numeric_dtype(raw.dtype):
+        return _result(raw, raw.astype(np.float64), centavos)
+    cleaned = _as_text(raw).str.translate(_BR_TABLE)
+    parsed = pd.to_numeric(cleaned, errors="coerce").astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan)
+    return _result(raw, parsed, centavos)
+
+
+def parse_br_percent(values, fraction=False):
+    """Parse "12,5%" strings into 12.5 (or 0.125 with fraction=True)."""
+    raw = _as_series(values)
+    result = parse_br_number(_as_text(raw).str.rstrip("%"))
+    values = result.values / 100 if fraction else result.values
+    return ParseResult(values, result.failed)
+
+
+def parse_hours(values):
+    """Parse workload strings such as "180 Horas", "1.200 horas", "800h" or "160" into hours."""
+    raw = _as_series(values)
+    if pd.api.types.is_numeric_dtype(raw.dtype):
+        return _result(raw, raw.astype(np.float64), False)
+    number = _as_text(raw).str.extract(_HOURS_PATTERN, expand=False)
+    return _result(raw, parse_br_number(number).values, False)
@@ -0,0 +1,281 @@
+# busca.py
+
+# Local full-text search (BM25) over course catalogs and seminar transcripts
+# Text is accent-folded, lowercased, stripped of Portuguese stopwords and lightly stemmed (plural and a few
+# common suffixes), so "ocupações", "Ocupacao" and "ocupação" are the same term.
+# On disk the index is a directory of immutable segments, each with numpy postings that are memory-mapped
+# at query time:
+#   <index>/index.json              live segments, deleted documents, fingerprint of each indexed source
+#   <index>/seg_00001/vocab.json    term -> [offset, count] into the postings arrays
+#   <index>/seg_00001/docs.npy      int32 local doc id of each posting (grouped by term)
+#   <index>/seg_00001/tfs.npy       int32 term frequency of each posting
+#   <index>/seg_00001/doclen.npy    int32 number of terms of each document
+#   <index>/seg_00001/meta.jsonl    id, source and title of each document
+# A new catalog edition or transcript is indexed as a new segment; documents of the replaced source are
+# marked deleted in the older segments. compact() rewrites everything into one segment.
+
+import json
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de del dela dele do dos e ela ele em entre era essa esse esta este eu foi for
+ha isso isto ja la mais mas me mesmo na nas nao no nos o os ou para pela pelas pelo pelos por qual quando
+que se sem ser seu seus sua suas sao so tambem te tem um uma umas uns voce vai vou ter sobre ate apos
+""".split())
+
+# Light stemmer: first matching suffix is replaced, keeping a stem of at least 3 characters
+_SUFFIXES = (
+    ("mente", ""), ("coes", "cao"), ("soes", "sao"), ("oes", "ao"), ("aes", "ao"), ("ais", "al"),
+    ("eis", "el"), ("ois", "ol"), ("zes", "z"), ("res", "r"), ("ns", "m"), ("s", ""),
+)
+
+
+def fold(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+def stem(word):
+    if len(word) < 4 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def tokenize(text):
+    """Text -> list of folded, stemmed terms (stopwords dropped)."""
+    if not isinstance(text, str):
+        return []
+    return [stem(w) for w in _TOKEN_RE.findall(fold(text)) if w not in STOPWORDS]
+
+
+def _write_segment(path, docs):
+    # docs: list of {"id", "source", "title", "text"}
+    postings = {}
+    doclen = np.zeros(len(docs), dtype=np.int32)
+    for local_id, doc in enumerate(docs):
+        counts = Counter(tokenize(doc.get("title", "")) + tokenize(doc.get("text", "")))
+        doclen[local_id] = sum(counts.values())
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((local_id, tf))
+
+    vocab, doc_ids, tfs, offset = {}, [], [], 0
+    for term in sorted(postings):
+        plist = postings[term]
+        vocab[term] = [offset, len(plist)]
+        doc_ids.extend(d for d, _ in plist)
+        tfs.extend(t for _, t in plist)
+        offset += len(plist)
+
+    meta = [{k: doc.get(k, "") for k in ("id", "source", "title")} for doc in docs]
+    _save_segment(path, vocab, np.asarray(doc_ids), np.asarray(tfs), doclen, meta)
+
+
+def _save_segment(path, vocab, doc_ids, tfs, doclen, meta):
+    # Written to <path>.tmp and renamed, so a crash never leaves a half-written segment in the index
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "docs.npy"), doc_ids.astype(np.int32))
+    np.save(os.path.join(tmp, "tfs.npy"), tfs.astype(np.int32))
+    np.save(os.path.join(tmp, "doclen.npy"), doclen.astype(np.int32))
+    with open(os.path.join(tmp, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(tmp, "meta.jsonl"), "w", encoding="utf-8") as f:
+        for m in meta:
+            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+class _Segment:
+    def __init__(self, path, deleted):
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r")
+        self.doclen = np.load(os.path.join(path, "doclen.npy"), mmap_mode="r")
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(path, "meta.jsonl"), "r", encoding="utf-8") as f:
+            self.meta = [json.loads(line) for line in f]
+        self.sources = np.array([m["source"] for m in self.meta], dtype=str)
+        self.alive = np.ones(len(self.meta), dtype=bool)
+        self.alive[list(deleted)] = False
+
+    def postings(self, term):
+        # (local doc ids, term frequencies) of live documents containing term
+        entry = self.vocab.get(term)
+        if entry is None:
+            return None, None
+        start, count = entry
+        docs = np.asarray(self.docs[start:start + count])
+        tfs = np.asarray(self.tfs[start:start + count])
+        keep = self.alive[docs]
+        return docs[keep], tfs[keep]
+
+
+class SearchIndex:
+    """BM25 index stored in a directory; see the module header for the layout."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.state = self._load_state()
+        self._open()
+
+    # --- State ---
+
+    def _load_state(self):
+        state_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"segments": [], "deleted": {}, "sources": {}, "next_segment": 1}
+
+    def _save_state(self):
+        tmp = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, INDEX_FILE))
+
+    def _open(self):
+        self.segments = {
+            name: _Segment(os.path.join(self.path, name), self.state["deleted"].get(name, []))
+            for name in self.state["segments"]
+        }
+        alive_len = [seg.doclen[seg.alive] for seg in self.segments.values()]
+        self.n_docs = int(sum(len(x) for x in alive_len))
+        self.avgdl = float(sum(int(x.sum()) for x in alive_len)) / self.n_docs if self.n_docs else 0.0
+
+    # --- Updates ---
+
+    def source_fingerprint(self, source):
+        return self.state["sources"].get(source)
+
+    def replace_source(self, source, docs, fingerprint=None):
+        """Index docs as the new content of `source`, deleting its previous documents.
+
+        docs: iterable of {"id", "title", "text"}; skipped when fingerprint equals the stored one.
+        Returns True if the index changed.
+        """
+        if fingerprint is not None and self.state["sources"].get(source) == fingerprint:
+            return False
+        emptied = []
+        for name, seg in self.segments.items():
+            old = set(np.flatnonzero(seg.sources == source).tolist())
+            if old:
+                deleted = set(self.state["deleted"].get(name, [])) | old
+                if len(deleted) == len(seg.meta):
+                    emptied.append(name)
+                else:
+                    self.state["deleted"][name] = sorted(deleted)
+
+        docs = [{**doc, "source": source} for doc in docs]
+        if docs:
+            name = f"seg_{self.state['next_segment']:05d}"
+            _write_segment(os.path.join(self.path, name), docs)
+            self.state["segments"].append(name)
+            self.state["next_segment"] += 1
+        for name in emptied:
+            self.state["segments"].remove(name)
+            self.state["deleted"].pop(name, None)
+        self.state["sources"][source] = fingerprint
+        self._save_state()
+        for name in emptied:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self._open()
+        return True
+
+    def compact(self):
+        """Merge all live documents into one segment, reusing their postings (no re-tokenization)."""
+        if len(self.segments) <= 1 and not any(self.state["deleted"].values()):
+            return
+        merged_meta, postings, doclen = [], {}, []
+        for seg in self.segments.values():
+            new_id = np.full(len(seg.meta), -1, dtype=np.int64)
+            live = np.flatnonzero(seg.alive)
+            new_id[live] = np.arange(len(merged_meta), len(merged_meta) + len(live))
+            merged_meta.extend(seg.meta[i] for i in live)
+            doclen.append(np.asarray(seg.doclen)[live])
+            for term, (start, count) in seg.vocab.items():
+                docs = new_id[np.asarray(seg.docs[start:start + count])]
+                tfs = np.asarray(seg.tfs[start:start + count])
+                keep = docs >= 0
+                if keep.any():
+                    postings.setdefault(term, []).append((docs[keep], tfs[keep]))
+
+        vocab, doc_parts, tf_parts, offset = {}, [], [], 0
+        for term in sorted(postings):
+            docs = np.concatenate([d for d, _ in postings[term]])
+            vocab[term] = [offset, len(docs)]
+            doc_parts.append(docs)
+            tf_parts.append(np.concatenate([t for _, t in postings[term]]))
+            offset += len(docs)
+        empty = np.zeros(0, dtype=np.int32)
+        name = f"seg_{self.state['next_segment']:05d}"
+        _save_segment(
+            os.path.join(self.path, name), vocab, np.concatenate(doc_parts or [empty]),
+            np.concatenate(tf_parts or [empty]), np.concatenate(doclen or [empty]), merged_meta,
+        )
+
+        old = self.state["segments"]
+        self.segments = {}
+        self.state.update(segments=[name], deleted={}, next_segment=self.state["next_segment"] + 1)
+        self._save_state()
+        for seg_name in old:
+            shutil.rmtree(os.path.join(self.path, seg_name), ignore_errors=True)
+        self._open()
+
+    # --- Queries ---
+
+    def search(self, query, k=10, sources=None):
+        """Top-k documents for query as a list of {"id", "source", "title", "score"}.
+
+        sources: optional collection of source names (or prefixes ending in ":") to restrict to.
+        """
+        terms = tokenize(query)
+        if not terms or not self.n_docs:
+            return []
+        hits = {name: [seg.postings(t) for t in terms] for name, seg in self.segments.items()}
+        df = np.zeros(len(terms))
+        for plists in hits.values():
+            df += [0 if docs is None else len(docs) for docs, _ in plists]
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+
+        results = []
+        for name, seg in self.segments.items():
+            scores = np.zeros(len(seg.meta))
+            norm = K1 * (1 - B + B * np.asarray(seg.doclen, dtype=np.float64) / self.avgdl)
+            for j, (docs, tfs) in enumerate(hits[name]):
+                if docs is None or not len(docs):
+                    continue
+                scores[docs] += idf[j] * tfs * (K1 + 1) / (tfs + norm[docs])
+            if sources is not None:
+                scores[~_source_mask(seg.sources, sources)] = 0
+            top = np.flatnonzero(scores)
+            if len(top) > k:
+                top = top[np.argpartition(-scores[top], k - 1)[:k]]
+            results.extend((scores[i], name, int(i)) for i in top)
+
+        results.sort(key=lambda r: (-r[0], r[1], r[2]))
+        return [{**self.segments[name].meta[i], "score": round(float(s), 4)} for s, name, i in results[:k]]
+
+
+def _source_mask(seg_sources, wanted):
+    mask = np.zeros(len(seg_sources), dtype=bool)
+    for w in wanted:
+        mask |= np.char.startswith(seg_sources, w) if w.endswith(":") else seg_sources == w
+    return mask
@@ -0,0 +1,97 @@
+# catalogo_fic.py
+
+# Single-pass streaming parser for the PRONATEC FIC course catalog (text edition)
+# Reads the file line by line; a new entry starts at lines like "12. Nome do Curso ... 160 Horas"
+# and each field label switches the field that following text is appended to.
+# Every character is scanned once by one compiled label pattern, so parse time is linear
+# in the file size and memory is bounded by the largest single entry.
+
+import re
+
+FIC_FIELDS = [
+    "curso_nome", "carga_horaria", "codigo_curso", "eixo_tecnologico", "escolaridade_minima",
+    "perfil_profissional", "idade", "outros_pre_requisitos", "ocupacoes_cbo", "observacao"
+]
+
+# Field labels, in the order they appear in each entry
+_LABELS = [
+    ("codigo_curso", r"C[oó]digo do Curso:"),
+    ("eixo_tecnologico", r"Eixo Tecnol[oó]gico:"),
+    ("escolaridade_minima", r"Escolaridade M[ií]nima:"),
+    ("perfil_profissional", r"Perfil Profissional:"),
+    ("idade", r"Idade:"),
+    ("outros_pre_requisitos", r"Outros pr[eé]-requisitos:"),
+    ("ocupacoes_cbo", r"Ocupações Associadas(?:\s*\(CBO\):)?"),
+    ("observacao", r"Observa[cç][aã]o:"),
+]
+
+_LABEL_RE = re.compile("|".join(f"(?P<{field}>{pattern})" for field, pattern in _LABELS))
+_ENTRY_START_RE = re.compile(r"\d+\.\s")
+# Name and hours are searched in the whole entry, as the former patterns did (an entry whose
+# heading lacks "Horas" takes the first "<n> Horas" further down)
+_NAME_RE = re.compile(r"^\d+\.\s+(.*?)\s+\d+\s+Horas", re.DOTALL)
+_HOURS_RE = re.compile(r"(\d{2,4})\s+Horas")
+_CODE_RE = re.compile(r"\s*(\d+)")
+# "(CBO):" left at the start of the field when the label is split over two lines
+_CBO_SUFFIX_RE = re.compile(r"^\s*\(CBO\):")
+
+
+def _finish(parts, lines):
+    # parts: field -> list of text fragments collected for the current entry; lines: the entry's text
+    course = dict.fromkeys(FIC_FIELDS)
+    parts.pop("header", None)
+    entry = "".join(lines)
+    match = _NAME_RE.match(entry)
+    if match:
+        course["curso_nome"] = match.group(1).strip()
+    hours = _HOURS_RE.search(entry)
+    if hours:
+        course["carga_horaria"] = hours.group(1)
+
+    for field, chunks in parts.items():
+        value = "".join(chunks)
+        if field == "codigo_curso":
+            code = _CODE_RE.match(value)
+            course[field] = code.group(1) if code else None
+        elif field == "ocupacoes_cbo":
+            course[field] = _CBO_SUFFIX_RE.sub("", value).strip()
+        else:
+            course[field] = value.strip()
+    return course
+
+
+def iter_fic_courses(lines):
+    """Yield one dict per catalog entry (keys in FIC_FIELDS) from an iterable of lines.
+
+    Like the former re.split(r"\\n(?=\\d+\\.\\s)"), any text before the first numbered entry
+    is emitted as its own (empty) record so curso_id numbering is unchanged.
+    """
+    parts = {"header": []}
+    entry = []
+    current = "header"
+    first = True
+
+    for line in lines:
+        if not first and _ENTRY_START_RE.match(line):
+            yield _finish(parts, entry)
+            parts = {"header": []}
+            entry = []
+            current = "header"
+        first = False
+        entry.append(line)
+
+        pos = 0
+        for match in _LABEL_RE.finditer(line):
+            parts.setdefault(current, []).append(line[pos:match.start()])
+            current = match.lastgroup
+            parts[current] = []
+            pos = match.end()
+        parts.setdefault(current, []).append(line[pos:])
+
+    yield _finish(parts, entry)
+
+
+def parse_fic_catalog(path, encoding="latin1"):
+    """Parse a catalog file into a list of course dicts, streaming over the file handle."""
+    with open(path, "r", encoding=encoding) as fh:
+        return list(iter_fic_courses(fh))
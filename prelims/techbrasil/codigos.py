@@ -0,0 +1,133 @@
+# codigos.py
+
+# Hierarchical codes (e.g. eixo -> área -> curso) built in one pass over integer keys
+# Each level is factorized against its parent key with groupby().ngroup(), codes are assigned on the
+# small table of distinct paths, and mapped back to the rows by position (no string keys, no
+# index alignment). A previous code table keeps IDs stable across catalog editions: known paths
+# keep their code and new paths get the next free code within their scope. The table also stores each
+# level's label width, so labels (and ids) of known paths never change either.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# column: source column; name: output code column
+# scope: "parent" numbers within each parent, "global" numbers across the whole level
+# order: "appearance" (first occurrence in the data) or "sorted" (by parent codes, then value)
+Level = namedtuple("Level", ["column", "name", "scope", "order"], defaults=("parent", "appearance"))
+
+# codes: int32 code per row and level; labels: zero-padded strings; ids: concatenated labels
+# table: one row per distinct path (values + codes + <name>_width per level), to be passed as `previous` next edition
+CodeResult = namedtuple("CodeResult", ["codes", "labels", "ids", "table"])
+
+
+def _assign(paths, group, order_cols, level, previous, path_cols):
+    # paths: one row per distinct key (appearance order); returns int64 code per key
+    parent_cols = path_cols[:-1] if level.scope == "parent" else []
+    floor = np.zeros(len(paths))
+    if previous is not None and level.name in previous.columns:
+        known = previous[path_cols + [level.name]].drop_duplicates(path_cols)
+        keys = paths[path_cols].astype(object)
+        known = known.astype({c: object for c in path_cols})
+        code = keys.merge(known, on=path_cols, how="left")[level.name].to_numpy(dtype=np.float64, copy=True)
+
+        # Codes of paths that disappeared stay reserved: new codes start above every code ever used
+        if parent_cols:
+            used = known.groupby(parent_cols, dropna=False)[level.name].max().rename("used").reset_index()
+            floor = keys[parent_cols].merge(used, on=parent_cols, how="left")["used"].fillna(0).to_numpy()
+        else:
+            floor[:] = known[level.name].max()
+    else:
+        code = np.full(len(paths), np.nan)
+
+    if level.order == "sorted":
+        order = paths.sort_values(order_cols, kind="stable").index.to_numpy()
+    else:
+        order = np.arange(len(paths))
+
+    group = np.asarray(group)
+    new = np.isnan(code)
+    if new.any():
+        # Next free code within the scope: max used code + rank among the new keys
+        start = pd.Series(np.maximum(np.where(new, 0, code), floor)).groupby(group).max()
+        new_in_order = order[new[order]]
+        rank = pd.Series(group[new_in_order]).groupby(group[new_in_order]).cumcount().to_numpy() + 1
+        code[new_in_order] = start.reindex(group[new_in_order]).to_numpy() + rank
+    return code.astype(np.int64)
+
+
+def _level_width(key_code, previous, name, width):
+    # Label width of a level: the one stored in `previous` (or implied by its codes, for tables written
+    # before widths were stored) is kept; widening it would rewrite the ids of unchanged courses
+    needed = max(width, len(str(int(key_code.max()) if len(key_code) else 0)))
+    if previous is None or name not in previous.columns or not len(previous):
+        return needed
+    if name + "_width" in previous.columns:
+        fixed = int(previous[name + "_width"].max())
+    else:
+        fixed = max(width, len(str(int(previous[name].max()))))
+    if needed > fixed:
+        raise ValueError(
+            f"{name}: code {int(key_code.max())} needs {needed}-digit labels but the previous code table uses "
+            f"{fixed}; widening would change existing ids (start a new code table with a larger width)"
+        )
+    return fixed
+
+
+def hierarchical_codes(df, levels, previous=None, width=2):
+    """Assign nested codes to the rows of df.
+
+    levels: list of Level (or (column, name) tuples), outermost first
+    previous: CodeResult.table from an earlier edition, to keep existing codes stable
+    width: minimum zero-padding of the string labels (a level with larger codes gets wider labels,
+        except with `previous`, whose widths are kept; a code that no longer fits raises ValueError)
+    """
+    levels = [lvl if isinstance(lvl, Level) else Level(*lvl) for lvl in levels]
+    n = len(df)
+    parent_key = np.zeros(n, dtype=np.int64)
+    parent_paths = pd.DataFrame(index=pd.RangeIndex(1))
+    codes, labels, widths, path_cols, code_cols = {}, {}, {}, [], []
+
+    for lvl in levels:
+        values = df[lvl.column].astype("category") if not isinstance(df[lvl.column].dtype, pd.CategoricalDtype) else df[lvl.column]
+        val_codes = values.cat.codes.to_numpy()
+
+        # Key ids in order of first appearance of each (parent, value) pair
+        key = (
+            pd.DataFrame({"p": parent_key, "v": val_codes})
+            .groupby(["p", "v"], sort=False, dropna=False)
+            .ngroup()
+            .to_numpy()
+        )
+        _, first = np.unique(key, return_index=True)
+
+        parents = parent_key[first]
+        paths = parent_paths.iloc[parents].reset_index(drop=True)
+        paths[lvl.column] = values.iloc[first].to_numpy()
+
+        group = parents if lvl.scope == "parent" else np.zeros(len(first), dtype=np.int64)
+        key_code = _assign(paths, group, code_cols + [lvl.column], lvl, previous, path_cols + [lvl.column])
+        paths[lvl.name] = key_code
+
+        # Zero-padded strings are formatted once per distinct key, then taken by position. Every label
+        # of a level has the same length, so the concatenated ids stay unambiguous
+        level_width = _level_width(key_code, previous, lvl.name, width)
+        widths[lvl.name + "_width"] = level_width
+        key_label = np.char.zfill(key_code.astype(str), level_width).astype(object)
+        paths[lvl.name + "_label"] = key_label
+        codes[lvl.name] = key_code[key].astype(np.int32)
+        labels[lvl.name] = key_label[key]
+        path_cols.append(lvl.column)
+        code_cols.append(lvl.name)
+        parent_key, parent_paths = key, paths
+
+    # Concatenated per distinct path with element-wise adds (a row-wise apply is far slower on large catalogs)
+    key_ids = parent_paths[code_cols[0] + "_label"].to_numpy(dtype=object)
+    for c in code_cols[1:]:
+        key_ids = key_ids + parent_paths[c + "_label"].to_numpy(dtype=object)
+    codes = pd.DataFrame(codes, index=df.index)
+    labels = pd.DataFrame(labels, index=df.index)
+    ids = pd.Series(key_ids[parent_key], index=df.index)
+    table = parent_paths[path_cols + code_cols].assign(**widths)
+    return CodeResult(codes, labels, ids, table)
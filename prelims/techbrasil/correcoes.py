@@ -0,0 +1,60 @@
+# correcoes.py
+
+# Manual corrections kept as data instead of code
+# A correction table has one row per (key, field, value), e.g. prelims/mec/pronatec_correcoes.csv:
+#   curso_id,field,value
+#   7,curso_nome,Administrador de Empreendimentos Florestais de Base Comunitária
+# apply_overrides() resolves every key to a row position with one index lookup and assigns each
+# field in a single vectorized step, so the cost does not grow with one frame scan per correction.
+# Corrections whose key no longer exists (or whose field is not a column) are returned for reporting.
+
+import os
+
+import pandas as pd
+
+OVERRIDE_COLUMNS = ["field", "value"]
+
+
+def load_overrides(path, key="curso_id"):
+    """Correction table (CSV or Parquet) -> DataFrame with columns key, field, value (as text)."""
+    if os.path.splitext(path)[1].lower() == ".parquet":
+        table = pd.read_parquet(path)
+    else:
+        table = pd.read_csv(path, dtype={"field": "string", "value": "string"}, encoding="utf-8", comment="#")
+    missing = {key, *OVERRIDE_COLUMNS} - set(table.columns)
+    if missing:
+        raise ValueError(f"Correction table {path} is missing columns: {sorted(missing)}")
+    duplicated = table.duplicated([key, "field"], keep=False)
+    if duplicated.any():
+        raise ValueError(f"Conflicting corrections in {path}:\n{table[duplicated]}")
+    return table
+
+
+def apply_overrides(df, overrides, key="curso_id"):
+    """Apply a correction table to df in place; returns the corrections that matched no row.
+
+    Values are cast to the dtype of the target column where possible (text columns stay text).
+    """
+    overrides = overrides.reset_index(drop=True)
+    positions = pd.Index(df[key]).get_indexer(overrides[key].astype(df[key].dtype))
+    known_field = overrides["field"].isin(df.columns).to_numpy()
+    matched = (positions >= 0) & known_field
+
+    for field, rows in overrides[matched].groupby("field", sort=False):
+        col = df.columns.get_loc(field)
+        values = rows["value"]
+        if pd.api.types.is_numeric_dtype(df[field].dtype):
+            values = pd.to_numeric(values)
+        df.iloc[positions[rows.index], col] = values.to_numpy()
+
+    return overrides[~matched]
+
+
+def report_unmatched(unmatched, key="curso_id", label="correction"):
+    if len(unmatched):
+        print(f"⚠️ {len(unmatched)} {label}(s) matched no row: {unmatched[[key, 'field']].values.tolist()}")
+
+
+def capitalize_first(values):
+    """Uppercase the first character of each string (vectorized); missing values stay missing."""
+    return values.str[:1].str.upper() + values.str[1:]
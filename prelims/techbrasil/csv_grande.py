@@ -0,0 +1,177 @@
+# csv_grande.py
+
+# Out-of-core reader for the large MEC / RAIS ";"-separated Latin-1 CSVs (SISTEC enrollments, RAIS vínculos)
+#   for df in read_chunks(path, columns=["UF", "CBO Ocupação 2002", "Vl Remun Média Nom"],
+#                         dtypes={"Vl Remun Média Nom": "float64"}, categoricals=["UF"],
+#                         filters={"UF": ["SP", "RJ"]}):
+#       ...
+#   to_parquet(path, out_dir, partition_by=["UF", "ano"], constants={"ano": 2023}, filters=...)
+# The file is streamed in blocks of block_size bytes by pyarrow's CSV reader: every block is transcoded from
+# Latin-1 to UTF-8 once while it is read, parsed and converted on all cores, then projected and filtered
+# before anything reaches pandas, so peak memory depends on block_size, not on the file size.
+# Same format as the catalog CSV read by cnct1a.py (SEP / ENCODING below).
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from techbrasil.instrumentacao import file_bytes, stage
+
+SEP = ";"
+ENCODING = "ISO-8859-1"
+DECIMAL = ","
+# The reader keeps a few dozen blocks in flight, so peak memory is roughly 35 x BLOCK_SIZE
+# (about 250 MB RSS for a 5M-row RAIS-like file written to Parquet, nearly the same as for 1M rows)
+BLOCK_SIZE = 1 << 20
+
+# pandas-style dtype names accepted in dtypes=
+_ARROW_TYPES = {
+    "str": pa.string(), "string": pa.string(), "object": pa.string(),
+    "int8": pa.int8(), "int16": pa.int16(), "int32": pa.int32(), "int64": pa.int64(),
+    "float32": pa.float32(), "float64": pa.float64(), "bool": pa.bool_(),
+    "date": pa.date32(), "datetime64[ns]": pa.timestamp("ns"),
+}
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+
+def _arrow_type(dtype):
+    if isinstance(dtype, pa.DataType):
+        return dtype
+    if dtype == "category":
+        return _CATEGORY
+    try:
+        return _ARROW_TYPES[str(dtype)]
+    except KeyError:
+        raise ValueError(f"Unsupported dtype for the chunked reader: {dtype}") from None
+
+
+def _filter_mask(batch, filters):
+    # filters: {column: allowed values} (membership) or a callable batch -> boolean array
+    if callable(filters):
+        return filters(batch)
+    mask = None
+    for col, allowed in filters.items():
+        values = batch.column(col)
+        if pa.types.is_dictionary(values.type):
+            values = values.cast(values.type.value_type)
+        allowed = pa.array(list(allowed), type=values.type)
+        m = pc.is_in(values, value_set=allowed)
+        mask = m if mask is None else pc.and_(mask, m)
+    return mask
+
+
+def open_batches(path, columns=None, dtypes=None, categoricals=(), filters=None, block_size=BLOCK_SIZE,
+                 sep=SEP, encoding=ENCODING, decimal=DECIMAL, counts=None):
+    """Stream the CSV as Arrow record batches, projected to columns and filtered.
+
+    dtypes: {column: dtype} ("int64", "float64", "str", "date", "category" or a pyarrow type); columns
+        not listed are read as strings (codes such as CBO or CNPJ keep their leading zeros). Floats use
+        decimal as the decimal mark ("1022,33").
+    categoricals: columns read dictionary-encoded (pandas category).
+    filters: {column: allowed values}, or a callable batch -> boolean mask; filter columns need not be
+        in columns (they are read, used and dropped).
+    counts: optional dict updated with rows_in / rows_out as batches are read.
+    """
+    header = pacsv.open_csv(
+        path, read_options=pacsv.ReadOptions(encoding=encoding, block_size=1 << 16),
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+    ).schema.names
+    columns = list(columns) if columns is not None else header
+    filter_cols = [] if filters is None or callable(filters) else [c for c in filters if c not in columns]
+    missing = [c for c in columns + filter_cols if c not in header]
+    if missing:
+        raise KeyError(f"Columns not in {os.path.basename(path)}: {missing}")
+
+    types = {col: pa.string() for col in columns + filter_cols}
+    types.update({col: _arrow_type(t) for col, t in (dtypes or {}).items()})
+    types.update({col: _CATEGORY for col in categoricals})
+
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(encoding=encoding, block_size=block_size, use_threads=True),
+        parse_options=pacsv.ParseOptions(delimiter=sep, newlines_in_values=False),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns + filter_cols, column_types=types, strings_can_be_null=True,
+            decimal_point=decimal,
+        ),
+    )
+    for batch in reader:
+        if counts is not None:
+            counts["rows_in"] = counts.get("rows_in", 0) + batch.num_rows
+        if filters is not None:
+            batch = batch.filter(_filter_mask(batch, filters))
+        if filter_cols:
+            batch = batch.select(columns)
+        if counts is not None:
+            counts["rows_out"] = counts.get("rows_out", 0) + batch.num_rows
+        if batch.num_rows:
+            yield batch
+
+
+def read_chunks(path, **kwargs):
+    """Same as open_batches(), one pandas DataFrame per block (categoricals as category dtype)."""
+    for batch in open_batches(path, **kwargs):
+        yield batch.to_pandas()
+
+
+def read_filtered(path, **kwargs):
+    """Whole filtered / projected result as one DataFrame (memory bounded by the rows kept)."""
+    batches = list(open_batches(path, **kwargs))
+    if not batches:
+        return pd.DataFrame()
+    return pa.Table.from_batches(batches).unify_dictionaries().to_pandas()
+
+
+def to_parquet(path, out_dir, partition_by=("UF",), constants=None, max_rows_per_file=5_000_000, **kwargs):
+    """Stream the CSV into a hive-partitioned Parquet dataset (out_dir/UF=SP/ano=2023/part-0.parquet).
+
+    constants: columns added to every row (e.g. {"ano": 2023} for a yearly RAIS file), usable as partitions.
+    Partitions already present for the same keys are replaced; others are left alone, so yearly files can
+    be loaded into the same dataset one at a time. Returns {"rows_in", "rows_out"}.
+    """
+    constants = constants or {}
+    counts = {}
+    with stage("csv.to_parquet", bytes_read=file_bytes(path), file=os.path.basename(path)) as st:
+        batches = open_batches(path, counts=counts, **kwargs)
+        first = next(batches, None)
+        if first is None:
+            return {"rows_in": counts.get("rows_in", 0), "rows_out": 0}
+
+        def with_constants(batch):
+            for col, value in constants.items():
+                batch = batch.append_column(col, pa.array(np.full(batch.num_rows, value)))
+            # Dictionaries differ between blocks: write plain strings (Parquet dictionary-encodes them again)
+            return pa.RecordBatch.from_arrays(
+                [c.cast(c.type.value_type) if pa.types.is_dictionary(c.type) else c for c in batch.columns],
+                names=batch.schema.names,
+            )
+
+        first = with_constants(first)
+
+        def stream():
+            yield first
+            for batch in batches:
+                yield with_constants(batch)
+
+        ds.write_dataset(
+            stream(), out_dir, schema=first.schema, format="parquet",
+            partitioning=list(partition_by), partitioning_flavor="hive",
+            existing_data_behavior="delete_matching", max_rows_per_file=max_rows_per_file,
+            max_rows_per_group=min(1 << 20, max_rows_per_file),
+        )
+        st.rows_in, st.rows_out = counts.get("rows_in"), counts.get("rows_out")
+    return counts
+
+
+def read_partitioned(out_dir, columns=None, filters=None):
+    """Read a dataset written by to_parquet(); filters (pyarrow expression or [(col, op, value)]) prune partitions."""
+    if isinstance(filters, list):
+        filters = pq.filters_to_expression(filters)
+    dataset = ds.dataset(out_dir, format="parquet", partitioning="hive")
+    return dataset.to_table(columns=columns, filter=filters).to_pandas()
@@ -0,0 +1,133 @@
+# cubos.py
+
+# Precomputed aggregate cubes of the Propag/EPT outputs for the dashboards
+# One row per (scenario, geography) at three levels: "UF", "regiao" (N/NE/CO/SE/S) and "BR". Every rollup
+# is materialized with its totals and shares, so a dashboard query is a filter on the cube, e.g.
+#   lookup(divida1b.CUBE_BASE, nivel="regiao", scenario="cen02")
+#   arrow::open_dataset("propag_cubo.parquet") |> filter(nivel == "UF", regiao == "NE")   (R)
+# Rows are sorted by (nivel, scenario, regiao, UF) and the Parquet copy is written in row groups, so a
+# filter on those columns only reads the matching row groups.
+# Scenarios are never rolled up together: flows of different scenarios are alternatives, not parts.
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.artefatos import ensure_formats, write_artifact
+from techbrasil.territorio import REGIAO, UF
+from techbrasil.validacao import not_null, sums_to, ufs, unique
+
+# Region membership from the shared UF dimension (techbrasil/territorio.py)
+REGIOES = {
+    reg: sorted(UF.labels[UF.parent_pos == pos]) for pos, reg in enumerate(REGIAO.labels)
+}
+UF_REGIAO = dict(zip(UF.labels, REGIAO.labels[UF.parent_pos]))
+
+LEVELS = ["UF", "regiao", "BR"]
+
+# Per-UF inputs (same in every scenario) followed by the scenario flows of PropagTable.flows
+CUBE_MEASURES = [
+    "saldo", "amort_extr", "refinanced_base", "fef_contrib", "fef_received", "fef_net", "ept",
+    "fef_net_total", "ept_total",
+]
+# Net FEF flows add up to about zero nationally, so a share of them means nothing
+SHARE_MEASURES = [m for m in CUBE_MEASURES if m not in ("fef_net", "fef_net_total")]
+
+# Checked before the cube is written: one row per geography and scenario, and the rows of every level
+# add up to the Brazil total of their scenario
+CUBE_CHECKS = [
+    unique("nivel", "scenario", "regiao", "UF"), ufs("UF", complete=False), not_null("nivel", "scenario", "saldo"),
+    sums_to("saldo_share_br", 1.0, tol=1e-9, by=["nivel", "scenario"]),
+]
+
+
+def _level_frame(nivel, scenarios, regiao, uf, values):
+    # values: {measure: (geography x scenario) array}; rows are scenario-major
+    n_geo, n_sc = len(uf), len(scenarios)
+    out = {
+        "nivel": np.full(n_geo * n_sc, nivel, dtype=object),
+        "scenario": np.repeat(np.asarray(scenarios, dtype=object), n_geo),
+        "regiao": np.tile(np.asarray(regiao, dtype=object), n_sc),
+        "UF": np.tile(np.asarray(uf, dtype=object), n_sc),
+    }
+    for name, arr in values.items():
+        out[name] = arr.ravel(order="F")
+    return pd.DataFrame(out)
+
+
+def propag_cube(propag, regions=None):
+    """Cube of a PropagTable: totals per UF / region / Brazil and scenario, with shares.
+
+    <measure>_share_br: share of the Brazil total of the same scenario
+    <measure>_share_regiao: share of the region total (UF rows; 1 on region rows, NaN on the Brazil row)
+    regions: optional {UF: region} override; by default the IBGE regions of the UF dimension
+    """
+    uf = np.asarray(propag.uf, dtype=object)
+    if regions is None:
+        # Positional: UF -> position in the dimension -> region position -> label
+        uf_regiao = REGIAO.labels[UF.parent_pos[UF.position(uf)]]
+    else:
+        unknown = sorted(set(uf) - set(regions))
+        if unknown:
+            raise KeyError(f"UFs without a region: {unknown}")
+        uf_regiao = np.array([regions[u] for u in uf], dtype=object)
+    n_sc = len(propag.scenarios)
+    by_uf = {
+        "saldo": np.repeat(propag.saldo[:, None], n_sc, axis=1),
+        "amort_extr": np.repeat(propag.amort_extr[:, None], n_sc, axis=1),
+    }
+    by_uf.update({name: propag.flows[name] for name in CUBE_MEASURES[2:]})
+
+    # Region totals as one (region x UF) indicator product per measure
+    reg_names = [r for r in REGIOES if r in set(uf_regiao)] + sorted(set(uf_regiao) - set(REGIOES))
+    indicator = (uf_regiao[None, :] == np.asarray(reg_names, dtype=object)[:, None]).astype(np.float64)
+    by_reg = {name: indicator @ arr for name, arr in by_uf.items()}
+    by_br = {name: arr.sum(axis=0, keepdims=True) for name, arr in by_uf.items()}
+
+    reg_pos = {r: i for i, r in enumerate(reg_names)}
+    uf_reg_idx = np.array([reg_pos[r] for r in uf_regiao])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in SHARE_MEASURES:
+            by_uf[f"{name}_share_br"] = by_uf[name] / by_br[name]
+            by_uf[f"{name}_share_regiao"] = by_uf[name] / by_reg[name][uf_reg_idx]
+            by_reg[f"{name}_share_br"] = by_reg[name] / by_br[name]
+            by_reg[f"{name}_share_regiao"] = np.ones_like(by_reg[name])
+            by_br[f"{name}_share_br"] = np.ones_like(by_br[name])
+            by_br[f"{name}_share_regiao"] = np.full_like(by_br[name], np.nan)
+
+    scenarios = propag.scenarios["scenario"].to_numpy()
+    cube = pd.concat([
+        _level_frame("UF", scenarios, uf_regiao, uf, by_uf),
+        _level_frame("regiao", scenarios, reg_names, [None] * len(reg_names), by_reg),
+        _level_frame("BR", scenarios, [None], [None], by_br),
+    ], ignore_index=True)
+
+    # Scenario parameters next to the scenario name, then the geography and the measures
+    cube = cube.merge(propag.scenarios, on="scenario", how="left")
+    params = [c for c in propag.scenarios.columns if c != "scenario"]
+    head = ["nivel", "scenario"] + params + ["regiao", "UF"]
+    cube = cube[head + [c for c in cube.columns if c not in head]]
+
+    cube["_nivel"] = cube["nivel"].map({lvl: i for i, lvl in enumerate(LEVELS)})
+    cube = cube.sort_values(["_nivel", "scenario", "regiao", "UF"], kind="stable", na_position="first")
+    return cube.drop(columns="_nivel").reset_index(drop=True)
+
+
+def write_cube(cube, base, formats=("parquet", "rds")):
+    """Feather primary (memory-mapped by the apps) plus row-grouped Parquet and RDS copies.
+
+    For large scenario grids pass formats=("parquet",): the RDS copy of millions of rows is slow to write.
+    """
+    written = write_artifact(cube, base, categoricals=["nivel", "scenario", "regiao", "UF"], checks=CUBE_CHECKS)
+    ensure_formats(base, list(formats))
+    return written
+
+
+def lookup(base, columns=None, **filters):
+    """Rows of the cube's Parquet copy matching column == value (or value in list) filters."""
+    import pyarrow.dataset as ds
+
+    expr = None
+    for col, value in filters.items():
+        term = ds.field(col).isin(value) if isinstance(value, (list, tuple, set)) else ds.field(col) == value
+        expr = term if expr is None else expr & term
+    return ds.dataset(f"{base}.parquet", format="parquet").to_table(columns=columns, filter=expr).to_pandas()
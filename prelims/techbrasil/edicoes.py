@@ -0,0 +1,319 @@
+# edicoes.py
+
+# Editions of a course catalog (CNCT, PRONATEC FIC) and the differences between any two of them
+#   store = EditionStore(".../working/mec_outros/edicoes")
+#   store.add("cnct", "2025", df_cnct, CNCT_SPEC)      # fingerprints of the edition, saved once
+#   store.diff("cnct", "2021", "2025")                  # added / removed / renamed / changed courses
+#   store.history("cnct")                               # diffs between consecutive editions
+# Each edition is reduced to one row per course with uint64 fingerprints of its folded name, eixo, área,
+# carga horária and sorted CBO list, plus fingerprints of their combinations. Courses are paired by
+# successive keyed joins on those fingerprints, each on the rows left unpaired by the previous one:
+#   linha     identical course
+#   lugar     same name in the same eixo/área (carga or CBO list changed)
+#   nome      same name elsewhere (moved to another eixo/área)
+#   conteudo  same eixo, área, carga and CBO list under a new name, when unique on both sides (renamed)
+#   fuzzy     trigram-similar names among the few rows still unpaired (ocupacoes.match_names)
+# so no pair of courses is compared field by field unless the joins already paired them.
+# Fingerprints are Feather artifacts (<root>/<catalog>/<edicao>.feather) and diffs are cached under
+# <root>/<catalog>/diffs/ keyed by the content hashes of both editions: comparing edition N to N+1
+# reads the fingerprints of N, and an unchanged pair of editions is not diffed again.
+
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.artefatos import artifact_hash, read_artifact, write_artifact
+from techbrasil.instrumentacao import stage
+from techbrasil.ocupacoes import fold_text, match_names, parse_cbo_codes
+from techbrasil.validacao import not_null, unique
+
+# Columns of a catalog playing each role; area=None for catalogs without áreas (FIC)
+CatalogSpec = namedtuple("CatalogSpec", ["id", "nome", "eixo", "area", "carga", "cbo"])
+
+CNCT_SPEC = CatalogSpec(
+    id="course_id", nome="Denominação do Curso", eixo="Eixo Tecnológico", area="Área Tecnológica",
+    carga="Carga Horária Mínima", cbo="Ocupações CBO Associadas",
+)
+FIC_SPEC = CatalogSpec(
+    id="curso_id", nome="curso_nome", eixo="eixo_tecnologico", area=None,
+    carga="carga_horaria", cbo="ocupacoes_cbo",
+)
+
+FIELDS = ["nome", "eixo", "area", "carga", "cbo"]
+# Combined fingerprints used as join keys, in the order the joins run
+KEYS = {
+    "linha": FIELDS,
+    "lugar": ["nome", "eixo", "area"],
+    "nome": ["nome"],
+    "conteudo": ["eixo", "area", "carga", "cbo"],
+}
+UNIQUE_ONLY = {"conteudo"}
+RENAME_THRESHOLD = 0.7
+CHANGES = ["added", "removed", "renamed", "changed"]
+INDEX = "index.json"
+
+FINGERPRINT_CHECKS = [unique("id"), not_null("id", "fp_linha")]
+
+
+def _hash(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def fingerprints(df, spec):
+    """One row per course: id, displayed values, canonical CBO list and uint64 fingerprints.
+
+    Rows repeated in the catalog share their id (cnct1a.py codes them alike); the first one is kept.
+    """
+    df = df[~df[spec.id].astype(str).duplicated()]
+    n = len(df)
+    blank = pd.Series([""] * n, index=df.index)
+    area = df[spec.area] if spec.area else blank
+    carga = pd.to_numeric(df[spec.carga], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    cbo = parse_cbo_codes(df[spec.cbo]).map(lambda codes: ";".join(sorted(codes)))
+
+    out = pd.DataFrame({
+        "id": df[spec.id].astype(str).to_numpy(),
+        "nome": df[spec.nome].astype("string").to_numpy(),
+        "eixo": df[spec.eixo].astype("string").to_numpy(),
+        "area": area.astype("string").to_numpy(),
+        "carga": carga,
+        "cbo": cbo.astype("string").to_numpy(),
+    })
+    # Names, eixos and áreas compared folded: a change of accents or case is not a change
+    field_fp = {
+        "nome": _hash(fold_text(out["nome"]).fillna("")),
+        "eixo": _hash(fold_text(out["eixo"]).fillna("")),
+        "area": _hash(fold_text(out["area"]).fillna("")),
+        "carga": _hash(carga),
+        "cbo": _hash(out["cbo"].fillna("")),
+    }
+    for field, fp in field_fp.items():
+        out[f"fp_{field}"] = fp
+    for key, fields in KEYS.items():
+        if fields != [key]:
+            out[f"fp_{key}"] = pd.util.hash_pandas_object(
+                pd.DataFrame({f: field_fp[f] for f in fields}), index=False).to_numpy()
+    return out
+
+
+def _runs(sorted_keys):
+    """Rank of every element within its run of equal keys, and the length of that run."""
+    n = len(sorted_keys)
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    lengths = np.diff(np.r_[starts, n])
+    return np.arange(n) - np.repeat(starts, lengths), np.repeat(lengths, lengths)
+
+
+def _pair(keys_a, keys_b, unique_only=False):
+    """Positions (ia, ib) of equal keys; repeated keys pair in order of appearance (k-th with k-th).
+
+    Binary search of keys_a in sorted keys_b: the k-th repeat of a key in a pairs with the row at
+    (start of that key's run in b) + k, if the run is that long.
+    """
+    oa, ob = np.argsort(keys_a, kind="stable"), np.argsort(keys_b, kind="stable")
+    ka, kb = keys_a[oa], keys_b[ob]
+    rank_a, len_a = _runs(ka)
+    _, len_b = _runs(kb)
+    pos = np.searchsorted(kb, ka) + rank_a
+    hit = pos < len(kb)
+    hit[hit] = kb[pos[hit]] == ka[hit]
+    if unique_only:
+        hit &= len_a == 1
+        hit[hit] = len_b[pos[hit]] == 1
+    return oa[hit], ob[pos[hit]]
+
+
+def match_editions(fa, fb, rename_threshold=RENAME_THRESHOLD):
+    """(ia, ib, method, score) pairing courses of fingerprint tables fa and fb, one to one."""
+    rest_a, rest_b = np.arange(len(fa)), np.arange(len(fb))
+    ia_all, ib_all, methods, scores = [], [], [], []
+
+    def take(ia, ib, method, score):
+        nonlocal rest_a, rest_b
+        ia_all.append(rest_a[ia])
+        ib_all.append(rest_b[ib])
+        methods.append(np.full(len(ia), method, dtype=object))
+        scores.append(score)
+        rest_a = np.delete(rest_a, ia)
+        rest_b = np.delete(rest_b, ib)
+
+    for key in KEYS:
+        col = f"fp_{key}"
+        ia, ib = _pair(fa[col].to_numpy()[rest_a], fb[col].to_numpy()[rest_b], key in UNIQUE_ONLY)
+        take(ia, ib, key, np.ones(len(ia)))
+
+    if len(rest_a) and len(rest_b):
+        fuzzy = match_names(fa["nome"].to_numpy()[rest_a], fb["nome"].to_numpy()[rest_b],
+                            threshold=rename_threshold)
+        fuzzy = fuzzy.sort_values("score", ascending=False, kind="stable").drop_duplicates("right_idx")
+        take(fuzzy["left_idx"].to_numpy(), fuzzy["right_idx"].to_numpy(), "fuzzy", fuzzy["score"].to_numpy())
+
+    return (np.concatenate(ia_all).astype(np.int64), np.concatenate(ib_all).astype(np.int64),
+            np.concatenate(methods), np.concatenate(scores))
+
+
+def _cbo_delta(old, new):
+    old = set(old.split(";")) - {""} if isinstance(old, str) else set()
+    new = set(new.split(";")) - {""} if isinstance(new, str) else set()
+    return ";".join(sorted(new - old)), ";".join(sorted(old - new))
+
+
+def diff_fingerprints(fa, fb, rename_threshold=RENAME_THRESHOLD):
+    """Courses that differ between two editions, one row each.
+
+    change: added / removed / renamed (name changed, other fields may too) / changed
+    Flags nome, eixo, area, carga, cbo tell which fields changed; *_a / *_b hold the values of each
+    edition, cbo_added / cbo_removed the CBO codes gained and lost; method and score how the pair was found.
+    """
+    ia, ib, method, score = match_editions(fa, fb, rename_threshold)
+
+    # Field flags from the fingerprints; values are only gathered for the pairs that differ
+    flags = {f: fa[f"fp_{f}"].to_numpy()[ia] != fb[f"fp_{f}"].to_numpy()[ib] for f in FIELDS}
+    changed = np.logical_or.reduce(list(flags.values()))
+    removed = np.setdiff1d(np.arange(len(fa)), ia)
+    added = np.setdiff1d(np.arange(len(fb)), ib)
+    n_removed, n_added = len(removed), len(added)
+
+    # One position per output row in each edition (-1: course absent from that edition)
+    none_a, none_b = np.full(n_added, -1), np.full(n_removed, -1)
+    pos_a = np.concatenate([ia[changed], removed, none_a]).astype(np.int64)
+    pos_b = np.concatenate([ib[changed], none_b, added]).astype(np.int64)
+    change = np.concatenate([np.where(flags["nome"][changed], 2, 3), np.full(n_removed, 1), np.full(n_added, 0)])
+
+    out = {"change": pd.Categorical.from_codes(change, categories=CHANGES)}
+    for v in ["id", "nome", "eixo", "area", "carga"]:
+        out[f"{v}_a"] = _take(fa[v], pos_a)
+        out[f"{v}_b"] = _take(fb[v], pos_b)
+    for f, flag in flags.items():
+        out[f] = np.concatenate([flag[changed], np.zeros(n_removed + n_added, dtype=bool)])
+
+    # CBO codes gained / lost, only on the rows whose list changed (all of them for added / removed courses)
+    cbo_a, cbo_b = _take(fa["cbo"], pos_a), _take(fb["cbo"], pos_b)
+    rows = np.flatnonzero(out["cbo"] | (change < 2))
+    gained, lost = np.full(len(change), "", dtype=object), np.full(len(change), "", dtype=object)
+    for r in rows:
+        gained[r], lost[r] = _cbo_delta(cbo_a[r], cbo_b[r])
+    out["cbo_added"], out["cbo_removed"] = gained, lost
+    out["method"] = np.concatenate([method[changed], np.full(n_removed + n_added, None, dtype=object)])
+    out["score"] = np.concatenate([score[changed], np.full(n_removed + n_added, np.nan)])
+
+    # Grouped by change type, courses in their order in the edition they come from
+    order = np.lexsort((np.where(pos_a >= 0, pos_a, pos_b), change))
+    return pd.DataFrame(out).iloc[order].reset_index(drop=True)
+
+
+def _take(values, positions):
+    """values[positions] with None (NaN for numbers) where positions is -1."""
+    arr = values.to_numpy()
+    fill = np.nan if arr.dtype.kind == "f" else None
+    if not len(arr):
+        return np.full(len(positions), fill, dtype=arr.dtype if fill is not None else object)
+    out = arr[np.maximum(positions, 0)]
+    if arr.dtype.kind != "f":
+        out = out.astype(object)
+    out[positions < 0] = fill
+    return out
+
+
+class EditionStore:
+    """Fingerprints of every ingested edition of each catalog, and the diffs already computed."""
+
+    def __init__(self, root):
+        self.root = root
+        self._fingerprints = {}  # (catalog, edicao, hash) -> DataFrame
+        self.stats = {"fingerprints_read": 0, "diffs_computed": 0, "diffs_cached": 0}
+
+    # --- index ---
+    def _index_path(self, catalog):
+        return os.path.join(self.root, catalog, INDEX)
+
+    def index(self, catalog):
+        path = self._index_path(catalog)
+        if not os.path.exists(path):
+            return {"editions": {}, "diffs": {}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, catalog, index):
+        path = self._index_path(catalog)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def editions(self, catalog):
+        """Edition labels in order (labels sort chronologically, e.g. "2016", "2021", "2025-03")."""
+        return sorted(self.index(catalog)["editions"])
+
+    # --- editions ---
+    def _base(self, catalog, edicao):
+        return os.path.join(self.root, catalog, edicao)
+
+    def add(self, catalog, edicao, df, spec):
+        """Fingerprint an edition and save it; re-adding the same content rewrites nothing."""
+        with stage(f"edicoes.add.{catalog}", rows_in=len(df)) as st:
+            fp = fingerprints(df, spec)
+            base = self._base(catalog, edicao)
+            write_artifact(fp, base, checks=FINGERPRINT_CHECKS)
+            index = self.index(catalog)
+            index["editions"][edicao] = {"hash": artifact_hash(base), "rows": len(fp), "spec": spec._asdict()}
+            self._save_index(catalog, index)
+            st.rows_out = len(fp)
+        self._fingerprints[(catalog, edicao, index["editions"][edicao]["hash"])] = fp
+        return fp
+
+    def fingerprints(self, catalog, edicao):
+        info = self.index(catalog)["editions"].get(edicao)
+        if info is None:
+            raise KeyError(f"{catalog}: edition {edicao!r} not ingested (have {self.editions(catalog)})")
+        key = (catalog, edicao, info["hash"])
+        if key not in self._fingerprints:
+            self._fingerprints[key] = read_artifact(self._base(catalog, edicao), categoricals=False)
+            self.stats["fingerprints_read"] += 1
+        return self._fingerprints[key]
+
+    # --- diffs ---
+    def diff(self, catalog, a, b, refresh=False):
+        """Diff of edition a -> b, read from the cache when both editions are unchanged since it was stored."""
+        index = self.index(catalog)
+        name = f"{a}__{b}"
+        base = os.path.join(self.root, catalog, "diffs", name)
+        hashes = [index["editions"].get(a, {}).get("hash"), index["editions"].get(b, {}).get("hash")]
+        if not refresh and index["diffs"].get(name) == hashes and artifact_hash(base):
+            self.stats["diffs_cached"] += 1
+            out = read_artifact(base, categoricals=False)
+            out["change"] = pd.Categorical(out["change"], categories=CHANGES)
+            return out
+
+        fa, fb = self.fingerprints(catalog, a), self.fingerprints(catalog, b)
+        with stage(f"edicoes.diff.{catalog}", rows_in=len(fa) + len(fb)) as st:
+            out = diff_fingerprints(fa, fb)
+            st.rows_out = len(out)
+        write_artifact(out, base)
+        index["diffs"][name] = hashes
+        self._save_index(catalog, index)
+        self.stats["diffs_computed"] += 1
+        return out
+
+    def history(self, catalog, refresh=False):
+        """Diffs between consecutive editions, stacked with edicao_a / edicao_b columns."""
+        editions = self.editions(catalog)
+        parts = []
+        for a, b in zip(editions[:-1], editions[1:]):
+            df = self.diff(catalog, a, b, refresh=refresh)
+            parts.append(df.assign(edicao_a=a, edicao_b=b))
+        if not parts:
+            return pd.DataFrame(columns=["edicao_a", "edicao_b"])
+        out = pd.concat(parts, ignore_index=True)
+        out["change"] = pd.Categorical(out["change"], categories=CHANGES)
+        return out[["edicao_a", "edicao_b"] + [c for c in out.columns if c not in ("edicao_a", "edicao_b")]]
+
+
+def summarize(diff):
+    """Counts per change type and, for changed/renamed courses, per field."""
+    counts = diff["change"].value_counts().reindex(CHANGES, fill_value=0).to_dict()
+    fields = {f: int(diff[f].sum()) for f in FIELDS}
+    return {"changes": {k: int(v) for k, v in counts.items()}, "fields": fields}
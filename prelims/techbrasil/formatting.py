@@ -0,0 +1,36 @@
+# formatting.py
+
+# Presentation layer: numbers stay float64 in the pipeline and are only turned into
+# "1,234,567.89" (US) or "1.234.567,89" (BRL) strings at export / display time.
+
+import numpy as np
+import pandas as pd
+
+# Swap the thousands and decimal separators of a US-formatted string
+_US_TO_BRL = str.maketrans({",": ".", ".": ","})
+
+
+def format_money(values, style="us", decimals=2):
+    """Format numbers with thousands separators; style is "us" or "brl"."""
+    fmt = f"{{:,.{decimals}f}}".format
+    index = values.index if isinstance(values, pd.Series) else None
+    out = [fmt(v) for v in np.asarray(values, dtype=np.float64)]
+    if style == "brl":
+        out = [s.translate(_US_TO_BRL) for s in out]
+    elif style != "us":
+        raise ValueError(f"Unknown number style: {style}")
+    return pd.Series(out, index=index, dtype=object)
+
+
+def format_percent(values, decimals=2, style="us"):
+    """Format numbers already in percent units as "12.34%"."""
+    out = format_money(values, style=style, decimals=decimals)
+    return out + "%"
+
+
+def present(df, money_columns, style="us", decimals=2):
+    """Copy of df with the given numeric columns formatted for export."""
+    out = df.copy()
+    for col in money_columns:
+        out[col] = format_money(df[col], style=style, decimals=decimals)
+    return out
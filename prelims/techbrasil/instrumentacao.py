@@ -0,0 +1,193 @@
+# instrumentacao.py
+
+# Stage-level instrumentation for the prelims scripts
+#   with stage("cnct.read_csv", bytes_read=os.path.getsize(path)) as st:
+#       df = pd.read_csv(path, ...)
+#       st.rows_out = len(df)
+# Each stage records wall and CPU time, rows in/out, bytes read/written and the process peak RSS.
+# Nothing is written unless enabled by environment variables:
+#   TECHBRASIL_LOG=<file.jsonl>        one JSON line per finished stage (appended; safe across processes)
+#   TECHBRASIL_TRACE=<file.json>       Chrome trace (chrome://tracing, Perfetto, speedscope) built from the
+#                                      log when the main process exits; implies a log at <file.json>.jsonl
+#   TECHBRASIL_PROFILE=<stage>[,...]   cProfile those stages; stats dumped to <stage>.prof
+#   TECHBRASIL_TRACEMALLOC=<stage>     tracemalloc for that stage; top allocations added to its record
+#   TECHBRASIL_PROFILE_DIR=<dir>       where .prof files go (default: current directory)
+
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _env_list(name):
+    return {s.strip() for s in os.environ.get(name, "").split(",") if s.strip()}
+
+
+def log_path():
+    log = os.environ.get("TECHBRASIL_LOG")
+    trace = os.environ.get("TECHBRASIL_TRACE")
+    return log or (trace + ".jsonl" if trace else None)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (None where it cannot be read)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows: peak working set
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def file_bytes(*paths):
+    """Total size of the files that exist among paths (e.g. the copies an artifact write produced)."""
+    return sum(os.path.getsize(p) for p in paths if p and os.path.exists(p))
+
+
+class StageRecord:
+    """Mutable record of one stage; set rows_out / bytes_written / extra fields inside the with block."""
+
+    def __init__(self, name, parent, **fields):
+        self.name = name
+        self.parent = parent
+        self.rows_in = fields.pop("rows_in", None)
+        self.rows_out = fields.pop("rows_out", None)
+        self.bytes_read = fields.pop("bytes_read", None)
+        self.bytes_written = fields.pop("bytes_written", None)
+        self.extra = fields
+
+    def to_dict(self):
+        out = {
+            "stage": self.name, "parent": self.parent, "pid": os.getpid(), "tid": threading.get_ident(),
+            "start": self.start, "wall_s": round(self.wall_s, 6), "cpu_s": round(self.cpu_s, 6),
+            "rows_in": self.rows_in, "rows_out": self.rows_out,
+            "bytes_read": self.bytes_read, "bytes_written": self.bytes_written,
+            "peak_rss_mb": self.peak_rss_mb, "status": self.status,
+        }
+        out.update(self.extra)
+        return out
+
+
+def _emit(record):
+    path = log_path()
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One short write per line in append mode, so lines from parallel stage processes do not interleave
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def stage(name, **fields):
+    """Time and record a block of work; yields a StageRecord (see the module header)."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    rec = StageRecord(name, stack[-1] if stack else None, **fields)
+
+    profiler = None
+    if name in _env_list("TECHBRASIL_PROFILE"):
+        import cProfile
+        profiler = cProfile.Profile()
+    trace_memory = name in _env_list("TECHBRASIL_TRACEMALLOC")
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    stack.append(name)
+    rec.start = time.time()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    rec.status = "ok"
+    if profiler:
+        profiler.enable()
+    try:
+        yield rec
+    except BaseException as exc:
+        rec.status = "error"
+        rec.extra["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        rec.wall_s = time.perf_counter() - wall0
+        rec.cpu_s = time.process_time() - cpu0
+        rec.peak_rss_mb = peak_rss_mb()
+        stack.pop()
+
+        if profiler:
+            prof_dir = os.environ.get("TECHBRASIL_PROFILE_DIR", ".")
+            os.makedirs(prof_dir, exist_ok=True)
+            prof_file = os.path.join(prof_dir, f"{name}.prof")
+            profiler.dump_stats(prof_file)
+            rec.extra["profile"] = prof_file
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            rec.extra["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            rec.extra["tracemalloc_top"] = [str(s) for s in snapshot.statistics("lineno")[:10]]
+            tracemalloc.stop()
+        _emit(rec.to_dict())
+
+
+def instrumented(name=None):
+    """Decorator form of stage(); the stage name defaults to module.function."""
+    def wrap(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            with stage(label):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# --- Chrome trace ---
+
+def read_log(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def chrome_trace(log, out_path):
+    """Write the stage records of a JSON-lines log as Chrome trace "complete" events."""
+    records = read_log(log) if isinstance(log, str) else list(log)
+    t0 = min((r["start"] for r in records), default=0)
+    events = []
+    for r in records:
+        args = {k: v for k, v in r.items() if k not in ("stage", "start", "wall_s", "pid", "tid") and v is not None}
+        events.append({
+            "name": r["stage"], "cat": r["stage"].split(".")[0], "ph": "X",
+            "ts": round((r["start"] - t0) * 1e6), "dur": round(r["wall_s"] * 1e6),
+            "pid": r["pid"], "tid": r["tid"], "args": args,
+        })
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return out_path
+
+
+def _write_trace_at_exit():
+    trace = os.environ.get("TECHBRASIL_TRACE")
+    log = log_path()
+    if trace and log and os.path.exists(log):
+        chrome_trace(log, trace)
+
+
+# Only the main process builds the trace (stage processes only append to the log)
+if multiprocessing.current_process().name == "MainProcess":
+    atexit.register(_write_trace_at_exit)
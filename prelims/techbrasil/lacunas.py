@@ -0,0 +1,204 @@
+# lacunas.py
+
+# EPT supply-demand gaps: course catalogs joined to occupation-level hiring by geography
+# The join is a sparse product instead of exploded merges:
+#   (course x CBO) links from "Ocupações CBO Associadas" / ocupacoes_cbo
+#   @ (CBO x UF or municipality) hires from a CAGED/RAIS-shaped Parquet  ->  (course x UF) demand
+# Demand of an occupation linked to k courses is counted in full for each course ("demanda") and also
+# split 1/k between them ("demanda_rateada"), so eixo and catalog totals do not count a hire twice.
+# With ~2,500 CBO codes x 5,570 municipalities the hires matrix holds at most 14M cells, a few hundred MB
+# even fully dense; real CAGED extracts are far sparser.
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from scipy import sparse
+
+# Column names of the basedosdados CAGED extract read in prelims/caged/caged_rais_demanda.R
+CAGED_COLUMNS = {"cbo": "cbo_2002", "municipio": "id_municipio", "uf": "sigla_uf", "valor": "n_movimentacoes"}
+# CAGED: saldo_movimentacao 1 = admission, -1 = separation
+CAGED_HIRES = [("saldo_movimentacao", "==", 1)]
+
+
+def normalize_cbo(values):
+    """CBO codes as 6-digit strings ("5153-10", 515310, "515310.0" -> "515310")."""
+    s = pd.Series(values).astype("string").str.replace(r"\.0$", "", regex=True).str.replace(r"\D", "", regex=True)
+    return s.str.zfill(6)
+
+
+class GapEngine:
+    """Course x CBO link matrix of one or more catalogs, ready to be multiplied by demand matrices."""
+
+    def __init__(self, pairs, courses=None):
+        """pairs: (catalog, course_id, cbo) rows, e.g. OccupationIndex.pairs() or df_cursos_cbo.
+
+        courses: optional (catalog, course_id, eixo) table for eixo-level results.
+        """
+        pairs = pairs[["catalog", "course_id", "cbo"]].copy()
+        pairs["course_id"] = pairs["course_id"].astype(str)
+        pairs["cbo"] = normalize_cbo(pairs["cbo"]).to_numpy()
+        pairs = pairs.drop_duplicates()
+
+        keys = pd.MultiIndex.from_frame(pairs[["catalog", "course_id"]])
+        course_codes, self.courses = pd.factorize(keys, sort=True)
+        cbo_codes, cbos = pd.factorize(pairs["cbo"], sort=True)
+        self.cbos = pd.Index(cbos, name="cbo")
+        self.links = sparse.csr_matrix(
+            (np.ones(len(pairs)), (course_codes, cbo_codes)), shape=(len(self.courses), len(self.cbos))
+        )
+        # Each CBO's demand split evenly between the courses linked to it
+        n_courses = np.asarray(self.links.sum(axis=0)).ravel()
+        self.shared_links = self.links @ sparse.diags(1 / np.maximum(n_courses, 1))
+
+        self.eixo = None
+        if courses is not None:
+            c = courses[["catalog", "course_id", "eixo"]].copy()
+            c["course_id"] = c["course_id"].astype(str)
+            c = c.drop_duplicates(["catalog", "course_id"])
+            self.eixo = c.set_index(["catalog", "course_id"])["eixo"].reindex(self.courses)
+
+    @classmethod
+    def from_index(cls, index, courses=None):
+        """From a techbrasil.ocupacoes.OccupationIndex."""
+        return cls(index.pairs(), courses)
+
+    # --- Demand ---
+
+    def demand_matrix(self, demand, geo_col="municipio", cbo_col="cbo", value_col="valor"):
+        """(CBO x geography) hires matrix aligned to this engine's CBO codes, plus the geography labels.
+
+        Hires in occupations no course is linked to are dropped (they cannot change any course's result).
+        """
+        # Normalized once per distinct code, not once per row
+        cbo_codes, cbo_uniques = pd.factorize(pd.Series(demand[cbo_col]).to_numpy(), use_na_sentinel=False)
+        pos = self.cbos.get_indexer(normalize_cbo(cbo_uniques).to_numpy())[cbo_codes]
+        keep = pos >= 0
+        geo_codes, geos = pd.factorize(pd.Series(demand[geo_col]).to_numpy()[keep], sort=True)
+        values = pd.to_numeric(pd.Series(demand[value_col]).to_numpy()[keep], errors="coerce")
+        matrix = sparse.csr_matrix(
+            (np.nan_to_num(values), (pos[keep], geo_codes)), shape=(len(self.cbos), len(geos))
+        )
+        matrix.sum_duplicates()
+        return matrix, pd.Index(geos, name=geo_col)
+
+    def course_demand(self, demand_matrix):
+        """(course x geography) demand: full and split between courses sharing an occupation."""
+        return self.links @ demand_matrix, self.shared_links @ demand_matrix
+
+    # --- Results ---
+
+    def gaps(self, demand, supply=None, geo_col="UF", cbo_col="cbo", value_col="valor",
+             supply_col="oferta"):
+        """Long (catalog, course_id, geography) table of demand, supply and supply / demand.
+
+        demand: rows with cbo_col, geo_col and value_col (hires), already aggregated or not.
+        supply: optional rows (catalog, course_id, geo_col, supply_col), e.g. enrollments or graduates;
+            rows of courses without CBO links are ignored; geographies with supply and no demand are
+            kept, with demanda 0 and razao inf.
+        Only (course, geography) cells with demand or supply are returned.
+        """
+        matrix, geos = self.demand_matrix(demand, geo_col, cbo_col, value_col)
+        if supply is not None:
+            # Geographies with supply but no demand stay in: they are the oversupply cells (razao inf)
+            all_geos = geos.union(pd.Index(pd.unique(pd.Series(supply[geo_col]).dropna()), name=geo_col))
+            if len(all_geos) > len(geos):
+                coo = matrix.tocoo()
+                cols = all_geos.get_indexer(geos)[coo.col]
+                matrix = sparse.csr_matrix((coo.data, (coo.row, cols)), shape=(len(self.cbos), len(all_geos)))
+                geos = all_geos
+        full, shared = self.course_demand(matrix)
+        supply_m = self._supply_matrix(supply, geos, geo_col, supply_col)
+        return self._long(full, shared, supply_m, geos, geo_col)
+
+    def gaps_by_eixo(self, demand=None, supply=None, geo_col="UF", by_course=None, **kwargs):
+        """Same measures summed per (eixo, geography); demand uses the split counts so nothing is counted twice.
+
+        by_course: the result of gaps() for the same inputs, to aggregate it without redoing the sparse product.
+        """
+        if self.eixo is None:
+            raise ValueError("GapEngine was built without a courses table (catalog, course_id, eixo)")
+        if by_course is None:
+            by_course = self.gaps(demand, supply, geo_col=geo_col, **kwargs)
+        eixo = self.eixo.reindex(pd.MultiIndex.from_frame(by_course[["catalog", "course_id"]])).to_numpy()
+        by_course = by_course[[geo_col, "demanda_rateada", "oferta"]].assign(eixo=eixo)
+        # min_count=1: without a supply table oferta (and so razao) stays NaN instead of summing to 0
+        out = by_course.groupby(["eixo", geo_col], as_index=False, observed=True)[["demanda_rateada", "oferta"]].sum(min_count=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["razao"] = out["oferta"] / out["demanda_rateada"]
+        return out
+
+    def _supply_matrix(self, supply, geos, geo_col, supply_col):
+        if supply is None:
+            return None
+        keys = pd.MultiIndex.from_arrays([supply["catalog"], supply["course_id"].astype(str)])
+        rows = self.courses.get_indexer(keys)
+        cols = geos.get_indexer(pd.Series(supply[geo_col]).to_numpy())
+        keep = (rows >= 0) & (cols >= 0)
+        values = pd.to_numeric(pd.Series(supply[supply_col]).to_numpy()[keep], errors="coerce").astype(np.float64)
+        return sparse.csr_matrix((np.nan_to_num(values), (rows[keep], cols[keep])), shape=(len(self.courses), len(geos)))
+
+    def _long(self, full, shared, supply, geos, geo_col):
+        # Union of the non-zero cells of the demand and supply matrices as sorted linear cell keys;
+        # each matrix's values are placed on it by binary search of its own keys (no element-wise indexing)
+        n_geo = len(geos)
+        mats = [full] + ([supply] if supply is not None else [])
+        keys = np.sort(np.concatenate([_cell_keys(m, n_geo, nonzero=True) for m in mats]))
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+        r, c = keys // n_geo, keys % n_geo
+        out = pd.DataFrame({
+            "catalog": np.asarray(self.courses.get_level_values(0), dtype=object)[r],
+            "course_id": np.asarray(self.courses.get_level_values(1), dtype=object)[r],
+            geo_col: geos.to_numpy()[c],
+            "demanda": _values_at(full, keys, n_geo),
+            "demanda_rateada": _values_at(shared, keys, n_geo),
+            "oferta": _values_at(supply, keys, n_geo) if supply is not None else np.nan,
+        })
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["razao"] = out["oferta"] / out["demanda_rateada"]
+        # Keys are row-major and courses / geographies are sorted indexes: already in (catalog, course_id, geo) order
+        return out
+
+
+def _cell_keys(matrix, n_cols, nonzero=False):
+    """Row-major linear keys (row * n_cols + col) of the stored cells of a matrix, in sorted order."""
+    csr = sparse.csr_matrix(matrix)
+    csr.sum_duplicates()
+    rows = np.repeat(np.arange(csr.shape[0], dtype=np.int64), np.diff(csr.indptr))
+    keys = rows * n_cols + csr.indices
+    return keys[csr.data != 0] if nonzero else keys
+
+
+def _values_at(matrix, keys, n_cols):
+    """Values of matrix at the sorted linear cell keys (0 where it has no entry)."""
+    csr = sparse.csr_matrix(matrix)
+    csr.sum_duplicates()
+    own = _cell_keys(csr, n_cols)
+    out = np.zeros(len(keys))
+    if not len(keys):
+        return out
+    pos = np.minimum(np.searchsorted(keys, own), len(keys) - 1)
+    hit = keys[pos] == own
+    out[pos[hit]] = csr.data[hit]
+    return out
+
+
+# --- CAGED / RAIS-shaped Parquet ---
+
+def read_demand(path, columns=CAGED_COLUMNS, filters=CAGED_HIRES, geo="municipio"):
+    """Hires per (cbo, geography) from a Parquet file or directory, aggregated while reading.
+
+    columns: mapping of "cbo", "municipio", "uf", "valor" to the file's column names
+    filters: [(column, op, value)] applied by the Parquet reader (default: CAGED admissions)
+    geo: "municipio" or "uf"; returns columns cbo, municipio or UF, valor
+    """
+    import pyarrow.parquet as pq
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    expr = pq.filters_to_expression(filters) if filters else None
+    wanted = {"cbo": columns["cbo"], geo: columns[geo], "valor": columns["valor"]}
+    table = dataset.to_table(columns=list(wanted.values()), filter=expr)
+    grouped = table.group_by([columns["cbo"], columns[geo]]).aggregate([(columns["valor"], "sum")])
+    df = grouped.to_pandas()
+    geo_name = "UF" if geo == "uf" else geo
+    return df.rename(columns={columns["cbo"]: "cbo", columns[geo]: geo_name, f"{columns['valor']}_sum": "valor"})
+
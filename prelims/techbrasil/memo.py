@@ -0,0 +1,74 @@
+# memo.py
+
+# Memoized intermediate results keyed by a hash of what each step depends on
+#   memo = Memo(cache_dir=".../.memo")
+#   balances = memo("balances", [file_hash(path), ref], lambda: load(path))
+#   base = memo("refinanced_base", [balances, amort], lambda: ...)
+# A dependency can be a plain value (hashed as canonical JSON) or the result of an earlier memo call,
+# whose key is used instead of its content, so keys chain along the steps: changing an input only
+# recomputes the steps downstream of it. Results live in an in-process LRU (for a long-lived process
+# serving many parameter sets) and, with cache_dir, as pickles shared between runs.
+
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+
+def file_hash(path, block_size=1 << 20, algorithm="sha256"):
+    """sha256 (or another hashlib algorithm) of a file's content, streamed in blocks (None if missing)."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Memo:
+    def __init__(self, cache_dir=None, max_entries=64):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys = {}  # id(result) -> key, to chain keys through results
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+    def key(self, step, deps):
+        parts = [{"memo": self._keys[id(d)]} if id(d) in self._keys else d for d in deps]
+        try:
+            payload = json.dumps([step, parts], sort_keys=True)
+        except TypeError as exc:
+            # e.g. an array that is not (or no longer) a memoized result: its repr would be truncated
+            raise TypeError(f"Memo step {step!r}: dependencies must be JSON values or memoized results ({exc})") from None
+        return f"{step}_{hashlib.sha256(payload.encode()).hexdigest()[:20]}"
+
+    def __call__(self, step, deps, compute):
+        key = self.key(step, deps)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._entries[key]
+
+        path = os.path.join(self.cache_dir, key + ".pkl") if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            self.stats["disk_hits"] += 1
+        else:
+            value = compute()
+            self.stats["misses"] += 1
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+
+        self._entries[key] = value
+        self._keys[id(value)] = key
+        while len(self._entries) > self.max_entries:
+            _, old = self._entries.popitem(last=False)
+            self._keys.pop(id(old), None)
+        return value
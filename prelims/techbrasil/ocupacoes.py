@@ -0,0 +1,144 @@
+# ocupacoes.py
+
+# Links CNCT courses, PRONATEC FIC courses and CBO occupations
+# - fold_text(): accent/case folding used for every name comparison
+# - parse_cbo_codes(): "5153-10 Agente ...; 5153-15 ..." -> {"515310", "515315"}
+# - OccupationIndex: inverted index course <-> CBO <-> course with dict lookups
+# - match_names(): trigram-blocked fuzzy matching between two catalogs (sparse product over shared
+#   trigrams only, very common trigrams dropped), instead of comparing every pair of names
+
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# CBO 2002 occupation codes: 4-digit family + 2-digit occupation, written "5153-10", "5153.10" or "515310"
+_CBO_RE = r"(?<!\d)(\d{4})[-.\s]?(\d{2})(?!\d)"
+_PUNCT_RE = r"[^a-z0-9]+"
+
+
+def fold_text(values):
+    """Lowercase, strip accents and collapse punctuation/whitespace (vectorized over a Series)."""
+    s = pd.Series(values, dtype="string") if not isinstance(values, pd.Series) else values.astype("string")
+    return (
+        s.str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.lower()
+        .str.replace(_PUNCT_RE, " ", regex=True)
+        .str.strip()
+    )
+
+
+def parse_cbo_codes(values):
+    """Series of free-text CBO lists -> Series of frozensets of 6-digit codes."""
+    s = pd.Series(values, dtype="string") if not isinstance(values, pd.Series) else values.astype("string")
+    found = s.str.findall(_CBO_RE)
+    return found.map(lambda pairs: frozenset(a + b for a, b in pairs) if isinstance(pairs, list) else frozenset())
+
+
+class OccupationIndex:
+    """Inverted index between courses of several catalogs and CBO codes.
+
+    Courses are identified by (catalog, course id). All queries are dict lookups.
+    """
+
+    def __init__(self):
+        self.by_cbo = defaultdict(set)
+        self.by_family = defaultdict(set)
+        self.by_course = {}
+        self.names = {}
+
+    def add_catalog(self, catalog, ids, names, cbo_texts):
+        codes = parse_cbo_codes(pd.Series(list(cbo_texts)))
+        for cid, name, cbos in zip(ids, names, codes):
+            key = (catalog, cid)
+            self.by_course[key] = cbos
+            self.names[key] = name
+            for cbo in cbos:
+                self.by_cbo[cbo].add(key)
+                self.by_family[cbo[:4]].add(key)
+        return self
+
+    def courses_for(self, cbo):
+        """Courses supplying occupation cbo (6 digits, or a 4-digit family)."""
+        cbo = re.sub(r"\D", "", str(cbo))
+        if len(cbo) == 4:
+            return self.by_family.get(cbo, set())
+        return self.by_cbo.get(cbo, set())
+
+    def occupations_for(self, catalog, course_id):
+        return self.by_course.get((catalog, course_id), frozenset())
+
+    def related_courses(self, catalog, course_id):
+        """Courses (any catalog) sharing at least one CBO code, with the number shared."""
+        shared = defaultdict(int)
+        for cbo in self.occupations_for(catalog, course_id):
+            for other in self.by_cbo[cbo]:
+                shared[other] += 1
+        shared.pop((catalog, course_id), None)
+        return dict(shared)
+
+    def pairs(self):
+        """Long (catalog, course_id, cbo) table for joins with occupation-level data."""
+        rows = [(cat, cid, cbo) for (cat, cid), cbos in self.by_course.items() for cbo in cbos]
+        return pd.DataFrame(rows, columns=["catalog", "course_id", "cbo"])
+
+
+def _trigram_matrix(folded, vocab=None):
+    # Binary (names x trigrams) CSR matrix plus the full trigram count of each name;
+    # names are padded so short words still produce trigrams
+    rows, cols = [], []
+    sizes = np.zeros(len(folded))
+    vocab = {} if vocab is None else vocab
+    grow = not vocab
+    for i, name in enumerate(folded):
+        padded = f"  {name} " if isinstance(name, str) else ""
+        grams = {padded[j:j + 3] for j in range(len(padded) - 2)}
+        sizes[i] = len(grams)
+        for g in grams:
+            col = vocab.get(g)
+            if col is None and grow:
+                col = vocab[g] = len(vocab)
+            if col is not None:
+                rows.append(i)
+                cols.append(col)
+    data = np.ones(len(rows), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(folded), len(vocab))), vocab, sizes
+
+
+def match_names(left, right, threshold=0.5, max_df=0.05, best_only=True):
+    """Fuzzy-match names of two catalogs by trigram Jaccard similarity.
+
+    max_df: trigrams present in more than this share of `right` are used for scoring but not for
+    blocking (they only pair names that already share rarer trigrams), except for names that have no
+    rarer trigram.
+    Returns left_idx, right_idx, left_name, right_name, score.
+    """
+    left = pd.Series(list(left))
+    right = pd.Series(list(right))
+    r_mat, vocab, r_sizes = _trigram_matrix(fold_text(right))
+    l_mat, _, l_sizes = _trigram_matrix(fold_text(left), vocab)
+
+    # Blocking: candidate pairs must share at least one selective trigram; names made only of common
+    # trigrams (e.g. "Técnico em Administração" among many "Técnico em ...") are blocked on all of theirs
+    df = np.asarray(r_mat.sum(axis=0)).ravel()
+    selective = sparse.diags((df <= max(1, max_df * len(right))).astype(np.float32))
+    l_sel = (l_mat @ selective).tocsr()
+    l_sel.eliminate_zeros()
+    unblocked = sparse.diags(((l_sel.getnnz(axis=1) == 0) & (l_mat.getnnz(axis=1) > 0)).astype(np.float32))
+    candidates = ((l_sel + unblocked @ l_mat) @ r_mat.T).tocoo()
+
+    li, ri = candidates.row, candidates.col
+    shared = np.asarray(l_mat[li].multiply(r_mat[ri]).sum(axis=1)).ravel()
+    score = shared / (l_sizes[li] + r_sizes[ri] - shared)
+
+    out = pd.DataFrame({"left_idx": li, "right_idx": ri, "score": score})
+    out = out[out["score"] >= threshold]
+    if best_only:
+        out = out.sort_values(["left_idx", "score"], ascending=[True, False]).drop_duplicates("left_idx")
+    out["left_name"] = left.to_numpy()[out["left_idx"].to_numpy()]
+    out["right_name"] = right.to_numpy()[out["right_idx"].to_numpy()]
+    return out[["left_idx", "right_idx", "left_name", "right_name", "score"]].reset_index(drop=True)
@@ -0,0 +1,161 @@
+# painel.py
+
+# Dashboard bundles: the tables a Shiny app shows, ready to be memory-mapped at startup
+#   write_bundle(out_dir, [BundleTable("propag_fin", df, sort_by=["variavel", "UF"], slice_by="variavel")])
+#   read_table(out_dir, "propag_fin", fatia="saldo_mar25")                 (Python)
+#   painel_tabela(dir, manifest, "propag_fin", fatia = "saldo_mar25")     (R, produtos/painel_bundle.R)
+# Each table is written already sorted, labelled and reduced to the precision the app displays, as an
+# uncompressed Feather file with dictionary-encoded strings (R arrow and pyarrow memory-map it, so
+# opening costs no parsing). manifest.json lists the tables with their columns, sizes and, for tables
+# with slice_by, the [offset, length] row range of every value of that column: the app reads the slice
+# it shows instead of the whole table. The manifest is replaced last, so an app never sees a manifest
+# pointing to files from an unfinished publish.
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from techbrasil.artefatos import artifact_hash, primary_path, write_artifact
+
+MANIFEST = "manifest.json"
+BUNDLE_VERSION = 1
+
+
+def compact_numeric(values, decimals=None):
+    """Values rounded to decimals, in the smallest dtype that holds them exactly.
+
+    Integer columns are narrowed to int8 / int16 / int32; floats become float32 only when every value
+    survives the round trip at this precision (float32 keeps ~7 significant digits). Floats are never
+    turned into integers: R sums integer columns in 32 bits and overflows to NA.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if not len(values) or (values.min() >= info.min and values.max() <= info.max):
+                return values.astype(dtype)
+        return values
+    arr = values.astype(np.float64)
+    if decimals is not None:
+        arr = np.round(arr, decimals)
+    finite = np.isfinite(arr)
+    tol = 0.5 * 10.0 ** -decimals if decimals is not None else 0
+    as32 = arr.astype(np.float32)
+    if np.all(np.abs(as32[finite].astype(np.float64) - arr[finite]) <= tol):
+        return as32
+    return arr
+
+
+class BundleTable:
+    """One table of a bundle and how to lay it out.
+
+    sort_by: row order (slices need slice_by to come first)
+    slice_by: column whose values get a row range in the manifest
+    decimals: {column: decimals} for numeric columns (others keep full precision, still downcast)
+    labels: {column or value: label} stored in the manifest for the app's menus and titles
+    """
+
+    def __init__(self, name, df, sort_by=(), slice_by=None, decimals=None, labels=None, checks=None):
+        if slice_by is not None and (not sort_by or sort_by[0] != slice_by):
+            raise ValueError(f"{name}: slice_by must be the first sort column")
+        self.name = name
+        self.df = df
+        self.sort_by = list(sort_by)
+        self.slice_by = slice_by
+        self.decimals = decimals or {}
+        self.labels = labels or {}
+        self.checks = checks
+
+    def layout(self):
+        """The frame as it is written: sorted, compact numbers, string columns as categoricals."""
+        df = self.df
+        if self.sort_by:
+            df = df.sort_values(self.sort_by, kind="stable", key=_sort_key).reset_index(drop=True)
+        out = {}
+        for col in df.columns:
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                out[col] = s
+            elif pd.api.types.is_bool_dtype(s.dtype):
+                out[col] = s.to_numpy()
+            elif pd.api.types.is_numeric_dtype(s.dtype):
+                out[col] = compact_numeric(s, self.decimals.get(col))
+            else:
+                out[col] = s.astype("category")
+        return pd.DataFrame(out)
+
+
+def _sort_key(s):
+    # Categoricals sort in category order (e.g. variables in menu order), other columns by value
+    return s.cat.codes if isinstance(s.dtype, pd.CategoricalDtype) else s
+
+
+def slice_ranges(df, col):
+    """{value: [offset, length]} of a column whose equal values are contiguous."""
+    values = df[col]
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    if len(starts) != len(uniques):
+        raise ValueError(f"Rows are not grouped by {col}: sort by it first")
+    lengths = np.diff(np.r_[starts, len(df)])
+    return {str(v): [int(s), int(n)] for v, s, n in zip(uniques, starts, lengths)}
+
+
+def write_bundle(out_dir, tables, meta=None):
+    """Write every table (unchanged ones are skipped by content hash) and then the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    entries = {}
+    for table in tables:
+        df = table.layout()
+        base = os.path.join(out_dir, table.name)
+        write_artifact(df, base, auto_dictionary_ratio=0, checks=table.checks)
+        path = primary_path(base)
+        entries[table.name] = {
+            "file": os.path.basename(path),
+            "rows": len(df),
+            "bytes": os.path.getsize(path),
+            "hash": artifact_hash(base),
+            "columns": {c: _type_name(df[c]) for c in df.columns},
+            "sorted_by": table.sort_by,
+            "slice_by": table.slice_by,
+            "slices": slice_ranges(df, table.slice_by) if table.slice_by else None,
+            "labels": table.labels or None,
+        }
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **(meta or {}),
+        "tables": entries,
+    }
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def _type_name(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return "dictionary"
+    return str(s.dtype)
+
+
+def load_manifest(out_dir):
+    with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_table(out_dir, name, fatia=None, columns=None, manifest=None, to_pandas=True):
+    """A bundle table (or one slice of it), memory-mapped; fatia: value of the table's slice_by column."""
+    manifest = manifest or load_manifest(out_dir)
+    info = manifest["tables"][name]
+    table = feather.read_table(os.path.join(out_dir, info["file"]), columns=columns, memory_map=True)
+    if fatia is not None:
+        offset, length = info["slices"][str(fatia)]
+        table = table.slice(offset, length)
+    return table.to_pandas() if to_pandas else table
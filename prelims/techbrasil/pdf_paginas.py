@@ -0,0 +1,75 @@
+# pdf_paginas.py
+
+# Page-cached, parallel PDF text extraction (PyMuPDF)
+# Every page is extracted once; texts are optionally cached on disk under
+# <cache_dir>/<sha256 of the PDF>/<page>.txt so re-running field regexes never re-reads the PDF.
+# Missing pages are split into contiguous ranges and extracted in a process pool.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from techbrasil.memo import file_hash as pdf_sha256
+
+
+def _page_count(path):
+    import fitz  # PyMuPDF
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+def _extract_range(path, pages):
+    # Runs in a worker process: open the document once per range
+    import fitz  # PyMuPDF
+    with fitz.open(path) as doc:
+        return [(pg, doc[pg].get_text()) for pg in pages]
+
+
+def _page_file(cache_dir, pg):
+    return os.path.join(cache_dir, f"{pg:05d}.txt")
+
+
+def _split(pages, n_chunks):
+    size = max(1, -(-len(pages) // n_chunks))
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def extract_pages(pdf_path, cache_dir=None, workers=None):
+    """Return the text of every page (list indexed by 0-based page number).
+
+    cache_dir: optional folder for the on-disk page cache (keyed by PDF hash and page)
+    workers: process count; 1 extracts in-process, None uses all cores
+    """
+    n_pages = _page_count(pdf_path)
+    texts = [None] * n_pages
+
+    doc_cache = None
+    if cache_dir:
+        doc_cache = os.path.join(cache_dir, pdf_sha256(pdf_path))
+        os.makedirs(doc_cache, exist_ok=True)
+        for pg in range(n_pages):
+            page_file = _page_file(doc_cache, pg)
+            if os.path.exists(page_file):
+                with open(page_file, "r", encoding="utf-8") as f:
+                    texts[pg] = f.read()
+
+    missing = [pg for pg in range(n_pages) if texts[pg] is None]
+    if missing:
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(missing) < 2 * workers:
+            results = [_extract_range(pdf_path, missing)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunks = _split(missing, workers * 4)
+                results = list(pool.map(_extract_range, [pdf_path] * len(chunks), chunks))
+
+        for chunk in results:
+            for pg, text in chunk:
+                texts[pg] = text
+                if doc_cache:
+                    # Write to a temp name first so an interrupted run never leaves a truncated page
+                    tmp = _page_file(doc_cache, pg) + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(text)
+                    os.replace(tmp, _page_file(doc_cache, pg))
+
+    return texts
@@ -0,0 +1,208 @@
+# pipeline.py
+
+# Small incremental build runner for the prelims/ Python scripts
+# Each Stage declares its function, parameters (kwargs), input files and output files.
+# A stage's fingerprint hashes its code (its module and every repository module it imports, e.g. the
+# techbrasil helpers), its parameters and the content of its inputs; it only
+# re-runs when the fingerprint changed or an output is missing. Stages whose inputs are produced
+# by other stages wait for them; independent stages (e.g. CNCT and PRONATEC) run concurrently.
+
+import ast
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from techbrasil.instrumentacao import stage as instrumented_stage
+from techbrasil.memo import file_hash
+
+STATE_NAME = ".pipeline_state.json"
+
+
+@dataclass
+class Stage:
+    """One build step: func(**kwargs) reads `inputs` and writes `outputs` (file paths).
+
+    always_run: re-run every time (e.g. a conditional S3 fetch); downstream stages still
+    only re-run if the content of its outputs changed.
+    """
+    name: str
+    func: object
+    kwargs: dict = field(default_factory=dict)
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    after: list = field(default_factory=list)
+    always_run: bool = False
+
+
+# Modules whose source is part of a stage's code: everything under the repository (prelims/, techbrasil/,
+# seminarios/, ...), not the standard library or installed packages
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _local_imports(module):
+    """Repository modules imported (directly or not) by module, found by walking their import statements."""
+    found, todo = {}, [module]
+    while todo:
+        mod = todo.pop()
+        path = getattr(mod, "__file__", None)
+        if mod.__name__ in found or not path or not os.path.abspath(path).startswith(_REPO_ROOT + os.sep):
+            continue
+        try:
+            source = inspect.getsource(mod)
+        except (OSError, TypeError):
+            continue
+        found[mod.__name__] = source
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # "from techbrasil.x import y": y may itself be a module
+                names = [node.module] + [f"{node.module}.{a.name}" for a in node.names]
+            else:
+                continue
+            for name in names:
+                if name not in sys.modules and name.split(".")[0] == "techbrasil":
+                    # Imported lazily inside a function: load it to hash it
+                    try:
+                        importlib.import_module(name)
+                    except ImportError:
+                        continue
+                if name in sys.modules:
+                    todo.append(sys.modules[name])
+    return found
+
+
+def _func_source(func):
+    # Source of the stage function's module and of every repository module it imports, transitively,
+    # so an edit to a techbrasil helper (formatting.py, propag.py, ...) invalidates the stages using it
+    module = inspect.getmodule(func)
+    sources = _local_imports(module) if module is not None else {}
+    if not sources:
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+    return "\n".join(f"# {name}\n{sources[name]}" for name in sorted(sources))
+
+
+def _run_stage(name, func, kwargs):
+    # Recorded as the parent of the steps the stage function instruments itself
+    with instrumented_stage(f"pipeline.{name}"):
+        func(**kwargs)
+
+
+class Pipeline:
+    def __init__(self, stages, state_path=STATE_NAME, max_workers=None, executor="process"):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.state_path = state_path
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.executor = executor
+        self.state = self._load_state()
+        self.deps = self._dependencies()
+
+    # --- State and fingerprints ---
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"stages": {}, "files": {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def file_hash(self, path):
+        # Cached by (size, mtime) so unchanged large raw files are not re-hashed every run
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        cached = self.state["files"].get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime:
+            return cached["sha256"]
+        sha256 = file_hash(path)
+        self.state["files"][path] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": sha256}
+        return sha256
+
+    def fingerprint(self, stage):
+        h = hashlib.sha256()
+        h.update(stage.name.encode())
+        h.update(_func_source(stage.func).encode())
+        h.update(json.dumps(stage.kwargs, sort_keys=True, default=repr).encode())
+        for path in stage.inputs:
+            h.update(f"{path}={self.file_hash(path)}".encode())
+        return h.hexdigest()
+
+    def _dependencies(self):
+        producers = {out: s.name for s in self.stages.values() for out in s.outputs}
+        deps = {}
+        for s in self.stages.values():
+            upstream = {producers[p] for p in s.inputs if p in producers} | set(s.after)
+            deps[s.name] = upstream - {s.name}
+        return deps
+
+    def is_fresh(self, stage):
+        recorded = self.state["stages"].get(stage.name)
+        if stage.always_run or recorded is None:
+            return False
+        if not all(os.path.exists(p) for p in stage.outputs):
+            return False
+        return recorded["fingerprint"] == self.fingerprint(stage)
+
+    # --- Execution ---
+
+    def _closure(self, targets):
+        needed, todo = set(), list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in needed:
+                needed.add(name)
+                todo.extend(self.deps[name])
+        return needed
+
+    def run(self, targets=None, force=False):
+        """Run the stages needed for targets (default: all); returns {stage: "ran" | "fresh"}."""
+        needed = self._closure(targets or list(self.stages))
+        status, running = {}, {}
+        pool_cls = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+
+        with pool_cls(max_workers=self.max_workers) as pool:
+            while len(status) < len(needed):
+                ready = [
+                    n for n in needed
+                    if n not in status and n not in running.values() and self.deps[n] <= set(status)
+                ]
+                for name in ready:
+                    stage = self.stages[name]
+                    if not force and self.is_fresh(stage):
+                        status[name] = "fresh"
+                        print(f"✅ {name}: up to date")
+                        continue
+                    print(f"→ {name}: running")
+                    running[pool.submit(_run_stage, name, stage.func, stage.kwargs)] = name
+
+                if not running:
+                    if len(status) < len(needed) and not ready:
+                        raise RuntimeError(f"Dependency cycle among stages: {sorted(needed - set(status))}")
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    future.result()
+                    stage = self.stages[name]
+                    self.state["stages"][name] = {
+                        "fingerprint": self.fingerprint(stage),
+                        "outputs": {p: self.file_hash(p) for p in stage.outputs},
+                    }
+                    self._save_state()
+                    status[name] = "ran"
+                    print(f"✅ {name}: done")
+        return status
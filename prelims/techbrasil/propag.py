@@ -0,0 +1,166 @@
+# propag.py
+
+# Vectorized Propag scenario engine
+# Computes FEF contribution, FEF received, net FEF and EPT flows for all UFs x N scenarios
+# as (UF x scenario) NumPy matrices, instead of one block of pandas columns per scenario.
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.formatting import present
+
+SCENARIO_PARAMS = ["fef_rate", "ept_rate", "horizon", "amort_share"]
+
+SCENARIO_OUTPUTS = [
+    "refinanced_base", "fef_contrib", "fef_received", "fef_net", "ept",
+    "fef_net_total", "ept_total"
+]
+
+
+def scenario_grid(fef_rate, ept_rate, horizon=1, amort_share=1.0):
+    """Cartesian product of the parameter values, one row per scenario.
+
+    fef_rate / ept_rate: share of the refinanced base paid into FEF / invested in EPT per year
+    horizon: number of years the annual flows are summed over
+    amort_share: fraction of the extraordinary amortization (amort_extr) actually paid
+    """
+    values = [np.atleast_1d(v) for v in (fef_rate, ept_rate, horizon, amort_share)]
+    mesh = np.meshgrid(*values, indexing="ij")
+    grid = pd.DataFrame({p: m.ravel() for p, m in zip(SCENARIO_PARAMS, mesh)})
+    grid.insert(0, "scenario", [f"cen{i + 1:02d}" for i in range(len(grid))])
+    return grid
+
+
+def refinanced_base(saldo, amort_extr, grid):
+    """(UF x scenario) balance left after the extraordinary amortization share of each scenario."""
+    saldo = np.asarray(saldo, dtype=np.float64)[:, None]
+    amort = np.asarray(amort_extr, dtype=np.float64)[:, None]
+    amort_share = grid["amort_share"].to_numpy(np.float64)[None, :]
+    return saldo - amort * amort_share
+
+
+def scenario_flows(refinanced_base, fef_share_pct, grid):
+    """FEF and EPT flows of every scenario from the (UF x scenario) refinanced base."""
+    share = np.asarray(fef_share_pct, dtype=np.float64)[:, None] / 100
+    fef_rate = grid["fef_rate"].to_numpy(np.float64)[None, :]
+    ept_rate = grid["ept_rate"].to_numpy(np.float64)[None, :]
+    horizon = grid["horizon"].to_numpy(np.float64)[None, :]
+
+    fef_contrib = refinanced_base * fef_rate
+    # The FEF pool of each scenario is redistributed to all UFs by the STN shares
+    fef_received = share * fef_contrib.sum(axis=0, keepdims=True)
+    fef_net = fef_received - fef_contrib
+    ept = refinanced_base * ept_rate
+
+    return {
+        "refinanced_base": refinanced_base,
+        "fef_contrib": fef_contrib,
+        "fef_received": fef_received,
+        "fef_net": fef_net,
+        "ept": ept,
+        "fef_net_total": fef_net * horizon,
+        "ept_total": ept * horizon,
+    }
+
+
+def scenario_matrices(saldo, amort_extr, fef_share_pct, grid):
+    """Broadcast all scenarios at once; returns a dict of (UF x scenario) float64 arrays.
+
+    saldo, amort_extr and fef_share_pct are aligned per UF (same order, R$ and % units).
+    """
+    return scenario_flows(refinanced_base(saldo, amort_extr, grid), fef_share_pct, grid)
+
+
+def run_scenarios(ufs, saldo, amort_extr, fef_share_pct, grid):
+    """Tidy long table with one row per (scenario, UF) and the scenario parameters attached."""
+    ufs = np.asarray(ufs)
+    matrices = scenario_matrices(saldo, amort_extr, fef_share_pct, grid)
+    n_uf, n_sc = len(ufs), len(grid)
+
+    # Column-major ravel keeps UF varying fastest within each scenario
+    out = {"scenario": np.repeat(grid["scenario"].to_numpy(), n_uf)}
+    for p in SCENARIO_PARAMS:
+        out[p] = np.repeat(grid[p].to_numpy(), n_uf)
+    out["UF"] = np.tile(ufs, n_sc)
+    for name in SCENARIO_OUTPUTS:
+        out[name] = matrices[name].ravel(order="F")
+
+    return pd.DataFrame(out)
+
+
+# Published layout of propag_ept_financeiro (pickle / RDS / CSV)
+LEGACY_COLUMNS = [
+    "UF", "Estado", "saldo_mar25", "amort_extr",
+    "FEF_1ano_cen01", "EPT_1ano_cen01", "fef_share_pct", "FEF_1ano_liq_cen01",
+    "FEF_1ano_cen02", "EPT_1ano_cen02", "FEF_1ano_liq_cen02",
+    "EPT_5ano_cen01", "EPT_5ano_cen02", "FEF_5ano_liq_cen01", "FEF_5ano_liq_cen02"
+]
+
+# Columns that were always published as numbers (everything else monetary is a formatted string)
+LEGACY_NUMERIC_COLUMNS = ["fef_share_pct", "FEF_1ano_liq_cen01", "FEF_1ano_liq_cen02"]
+LEGACY_ROUNDED_COLUMNS = ["FEF_1ano_liq_cen01", "FEF_1ano_liq_cen02"]
+
+
+@dataclass
+class PropagTable:
+    """Typed Propag inputs and scenario results, one position per UF.
+
+    All monetary arrays are float64 in R$; flows are (UF x scenario) matrices
+    as returned by scenario_matrices(). Formatting happens only in to_legacy_frame().
+    """
+    uf: np.ndarray
+    estado: np.ndarray
+    saldo: np.ndarray
+    amort_extr: np.ndarray
+    fef_share_pct: np.ndarray
+    scenarios: pd.DataFrame
+    flows: dict = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, uf, estado, saldo, amort_extr, fef_share_pct, scenarios, flows=None):
+        """flows: precomputed scenario_matrices() of the same inputs (e.g. memoized), else computed here."""
+        table = cls(
+            uf=np.asarray(uf, dtype=object),
+            estado=np.asarray(estado, dtype=object),
+            saldo=np.asarray(saldo, dtype=np.float64),
+            amort_extr=np.asarray(amort_extr, dtype=np.float64),
+            fef_share_pct=np.asarray(fef_share_pct, dtype=np.float64),
+            scenarios=scenarios.reset_index(drop=True),
+        )
+        if flows is None:
+            flows = scenario_matrices(table.saldo, table.amort_extr, table.fef_share_pct, table.scenarios)
+        table.flows = flows
+        return table
+
+    def long(self):
+        """Tidy (scenario x UF) table, numeric columns only."""
+        return run_scenarios(self.uf, self.saldo, self.amort_extr, self.fef_share_pct, self.scenarios)
+
+    def to_frame(self):
+        """Wide numeric frame with the published column names (one column per scenario and flow)."""
+        df = pd.DataFrame({
+            "UF": self.uf,
+            "Estado": self.estado,
+            "saldo_mar25": self.saldo,
+            "amort_extr": self.amort_extr,
+            "fef_share_pct": self.fef_share_pct,
+        })
+        for j, cen in enumerate(self.scenarios["scenario"]):
+            horizon = int(self.scenarios["horizon"].iloc[j])
+            df[f"FEF_1ano_{cen}"] = self.flows["fef_contrib"][:, j]
+            df[f"EPT_1ano_{cen}"] = self.flows["ept"][:, j]
+            df[f"FEF_1ano_liq_{cen}"] = self.flows["fef_net"][:, j]
+            df[f"EPT_{horizon}ano_{cen}"] = self.flows["ept_total"][:, j]
+            df[f"FEF_{horizon}ano_liq_{cen}"] = self.flows["fef_net_total"][:, j]
+        return df
+
+    def to_legacy_frame(self, style="us"):
+        """Frame in the published propag_ept_financeiro layout (formatted strings where it always had them)."""
+        df = self.to_frame()[LEGACY_COLUMNS]
+        money = [c for c in LEGACY_COLUMNS[2:] if c not in LEGACY_NUMERIC_COLUMNS]
+        out = present(df, money, style=style)
+        for col in LEGACY_ROUNDED_COLUMNS:
+            out[col] = df[col].round(2)
+        return out
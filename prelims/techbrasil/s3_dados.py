@@ -0,0 +1,194 @@
+# s3_dados.py
+
+# Shared raw-data fetcher for the techbrazildata bucket
+# Keeps a manifest (ETag, size, sha256) of every object already on disk, revalidates with a
+# conditional HEAD (If-None-Match), and downloads missing or stale objects with ranged GETs
+# into resumable .part files. Many keys are fetched concurrently through one pooled client.
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from dotenv import load_dotenv
+
+from techbrasil.memo import file_hash as file_sha256
+
+BUCKET_NAME = "techbrazildata"
+LOCAL_ROOT = "D:/Country/Brazil/TechBrazil"
+
+MANIFEST_NAME = ".s3_manifest.json"
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def make_s3_client(max_pool_connections=16, **kwargs):
+    """boto3 S3 client from the .env credentials, sized for concurrent downloads."""
+    load_dotenv()
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+        config=Config(max_pool_connections=max_pool_connections, retries={"max_attempts": 5, "mode": "standard"}),
+        **kwargs,
+    )
+
+
+def _etag_matches(path, etag):
+    # Single-part uploads have the content MD5 as ETag; multipart ETags ("<md5>-<parts>") cannot be checked
+    etag = etag.strip('"')
+    return "-" not in etag and file_sha256(path, algorithm="md5") == etag
+
+
+def _not_modified(err):
+    return err.response.get("Error", {}).get("Code") in ("304", "NotModified")
+
+
+class RawDataFetcher:
+    """Fetch s3://<bucket>/<key> to <local_root>/<key>, skipping objects that are still current.
+
+    client: any boto3-compatible S3 client (tests can pass one bound to moto / MinIO)
+    """
+
+    def __init__(self, bucket=BUCKET_NAME, local_root=LOCAL_ROOT, client=None,
+                 manifest_path=None, max_workers=8, chunk_size=CHUNK_SIZE):
+        self.bucket = bucket
+        self.local_root = local_root
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._client = client
+        self.manifest_path = manifest_path or os.path.join(local_root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = make_s3_client(max_pool_connections=max(10, 2 * self.max_workers))
+        return self._client
+
+    # --- Manifest ---
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def _record(self, key, etag, size, sha256, local_path):
+        with self._lock:
+            self.manifest[key] = {
+                "etag": etag, "size": size, "sha256": sha256,
+                "mtime": os.path.getmtime(local_path),
+            }
+            self._save_manifest()
+
+    def local_path(self, key):
+        return os.path.join(self.local_root, *key.split("/"))
+
+    def _local_is_intact(self, key, path):
+        # Size check always; sha256 only when the file was touched since it was recorded
+        entry = self.manifest.get(key)
+        if entry is None or not os.path.exists(path):
+            return False
+        if os.path.getsize(path) != entry["size"]:
+            return False
+        if os.path.getmtime(path) != entry.get("mtime"):
+            return file_sha256(path) == entry["sha256"]
+        return True
+
+    # --- Download ---
+
+    def _download(self, key, path, etag, size):
+        part = path + ".part"
+        part_meta = part + ".json"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Resume only if the partial file belongs to the same object version
+        offset = 0
+        if os.path.exists(part) and os.path.exists(part_meta):
+            with open(part_meta, "r", encoding="utf-8") as f:
+                if json.load(f).get("etag") == etag:
+                    offset = os.path.getsize(part)
+        if offset == 0:
+            with open(part_meta, "w", encoding="utf-8") as f:
+                json.dump({"etag": etag}, f)
+            open(part, "wb").close()
+
+        with open(part, "ab") as out:
+            while offset < size:
+                end = min(offset + self.chunk_size, size) - 1
+                resp = self.client.get_object(
+                    Bucket=self.bucket, Key=key, Range=f"bytes={offset}-{end}", IfMatch=etag
+                )
+                for block in resp["Body"].iter_chunks(1 << 20):
+                    out.write(block)
+                out.flush()
+                offset = end + 1
+
+        sha256 = file_sha256(part)
+        os.replace(part, path)
+        os.remove(part_meta)
+        self._record(key, etag, size, sha256, path)
+
+    def fetch(self, key):
+        """Return the local path of key, downloading it only if missing, partial or stale."""
+        path = self.local_path(key)
+        entry = self.manifest.get(key)
+        intact = self._local_is_intact(key, path)
+
+        try:
+            if intact:
+                # Raises a 304 ClientError when the recorded ETag is still current
+                head = self.client.head_object(Bucket=self.bucket, Key=key, IfNoneMatch=entry["etag"])
+                print(f"⚠️ Remote object changed: s3://{self.bucket}/{key}")
+            else:
+                head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if intact and _not_modified(e):
+                print(f"✅ Using local file: {path}")
+                return path
+            print(f"❌ Failed to check s3://{self.bucket}/{key}: {e}")
+            raise
+        except (NoCredentialsError, BotoCoreError) as e:
+            # Offline or no credentials: a file we cannot revalidate is still better than none
+            if os.path.exists(path):
+                print(f"⚠️ Could not revalidate ({e}); using local file: {path}")
+                return path
+            print(f"❌ Failed to download from S3: {e}")
+            raise
+
+        if (entry is None and os.path.exists(path) and os.path.getsize(path) == head["ContentLength"]
+                and _etag_matches(path, head["ETag"])):
+            # File fetched before the manifest existed and identical to the object: adopt it instead of downloading again
+            self._record(key, head["ETag"], head["ContentLength"], file_sha256(path), path)
+            print(f"✅ Using local file: {path}")
+            return path
+
+        print(f"→ Downloading s3://{self.bucket}/{key}")
+        self._download(key, path, head["ETag"], head["ContentLength"])
+        print(f"✅ Downloaded from S3 to: {path}")
+        return path
+
+    def fetch_many(self, keys):
+        """Fetch several keys concurrently; returns {key: local path}."""
+        keys = list(keys)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            paths = list(pool.map(self.fetch, keys))
+        return dict(zip(keys, paths))
+
+    def list_keys(self, prefix="rawdata/"):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
@@ -0,0 +1,139 @@
+# saldos.py
+
+# Append-only store of state debt balances keyed by (UF, reference date, source)
+# The store is one CSV log (prelims/municipios/saldos_divida.csv) read with a single columnar pyarrow read:
+#   uf,ref_date,source,saldo,note
+#   SP,2025-03-31,STN,291684192718.19,FAQ Propag - Anexo
+# New STN / FGV-IBRE snapshots are appended (append() or by adding lines at the end); a later line with
+# the same (uf, ref_date, source) supersedes the earlier one, so corrections never rewrite history.
+# Queries: snapshot() at an exact date, as_of() / asof_join() for the latest snapshot on or before a date,
+# interpolate() linearly between the snapshots around a date.
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from techbrasil.brnum import parse_br_number
+
+COLUMNS = ["uf", "ref_date", "source", "saldo", "note"]
+KEY = ["uf", "ref_date", "source"]
+
+_CONVERT = pacsv.ConvertOptions(
+    column_types={"uf": pa.string(), "ref_date": pa.date32(), "source": pa.string(), "saldo": pa.float64(), "note": pa.string()},
+    strings_can_be_null=True,
+)
+
+
+class DebtStore:
+    """Debt balances in R$ (float64), one row per (uf, ref_date, source)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._cache = None
+        self._cache_stamp = None
+
+    # --- Writing ---
+
+    def append(self, rows):
+        """Append snapshot rows (DataFrame or records with uf, ref_date, source, saldo[, note]).
+
+        saldo may be numeric or Brazilian-formatted text ("1.234.567,89"). Returns the number of rows written.
+        """
+        df = pd.DataFrame(rows).copy()
+        missing = set(KEY + ["saldo"]) - set(df.columns)
+        if missing:
+            raise ValueError(f"Snapshot rows are missing columns: {sorted(missing)}")
+        if "note" not in df.columns:
+            df["note"] = ""
+
+        parsed = parse_br_number(df["saldo"]) if not pd.api.types.is_numeric_dtype(df["saldo"]) else None
+        if parsed is not None:
+            if len(parsed.failed):
+                raise ValueError(f"Unparsed saldo values: {df.loc[parsed.failed, 'saldo'].tolist()}")
+            df["saldo"] = parsed.values
+        df["uf"] = df["uf"].str.upper().str.strip()
+        df["ref_date"] = pd.to_datetime(df["ref_date"]).dt.strftime("%Y-%m-%d")
+        df["saldo"] = df["saldo"].map("{:.2f}".format)
+
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            if new_file:
+                writer.writerow(COLUMNS)
+            writer.writerows(df[COLUMNS].itertuples(index=False, name=None))
+        self._cache = None
+        return len(df)
+
+    # --- Reading ---
+
+    def load(self):
+        """All snapshots (latest line wins per key), sorted by uf, ref_date and source."""
+        stamp = (os.path.getsize(self.path), os.path.getmtime(self.path))
+        if self._cache is None or self._cache_stamp != stamp:
+            table = pacsv.read_csv(self.path, convert_options=_CONVERT)
+            df = table.to_pandas()
+            df["ref_date"] = pd.to_datetime(df["ref_date"]).astype("datetime64[ns]")
+            df = df.drop_duplicates(KEY, keep="last").sort_values(KEY, kind="stable").reset_index(drop=True)
+            self._cache, self._cache_stamp = df, stamp
+        return self._cache
+
+    def _select(self, source):
+        df = self.load()
+        if source is not None:
+            sources = [source] if isinstance(source, str) else list(source)
+            df = df[df["source"].isin(sources)]
+        return df
+
+    def dates(self, source=None):
+        return sorted(self._select(source)["ref_date"].unique())
+
+    def snapshot(self, ref_date, source=None):
+        """Balances at exactly ref_date, as a Series indexed by UF."""
+        df = self._select(source)
+        df = df[df["ref_date"] == pd.Timestamp(ref_date)]
+        if df["uf"].duplicated().any():
+            raise ValueError(f"Several sources on {ref_date}; pass source= to choose one")
+        return df.set_index("uf")["saldo"].rename(f"saldo_{pd.Timestamp(ref_date):%Y%m%d}")
+
+    def as_of(self, date, source=None):
+        """Latest balance on or before date for each UF (Series indexed by UF; UFs with none are absent)."""
+        df = self._select(source)
+        df = df[df["ref_date"] <= pd.Timestamp(date)]
+        return df.sort_values("ref_date", kind="stable").groupby("uf")["saldo"].last()
+
+    def asof_join(self, left, date_col, uf_col="UF", source=None, value_col="saldo"):
+        """Attach to each row of left the latest balance of its UF on or before left[date_col]."""
+        right = self._select(source)[["uf", "ref_date", "saldo"]].rename(
+            columns={"uf": uf_col, "ref_date": "_ref_date", "saldo": value_col}
+        )
+        left = left.copy()
+        left["_order"] = np.arange(len(left))
+        left["_date"] = pd.to_datetime(left[date_col]).astype("datetime64[ns]")
+        out = pd.merge_asof(
+            left.sort_values("_date"), right.sort_values("_ref_date"),
+            left_on="_date", right_on="_ref_date", by=uf_col, direction="backward",
+        )
+        return out.sort_values("_order").drop(columns=["_order", "_date", "_ref_date"]).reset_index(drop=True)
+
+    def interpolate(self, date, source=None):
+        """Balance of each UF at date, linear in time between the snapshots before and after it.
+
+        Dates outside a UF's first/last snapshot give NaN (no extrapolation).
+        """
+        df = self._select(source).groupby(["uf", "ref_date"], as_index=False)["saldo"].mean()
+        t = pd.Timestamp(date).value
+        out = {}
+        for uf, g in df.groupby("uf", sort=True):
+            x = g["ref_date"].to_numpy().astype(np.int64)
+            out[uf] = np.interp(t, x, g["saldo"].to_numpy(), left=np.nan, right=np.nan)
+        return pd.Series(out, name=f"saldo_{pd.Timestamp(date):%Y%m%d}", dtype=np.float64)
+
+    def wide(self, source=None):
+        """UF x ref_date matrix of balances."""
+        df = self._select(source)
+        return df.pivot_table(index="uf", columns="ref_date", values="saldo", aggfunc="last")
@@ -0,0 +1,151 @@
+# territorio.py
+
+# Territorial dimensions with fixed integer positions: regions, UFs and (loaded from IBGE tables) municipalities
+#   UF.position(["SP", "São Paulo", "sao paulo", 35])   -> array([19, 19, 19, 19])
+#   shares = UF.align(fef_shares)                      # UF-keyed dict -> float64 array in IBGE code order
+#   df["fef_share_pct"] = shares[UF.position(df["UF"])]  # positional attach instead of a merge on "UF"
+#   UF.parent.labels[UF.parent_pos]                   # region of every UF
+# Positions follow the IBGE codes (as in prelims/mapas/codes_ibge.R), so arrays aligned to a dimension
+# line up across scripts. Keys may be codes, abbreviations or names (accent- and case-insensitive).
+# Municipalities use the same class, built from the df_codes_ibge table (municipios()).
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.ocupacoes import fold_text
+
+
+class Dimension:
+    """Members sorted by IBGE code; position(keys) maps any key column to positions in one pass."""
+
+    def __init__(self, codes, labels, names, parent=None, parent_codes=None):
+        codes = np.asarray(codes, dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        if len(np.unique(self.codes)) != len(self.codes):
+            raise ValueError("Dimension codes must be unique")
+        self.labels = np.asarray(labels, dtype=object)[order]
+        self.names = np.asarray(names, dtype=object)[order]
+        self.parent = parent
+        self.parent_pos = parent.position(np.asarray(parent_codes)[order]) if parent is not None else None
+        self._lookup = self._build_lookup()
+
+    def _build_lookup(self):
+        lookup = {}
+        positions = np.arange(len(self.codes))
+        for keys in (self.codes, self.codes.astype(str), self.labels, fold_text(pd.Series(self.names)).to_numpy()):
+            for key, pos in zip(keys, positions):
+                # A name shared by several members (e.g. municipalities in different UFs) is ambiguous
+                lookup[key] = -2 if key in lookup and lookup[key] != pos else pos
+        lookup.update({str(lbl).upper(): pos for lbl, pos in zip(self.labels, positions)})
+        return lookup
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _key_position(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._lookup.get(int(key), -1)
+        if not isinstance(key, str):
+            return -1
+        pos = self._lookup.get(key, self._lookup.get(key.strip().upper(), None))
+        if pos is None:
+            pos = self._lookup.get(fold_text(pd.Series([key])).iloc[0], -1)
+        return pos
+
+    def position(self, keys, missing="raise"):
+        """Positions of keys (codes, abbreviations or names); missing="raise" or "ignore" (-1)."""
+        keys = np.asarray(keys)
+        if keys.dtype.kind in "iu":
+            # Integer codes: binary search on the sorted codes, no per-key lookups
+            out = np.minimum(np.searchsorted(self.codes, keys), len(self.codes) - 1)
+            bad = self.codes[out] != keys
+            if bad.any() and missing == "raise":
+                raise KeyError(f"Unknown codes: {np.unique(keys[bad])[:10].tolist()}")
+            out[bad] = -1
+            return out.astype(np.int64)
+        uniques_codes, uniques = pd.factorize(pd.Series(np.asarray(keys, dtype=object)), use_na_sentinel=True)
+        found = np.array([self._key_position(k) for k in uniques], dtype=np.int64)
+        bad = found < 0
+        if bad.any() and missing == "raise":
+            ambiguous = [k for k, f in zip(uniques, found) if f == -2]
+            unknown = [k for k, f in zip(uniques, found) if f == -1]
+            problems = ([f"unknown keys: {unknown[:10]}"] if unknown else []) + (
+                [f"ambiguous names (use codes): {ambiguous[:10]}"] if ambiguous else [])
+            raise KeyError("; ".join(problems))
+        found[bad] = -1
+        out = np.full(len(uniques_codes), -1, dtype=np.int64)
+        valid = uniques_codes >= 0
+        out[valid] = found[uniques_codes[valid]]
+        return out
+
+    def align(self, mapping, fill=np.nan, dtype=np.float64):
+        """Array in dimension order from a key -> value mapping (dict or Series); absent members get fill."""
+        items = mapping.items() if hasattr(mapping, "items") else mapping
+        keys, values = zip(*items) if len(mapping) else ((), ())
+        out = np.full(len(self), fill, dtype=dtype)
+        out[self.position(list(keys))] = np.asarray(values, dtype=dtype)
+        return out
+
+    def categorical(self, keys):
+        """pandas Categorical with this dimension's labels as fixed categories (codes = positions)."""
+        return pd.Categorical.from_codes(self.position(keys, missing="ignore"), categories=self.labels)
+
+    def frame(self):
+        df = pd.DataFrame({"code": self.codes, "label": self.labels, "name": self.names})
+        if self.parent is not None:
+            df["parent_code"] = self.parent.codes[self.parent_pos]
+            df["parent_label"] = self.parent.labels[self.parent_pos]
+        return df
+
+
+# IBGE macro-regions (CO_5RGRANDE)
+REGIAO = Dimension(
+    codes=[1, 2, 3, 4, 5],
+    labels=["N", "NE", "SE", "S", "CO"],
+    names=["Norte", "Nordeste", "Sudeste", "Sul", "Centro-Oeste"],
+)
+
+# IBGE UF codes (CO_UF), abbreviations (SG_UF) and names (NM_UF); region = first digit of the code
+_UFS = [
+    (11, "RO", "Rondônia"), (12, "AC", "Acre"), (13, "AM", "Amazonas"), (14, "RR", "Roraima"),
+    (15, "PA", "Pará"), (16, "AP", "Amapá"), (17, "TO", "Tocantins"),
+    (21, "MA", "Maranhão"), (22, "PI", "Piauí"), (23, "CE", "Ceará"), (24, "RN", "Rio Grande do Norte"),
+    (25, "PB", "Paraíba"), (26, "PE", "Pernambuco"), (27, "AL", "Alagoas"), (28, "SE", "Sergipe"),
+    (29, "BA", "Bahia"),
+    (31, "MG", "Minas Gerais"), (32, "ES", "Espírito Santo"), (33, "RJ", "Rio de Janeiro"), (35, "SP", "São Paulo"),
+    (41, "PR", "Paraná"), (42, "SC", "Santa Catarina"), (43, "RS", "Rio Grande do Sul"),
+    (50, "MS", "Mato Grosso do Sul"), (51, "MT", "Mato Grosso"), (52, "GO", "Goiás"), (53, "DF", "Distrito Federal"),
+]
+UF = Dimension(
+    codes=[c for c, _, _ in _UFS],
+    labels=[s for _, s, _ in _UFS],
+    names=[n for _, _, n in _UFS],
+    parent=REGIAO,
+    parent_codes=[c // 10 for c, _, _ in _UFS],
+)
+
+# df_codes_ibge (prelims/mapas/codes_ibge.R): one row per municipality with CO_MUN, NM_MUN, CO_UF, ...
+MUNICIPIOS_PATH = "D:/Country/Brazil/TechBrazil/working/ibge/df_codes_ibge.rda"
+
+
+def municipios(source=MUNICIPIOS_PATH, code="CO_MUN", name="NM_MUN", uf_code="CO_UF"):
+    """Municipality dimension (5,570 IBGE codes) with UF as parent, from df_codes_ibge or any table with those columns.
+
+    source: DataFrame, .rda/.rds (pyreadr), .feather, .parquet or .csv path.
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source
+    elif source.endswith((".rda", ".rdata", ".rds")):
+        import pyreadr
+        df = next(iter(pyreadr.read_r(source).values()))
+    elif source.endswith(".feather"):
+        df = pd.read_feather(source)
+    elif source.endswith(".parquet"):
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_csv(source, dtype={code: "int64", uf_code: "int64"})
+    df = df[[code, name, uf_code]].drop_duplicates(code)
+    codes = pd.to_numeric(df[code]).to_numpy()
+    return Dimension(codes=codes, labels=codes.astype(str), names=df[name].to_numpy(), parent=UF,
+                     parent_codes=pd.to_numeric(df[uf_code]).to_numpy())
@@ -0,0 +1,188 @@
+# trajetoria.py
+
+# Year-by-year Propag debt trajectories (default 30 years) for all UFs
+# The refinanced balance is corrected each year by IPCA and the real interest rate, then the
+# installment is paid (Price, SAC or an explicit schedule). FEF contribution, FEF received and EPT
+# are computed on the opening balance of each year, so year 1 equals the 1-year figures of propag.py.
+# The recurrence runs over years only; every year is one vectorized step over a (path x UF) array,
+# so a Monte Carlo batch of rate/inflation paths costs the same number of steps as a single path.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+YEARS = 30
+
+# (path x UF x year) arrays produced by simulate()
+TRAJECTORY_OUTPUTS = [
+    "balance", "interest", "principal", "fef_contrib", "fef_received", "fef_net", "ept",
+]
+
+
+def _paths(values, n_paths, years):
+    # scalar, (years,) or (paths x years) -> (paths x years) float64
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 0:
+        arr = np.full(years, float(arr))
+    if arr.ndim == 1:
+        if len(arr) != years:
+            raise ValueError(f"Rate path has {len(arr)} years, expected {years}")
+        arr = np.broadcast_to(arr, (n_paths, years))
+    if arr.shape != (n_paths, years):
+        raise ValueError(f"Rate paths have shape {arr.shape}, expected {(n_paths, years)}")
+    return arr
+
+
+@dataclass
+class Trajectory:
+    """Simulated flows in nominal R$: each output is a (path x UF x year) float64 array.
+
+    deflator: (path x year) cumulative IPCA factor, to express values in R$ of the base year.
+    """
+    uf: np.ndarray
+    years: np.ndarray
+    deflator: np.ndarray
+    outputs: dict
+
+    def real(self, name):
+        return self.outputs[name] / self.deflator[:, None, :]
+
+    def long(self, path=0, real=False):
+        """Tidy (UF x year) table of one path."""
+        n_uf, n_years = len(self.uf), len(self.years)
+        out = {"UF": np.repeat(self.uf, n_years), "ano": np.tile(self.years, n_uf)}
+        for name in self.outputs:
+            values = self.real(name) if real else self.outputs[name]
+            out[name] = values[path].ravel()
+        return pd.DataFrame(out)
+
+    def quantiles(self, name, q=(0.05, 0.5, 0.95), real=False):
+        """(UF x year) quantiles across paths as a tidy table with one column per quantile."""
+        values = self.real(name) if real else self.outputs[name]
+        qs = np.quantile(values, q, axis=0)
+        out = {"UF": np.repeat(self.uf, len(self.years)), "ano": np.tile(self.years, len(self.uf))}
+        for level, arr in zip(q, qs):
+            out[f"{name}_p{round(level * 100):02d}"] = arr.ravel()
+        return pd.DataFrame(out)
+
+
+def simulate(saldo, amort_extr, fef_share_pct, ipca, real_rate, fef_rate=0.01, ept_rate=0.006,
+             years=YEARS, amortization="price", amort_share=1.0, extr_schedule=None, uf=None):
+    """Run the recurrence for every UF and every rate path at once.
+
+    saldo, amort_extr, fef_share_pct: per UF (R$, R$, %), as in PropagTable
+    ipca, real_rate: annual rates; scalar, (years,) path, or (paths x years) batch of paths
+    amortization: "price" (annuity recomputed each year at that year's rate), "sac" (equal share of the corrected balance
+        over the remaining years) or a (years,) / (UF x years) array of the share of the corrected
+        balance paid each year
+    extr_schedule: share of the extraordinary amortization paid in each year; None pays it up front
+    """
+    saldo = np.asarray(saldo, dtype=np.float64)
+    extr = np.asarray(amort_extr, dtype=np.float64) * amort_share
+    share = np.asarray(fef_share_pct, dtype=np.float64) / 100
+    n_uf = len(saldo)
+
+    ipca_arr, real_arr = np.asarray(ipca), np.asarray(real_rate)
+    n_paths = max(a.shape[0] if a.ndim == 2 else 1 for a in (ipca_arr, real_arr))
+    ipca = _paths(ipca_arr, n_paths, years)
+    real_rate = _paths(real_arr, n_paths, years)
+    growth = (1 + ipca) * (1 + real_rate) - 1
+
+    extr_paid = np.zeros(years)
+    if extr_schedule is None:
+        opening = np.broadcast_to(saldo - extr, (n_paths, n_uf)).copy()
+    else:
+        sched = np.asarray(extr_schedule, dtype=np.float64)[:years]
+        extr_paid[:len(sched)] = sched
+        opening = np.broadcast_to(saldo, (n_paths, n_uf)).copy()
+
+    schedule = None
+    if not isinstance(amortization, str):
+        schedule = np.broadcast_to(np.asarray(amortization, dtype=np.float64), (n_uf, years))
+    elif amortization not in ("price", "sac"):
+        raise ValueError(f"Unknown amortization: {amortization} (expected 'price', 'sac' or an array)")
+
+    out = {name: np.empty((n_paths, n_uf, years)) for name in TRAJECTORY_OUTPUTS}
+    for t in range(years):
+        g = growth[:, t:t + 1]
+        fef = opening * fef_rate
+        out["fef_contrib"][:, :, t] = fef
+        out["fef_received"][:, :, t] = share[None, :] * fef.sum(axis=1, keepdims=True)
+        out["ept"][:, :, t] = opening * ept_rate
+
+        corrected = opening * (1 + g)
+        remaining = years - t
+        if schedule is not None:
+            payment = corrected * schedule[None, :, t]
+        elif amortization == "sac":
+            payment = corrected / remaining
+        else:
+            # Annuity on the opening balance at this year's rate over the remaining years
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor = np.where(g != 0, g * (1 + g) ** remaining / ((1 + g) ** remaining - 1), 1 / remaining)
+            payment = opening * factor
+        payment = np.minimum(payment + extr[None, :] * extr_paid[t], corrected)
+
+        out["interest"][:, :, t] = opening * g
+        out["principal"][:, :, t] = payment - opening * g
+        opening = corrected - payment
+        out["balance"][:, :, t] = opening
+
+    out["fef_net"] = out["fef_received"] - out["fef_contrib"]
+    deflator = np.cumprod(1 + ipca, axis=1)
+    uf = np.asarray(uf if uf is not None else np.arange(n_uf), dtype=object)
+    return Trajectory(uf=uf, years=np.arange(1, years + 1), deflator=deflator, outputs=out)
+
+
+# --- Monte Carlo over rate and inflation paths ---
+
+def rate_paths(rng, n_paths, years, mean, sd, persistence=0.0):
+    """AR(1) annual rate paths around mean: x_t = mean + persistence * (x_{t-1} - mean) + sd * e_t."""
+    shocks = rng.standard_normal((n_paths, years)) * sd
+    if not persistence:
+        return mean + shocks
+    dev = np.empty_like(shocks)
+    dev[:, 0] = shocks[:, 0]
+    for t in range(1, years):
+        dev[:, t] = persistence * dev[:, t - 1] + shocks[:, t]
+    return mean + dev
+
+
+def _simulate_chunk(seed, n_paths, rate_model, sim_kwargs, keep):
+    rng = np.random.default_rng(seed)
+    years = sim_kwargs.get("years", YEARS)
+    ipca = rate_paths(rng, n_paths, years, **rate_model["ipca"])
+    real_rate = rate_paths(rng, n_paths, years, **rate_model["real_rate"])
+    traj = simulate(ipca=ipca, real_rate=real_rate, **sim_kwargs)
+    return {name: traj.outputs[name].astype(np.float32) for name in keep}, traj.deflator.astype(np.float32)
+
+
+def monte_carlo(saldo, amort_extr, fef_share_pct, rate_model, n_paths=10_000, seed=0, chunk_size=1_000,
+                workers=None, keep=("balance", "fef_net", "ept"), uf=None, **sim_kwargs):
+    """Simulate n_paths random IPCA / real-rate paths in chunks of chunk_size.
+
+    rate_model: {"ipca": {"mean", "sd", "persistence"}, "real_rate": {...}} (kwargs of rate_paths)
+    workers: None or 1 runs the chunks in this process; >1 spreads them over a process pool.
+    Each chunk gets its own seed derived from `seed`, so a run is reproduced by the same seed,
+    n_paths and chunk_size whatever the number of workers.
+    Returns a Trajectory holding only the `keep` outputs (float32).
+    """
+    sim_kwargs = dict(sim_kwargs, saldo=saldo, amort_extr=amort_extr, fef_share_pct=fef_share_pct, uf=uf)
+    sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(sd, size, rate_model, sim_kwargs, keep) for sd, size in zip(seeds, sizes)]
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        parts = [_simulate_chunk(*a) for a in args]
+
+    outputs = {name: np.concatenate([p[0][name] for p in parts]) for name in keep}
+    deflator = np.concatenate([p[1] for p in parts])
+    years = sim_kwargs.get("years", YEARS)
+    uf = np.asarray(uf if uf is not None else np.arange(len(np.atleast_1d(saldo))), dtype=object)
+    return Trajectory(uf=uf, years=np.arange(1, years + 1), deflator=deflator, outputs=outputs)
@@ -0,0 +1,224 @@
+# validacao.py
+
+# Schema and invariant checks run when an artifact is written
+#   write_artifact(df, base, checks=[unique("course_id"), not_null("curso_nome"), in_range("carga_horaria", 1, 2000)])
+# Every check works on whole columns (hash-based duplicates, null counts, min/max, bincount over the UF
+# dimension) and is timed against a budget proportional to the rows (BUDGET_S_PER_MROW), so validating
+# a million-row table costs a few percent of producing it (benchmark validate_cnct_1m).
+# The compact report is saved next to the artifact as <base>.validacao.json and logged as a
+# "validate.<artifact>" stage.
+# A failed "error" check raises ValidationError before the artifact is written, so a bad parse stops
+# the chain there instead of being read by the downstream stages; "warn" checks are only reported.
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from techbrasil.instrumentacao import stage
+from techbrasil.territorio import UF
+
+# Time allowed per check: BUDGET_S_PER_MROW seconds per million rows, at least BUDGET_MIN_S
+# (hashing a 3-column string key of a million rows takes about 0.2 s; null, range and UF checks a few ms)
+BUDGET_S_PER_MROW = 0.25
+BUDGET_MIN_S = 0.01
+REPORT_EXT = ".validacao.json"
+
+
+class ValidationError(ValueError):
+    """An error-level check failed; the full report is in .report."""
+
+    def __init__(self, report):
+        self.report = report
+        failed = [c["check"] for c in report["checks"] if not c["ok"] and c["severity"] == "error"]
+        super().__init__(f"{report['artifact']}: failed checks {failed}")
+
+
+class Check:
+    """Named test of a DataFrame: func(df) -> (ok, detail dict)."""
+
+    def __init__(self, name, func, severity="error"):
+        if severity not in ("error", "warn"):
+            raise ValueError(f"Unknown severity: {severity} (expected 'error' or 'warn')")
+        self.name = name
+        self.func = func
+        self.severity = severity
+
+    def __call__(self, df):
+        return self.func(df)
+
+
+def _label(kind, cols, **params):
+    args = [", ".join(cols)] + [f"{k}={v}" for k, v in params.items() if v is not None]
+    return f"{kind}({', '.join(a for a in args if a)})"
+
+
+def _numeric(s, thousands=None):
+    if thousands and not pd.api.types.is_numeric_dtype(s.dtype):
+        s = s.astype("string").str.replace(thousands, "", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# --- Checks ---
+
+def columns(*names, dtypes=None, severity="error"):
+    """Columns present; dtypes: optional {column: kind}, kind one of "numeric", "string", "integer"."""
+    kinds = {"numeric": pd.api.types.is_numeric_dtype, "string": pd.api.types.is_string_dtype,
+             "integer": pd.api.types.is_integer_dtype}
+    dtypes = dtypes or {}
+
+    def func(df):
+        missing = [c for c in [*names, *dtypes] if c not in df.columns]
+        wrong = {c: str(df[c].dtype) for c, kind in dtypes.items()
+                 if c in df.columns and not kinds[kind](df[c].dtype)
+                 and not (isinstance(df[c].dtype, pd.CategoricalDtype) and kinds[kind](df[c].cat.categories.dtype))}
+        return not missing and not wrong, {"missing": missing, "wrong_dtype": wrong}
+
+    return Check(_label("columns", [*names, *dtypes]), func, severity)
+
+
+def unique(*cols, severity="error"):
+    """No two rows share the key; nulls are values like any other (the BR row of a cube has UF null)."""
+    cols = list(cols)
+
+    def func(df):
+        dup = df.duplicated(cols, keep=False).to_numpy()
+        n = int(dup.sum())
+        first = np.flatnonzero(dup)[:1_000]
+        examples = df.iloc[first][cols].drop_duplicates().head(5).astype(str).to_numpy().tolist() if n else []
+        return n == 0, {"duplicates": n, "examples": examples}
+
+    return Check(_label("unique", cols), func, severity)
+
+
+def not_null(*cols, min_rate=1.0, severity="error"):
+    """Share of non-null values of each column at least min_rate."""
+    cols = list(cols)
+
+    def func(df):
+        n = max(len(df), 1)
+        rates = {c: round(1 - int(df[c].isna().sum()) / n, 6) for c in cols}
+        low = {c: r for c, r in rates.items() if r < min_rate}
+        return not low, {"rate": rates, "below": sorted(low)}
+
+    return Check(_label("not_null", cols, min_rate=min_rate if min_rate < 1 else None), func, severity)
+
+
+def in_range(col, low=None, high=None, thousands=None, severity="error"):
+    """Numeric values within [low, high]; nulls are left to not_null.
+
+    thousands: separator to drop from formatted text columns (e.g. "," in the published "us" layout).
+    """
+    def func(df):
+        values = _numeric(df[col], thousands)
+        valid = ~np.isnan(values)
+        out = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            out |= valid & (values < low)
+        if high is not None:
+            out |= valid & (values > high)
+        detail = {"out_of_range": int(out.sum()), "unparsed": int((~valid).sum() - df[col].isna().sum())}
+        if valid.any():
+            detail.update(min=float(values[valid].min()), max=float(values[valid].max()))
+        return detail["out_of_range"] == 0 and detail["unparsed"] == 0, detail
+
+    return Check(_label("in_range", [col], low=low, high=high), func, severity)
+
+
+def ufs(col="UF", complete=True, severity="error"):
+    """Values are known UFs (abbreviation, IBGE code or name); complete=True also requires all 27.
+
+    Nulls are left to not_null (region and Brazil rows of a cube have no UF).
+    """
+    def func(df):
+        pos = UF.position(df[col], missing="ignore")
+        unknown = (pos < 0) & df[col].notna().to_numpy()
+        counts = np.bincount(pos[pos >= 0], minlength=len(UF))
+        absent = UF.labels[counts == 0].tolist()
+        detail = {"unknown": int(unknown.sum()), "n_ufs": int((counts > 0).sum())}
+        if complete:
+            detail["absent"] = absent
+        return detail["unknown"] == 0 and (not complete or not absent), detail
+
+    return Check(_label("ufs", [col], complete=complete), func, severity)
+
+
+def sums_to(col, total, tol=1e-9, by=None, thousands=None, severity="error"):
+    """Column total (per group of by, if given) equal to total within tol."""
+    by = [by] if isinstance(by, str) else by
+
+    def func(df):
+        values = _numeric(df[col], thousands)
+        if by:
+            sums = pd.Series(values).groupby([df[b].to_numpy() for b in by], dropna=False).sum().to_numpy()
+        else:
+            sums = np.array([np.nansum(values)])
+        worst = float(np.max(np.abs(sums - total))) if len(sums) else 0.0
+        return worst <= tol, {"groups": len(sums), "max_deviation": round(worst, 12)}
+
+    return Check(_label("sums_to", [col], total=total, tol=tol, by=",".join(by) if by else None), func, severity)
+
+
+# --- Running checks ---
+
+def validate(df, checks, artifact="frame", budget_s_per_mrow=BUDGET_S_PER_MROW):
+    """Run checks on df; returns the report (dict) without raising."""
+    budget = max(BUDGET_MIN_S, len(df) / 1e6 * budget_s_per_mrow)
+    start = time.perf_counter()
+    results = []
+    with stage(f"validate.{artifact}", rows_in=len(df), checks=len(checks)) as st:
+        for check in checks:
+            t0 = time.perf_counter()
+            try:
+                ok, detail = check(df)
+            except Exception as exc:
+                ok, detail = False, {"exception": f"{type(exc).__name__}: {exc}"}
+            seconds = time.perf_counter() - t0
+            results.append({
+                "check": check.name, "ok": bool(ok), "severity": check.severity,
+                "seconds": round(seconds, 6), "over_budget": seconds > budget,
+                **{k: v for k, v in detail.items() if v not in ([], {}, None)},
+            })
+        failed = [r["check"] for r in results if not r["ok"] and r["severity"] == "error"]
+        st.extra["failed"] = failed
+    return {
+        "artifact": artifact, "rows": len(df), "columns": df.shape[1],
+        "ok": not failed, "seconds": round(time.perf_counter() - start, 6), "budget_s": round(budget, 6),
+        "checks": results,
+    }
+
+
+def write_report(report, base):
+    path = base + REPORT_EXT
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, separators=(",", ":"), default=str)
+    return path
+
+
+def read_report(base):
+    with open(base + REPORT_EXT, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_artifact(df, base, checks, budget_s_per_mrow=BUDGET_S_PER_MROW):
+    """validate() + report next to the artifact + summary on stderr; raises ValidationError on errors.
+
+    stderr, not stdout: divida1b.py --serve answers on stdout, one JSON line per request.
+    """
+    report = validate(df, checks, os.path.basename(base), budget_s_per_mrow)
+    write_report(report, base)
+    for r in report["checks"]:
+        if not r["ok"]:
+            mark = "❌" if r["severity"] == "error" else "⚠️"
+            detail = {k: v for k, v in r.items() if k not in ("check", "ok", "severity", "seconds", "over_budget")}
+            print(f"{mark} {report['artifact']}: {r['check']} {detail}", file=sys.stderr)
+        if r["over_budget"]:
+            print(f"⚠️ {report['artifact']}: {r['check']} took {r['seconds']:.3f} s (budget {report['budget_s']:.3f} s)",
+                  file=sys.stderr)
+    if not report["ok"]:
+        raise ValidationError(report)
+    return report
@@ -1,23 +1,29 @@
 # youtubevideo_transcript.py
-import textwrap
+# Batch transcripts of YouTube videos -> LaTeX -> PDF
+#   python seminarios/youtubevideo_transcript.py                      # default video list
+#   python seminarios/youtubevideo_transcript.py ID1 ID2 ...          # any list of video IDs
+#   python seminarios/youtubevideo_transcript.py --fixtures DIR ID1   # offline: DIR/<ID>.json instead of YouTube
+#   python seminarios/youtubevideo_transcript.py --no-pdf ID1         # only write the .tex files
+# Raw transcripts are cached on disk (one JSON line per segment), so re-renders never re-fetch; each source
+# has its own cache folder (cache_transcricoes/youtube/, cache_transcricoes/fixtures-<dir>/), so an offline
+# fixtures run never stands in for the real transcript.
+import json
 import os
-from youtube_transcript_api import YouTubeTranscriptApi
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Seminario Juros para Educação
-# https://www.youtube.com/live/JeSZGEUUrhM 
-
-# Step 1: Fetch transcript
-video_id = "JeSZGEUUrhM"
+# https://www.youtube.com/live/JeSZGEUUrhM
+video_ids = ["JeSZGEUUrhM"]
 language_code = "pt"
-transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language_code])
 
-# Step 2: Format transcript into paragraphs
-full_text = " ".join([entry['text'] for entry in transcript])
-formatted_text = "\n\n".join(textwrap.wrap(full_text, width=80))  # Wrap at 80 chars
+latex_dir = "seminarios/latex/"
+cache_dir = "seminarios/cache_transcricoes/"
+paragraph_seconds = 60  # segments are grouped into one paragraph per minute, headed by its timestamp
+max_downloads = 4
 
-# Step 3: Define LaTeX document structure
-latex_template = f"""
-\\documentclass[a4paper,12pt]{{article}}
+latex_preamble = """\\documentclass[a4paper,12pt]{{article}}
 \\usepackage[utf8]{{inputenc}}
 \\usepackage[T1]{{fontenc}}
 \\usepackage{{geometry}}
@@ -34,27 +40,140 @@ latex_template = f"""
 
 \\section*{{Transcript}}
 
-{formatted_text}
-
-\\end{{document}}
 """
 
-# Step 4: Define paths
-latex_dir = "seminarios/latex/"
-tex_filename = os.path.join(latex_dir, "transcript.tex")
-pdf_filename = os.path.join(latex_dir, "transcript.pdf")
-
-# Ensure the directory exists
-os.makedirs(latex_dir, exist_ok=True)
-
-# Step 5: Save to .tex file
-with open(tex_filename, "w", encoding="utf-8") as f:
-    f.write(latex_template)
-
-# Step 6: Change working directory to where .tex is located
-# NOT os.chdir(latex_dir)
-
-# Step 7: Compile LaTeX to PDF in the correct directory
-os.system(f"pdflatex -output-directory={latex_dir} transcript.tex")
-
-print(f"PDF successfully created at: {pdf_filename}")
+latex_special = str.maketrans({
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+    "_": r"\_", "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+})
+
+
+# --- Step 1: Transcript sources (swappable: YouTube, or local JSON fixtures for offline builds) ---
+class YouTubeSource:
+    name = "youtube"
+
+    def fetch(self, video_id, language):
+        """List of {"text", "start", "duration"} segments."""
+        from youtube_transcript_api import YouTubeTranscriptApi
+        if hasattr(YouTubeTranscriptApi, "get_transcript"):
+            return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+        return YouTubeTranscriptApi().fetch(video_id, languages=[language]).to_raw_data()
+
+
+class FixtureSource:
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.name = "fixtures-" + os.path.basename(os.path.normpath(os.path.abspath(fixture_dir)))
+
+    def fetch(self, video_id, language):
+        with open(os.path.join(self.fixture_dir, f"{video_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+# --- Step 2: Disk cache of raw transcripts ---
+def cache_path(video_id, language, cache_dir=cache_dir, source_name=YouTubeSource.name):
+    return os.path.join(cache_dir, source_name, f"{video_id}.{language}.jsonl")
+
+
+def fetch_cached(video_id, source, language=language_code, cache_dir=cache_dir):
+    """Fetch video_id into the cache unless already there; returns the cache file path."""
+    path = cache_path(video_id, language, cache_dir, source.name)
+    if os.path.exists(path):
+        return path
+    segments = source.fetch(video_id, language)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for seg in segments:
+            f.write(json.dumps({"text": seg["text"], "start": seg["start"], "duration": seg.get("duration", 0)}, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+    return path
+
+
+def iter_segments(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def fetch_all(video_ids, source, language=language_code, cache_dir=cache_dir, max_workers=max_downloads):
+    """Fetch all videos with a bounded thread pool; returns {video_id: cache path or exception}."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {vid: pool.submit(fetch_cached, vid, source, language, cache_dir) for vid in video_ids}
+    results = {}
+    for vid, future in futures.items():
+        try:
+            results[vid] = future.result()
+        except Exception as exc:
+            results[vid] = exc
+    return results
+
+
+# --- Step 3: Stream segments into the .tex file ---
+def timestamp(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def write_tex(video_id, segments, tex_filename, paragraph_seconds=paragraph_seconds):
+    """Write segments (any iterable) one at a time; a new timestamped paragraph every paragraph_seconds."""
+    os.makedirs(os.path.dirname(tex_filename) or ".", exist_ok=True)
+    with open(tex_filename, "w", encoding="utf-8") as f:
+        f.write(latex_preamble.format(video_id=video_id.translate(latex_special)))
+        paragraph_end = None
+        for seg in segments:
+            if paragraph_end is None or seg["start"] >= paragraph_end:
+                if paragraph_end is not None:
+                    f.write("\n")
+                f.write(f"\\textbf{{[{timestamp(seg['start'])}]}}\n")
+                paragraph_end = seg["start"] + paragraph_seconds
+            f.write(" ".join(seg["text"].split()).translate(latex_special) + "\n")
+        f.write("\n\\end{document}\n")
+    return tex_filename
+
+
+# --- Step 4: Compile LaTeX to PDF (one process per document) ---
+def compile_pdf(tex_filename):
+    out_dir = os.path.dirname(tex_filename) or "."
+    try:
+        result = subprocess.run(
+            ["pdflatex", "-interaction=nonstopmode", f"-output-directory={out_dir}", tex_filename],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        return None  # pdflatex not installed
+    return result.returncode
+
+
+def main(video_ids=video_ids, source=None, make_pdf=True):
+    source = source or YouTubeSource()
+    cached = fetch_all(video_ids, source)
+
+    tex_files = []
+    for vid, path in cached.items():
+        if isinstance(path, Exception):
+            print(f"❌ {vid}: transcript not available ({path})")
+            continue
+        tex_files.append(write_tex(vid, iter_segments(path), os.path.join(latex_dir, f"transcript_{vid}.tex")))
+
+    if make_pdf and tex_files:
+        with ProcessPoolExecutor() as pool:
+            for tex, code in zip(tex_files, pool.map(compile_pdf, tex_files)):
+                pdf = tex[:-4] + ".pdf"
+                print(f"✅ PDF successfully created at: {pdf}" if code == 0 else f"⚠️ pdflatex failed for {tex} (exit code {code})")
+    else:
+        for tex in tex_files:
+            print(f"✅ LaTeX written at: {tex}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    source = None
+    if "--fixtures" in args:
+        i = args.index("--fixtures")
+        source = FixtureSource(args[i + 1])
+        del args[i:i + 2]
+    make_pdf = "--no-pdf" not in args
+    ids = [a for a in args if not a.startswith("--")] or video_ids
+    main(ids, source=source, make_pdf=make_pdf)